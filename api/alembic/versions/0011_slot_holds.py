@@ -0,0 +1,42 @@
+"""add slot holds
+
+Revision ID: 0011_slot_holds
+Revises: 0010_ensure_master_telegram_chat_fields
+Create Date: 2026-03-02 12:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0011_slot_holds"
+down_revision = "0010_ensure_master_telegram_chat_fields"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "slot_holds",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("token", sa.String(length=64), nullable=False),
+        sa.Column("service_id", sa.Integer(), nullable=False),
+        sa.Column("master_id", sa.Integer(), nullable=True),
+        sa.Column("starts_at", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("ends_at", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["service_id"], ["services.id"], name="fk_slot_holds_service_id_services", ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["master_id"], ["masters.id"], name="fk_slot_holds_master_id_masters", ondelete="CASCADE"),
+        sa.UniqueConstraint("token", name="uq_slot_holds_token"),
+    )
+    op.create_index("ix_slot_holds_expires_at", "slot_holds", ["expires_at"], unique=False)
+    op.create_index("ix_slot_holds_starts_at", "slot_holds", ["starts_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_slot_holds_starts_at", table_name="slot_holds")
+    op.drop_index("ix_slot_holds_expires_at", table_name="slot_holds")
+    op.drop_table("slot_holds")
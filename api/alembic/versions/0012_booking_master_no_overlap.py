@@ -0,0 +1,54 @@
+"""exclude overlapping active bookings per master
+
+Revision ID: 0012_booking_master_no_overlap
+Revises: 0011_slot_holds
+Create Date: 2026-03-03 12:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0012_booking_master_no_overlap"
+down_revision = "0011_slot_holds"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    conflicts = bind.execute(
+        sa.text(
+            """
+            SELECT a.id, b.id
+            FROM bookings AS a
+            JOIN bookings AS b
+              ON a.master_id = b.master_id
+             AND a.id < b.id
+             AND tsrange(a.starts_at, a.ends_at, '[)') && tsrange(b.starts_at, b.ends_at, '[)')
+            WHERE a.status IN ('NEW', 'CONFIRMED')
+              AND b.status IN ('NEW', 'CONFIRMED')
+            LIMIT 20
+            """
+        )
+    ).all()
+    if conflicts:
+        pairs = ", ".join(f"{first}/{second}" for first, second in conflicts)
+        raise RuntimeError(f"Overlapping active bookings must be resolved before this migration: {pairs}")
+
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+    op.execute(
+        sa.text(
+            """
+            ALTER TABLE bookings
+            ADD CONSTRAINT ex_bookings_master_no_overlap
+            EXCLUDE USING gist (master_id WITH =, tsrange(starts_at, ends_at, '[)') WITH &&)
+            WHERE (master_id IS NOT NULL AND status IN ('NEW', 'CONFIRMED'))
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("ALTER TABLE bookings DROP CONSTRAINT IF EXISTS ex_bookings_master_no_overlap"))
@@ -0,0 +1,40 @@
+"""add telegram outbox
+
+Revision ID: 0013_telegram_outbox
+Revises: 0012_booking_master_no_overlap
+Create Date: 2026-03-09 12:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0013_telegram_outbox"
+down_revision = "0012_booking_master_no_overlap"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telegram_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("booking_id", sa.Integer(), nullable=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column("status", sa.String(length=20), server_default="pending", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["booking_id"], ["bookings.id"], name="fk_telegram_outbox_booking_id_bookings", ondelete="CASCADE"),
+    )
+    op.create_index("ix_telegram_outbox_status_next_attempt_at", "telegram_outbox", ["status", "next_attempt_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_telegram_outbox_status_next_attempt_at", table_name="telegram_outbox")
+    op.drop_table("telegram_outbox")
@@ -0,0 +1,31 @@
+"""add telegram processed updates
+
+Revision ID: 0014_telegram_processed_updates
+Revises: 0013_telegram_outbox
+Create Date: 2026-03-12 12:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0014_telegram_processed_updates"
+down_revision = "0013_telegram_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telegram_processed_updates",
+        sa.Column("key", sa.String(length=128), nullable=False),
+        sa.Column("seen_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_telegram_processed_updates_seen_at", "telegram_processed_updates", ["seen_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_telegram_processed_updates_seen_at", table_name="telegram_processed_updates")
+    op.drop_table("telegram_processed_updates")
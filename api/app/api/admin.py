@@ -13,21 +13,32 @@ from app.api.deps import CurrentAdmin, get_current_admin_for_audit, require_admi
 from app.core.config import settings
 from app.db import get_db
 from app.models import Admin, AdminRole, AuditActorType, AuditLog, Booking, BookingStatus, Master, Notification, Review, Service, ServiceCategory, Setting, WeeklyRitual, master_services
-from app.services.bookings import normalize_booking_start, resolve_available_slot
+from app.services.bookings import flush_booking, normalize_booking_start, resolve_available_slot
 from app.services.audit import log_event
+from app.services.availability_cache import availability_cache, publish_availability_reset
+from app.services.backup_service import backup_service
+from app.services.events import event_bus
+from app.services.occupancy import BookingOccupancy, occupancy_store, publish_booking_change, publish_occupancy_rebuild
+from app.services.request_latency import request_latency
+from app.services.settings_cache import publish_setting_change, settings_cache
 from app.services.telegram import (
     delete_webhook,
     get_tg_notifications_settings,
     get_webhook_info,
     normalize_tg_notifications,
-    send_master_booking_confirmed,
-    send_master_booking_rescheduled,
     send_message,
     set_webhook,
 )
-from app.utils import DEFAULT_SLOT_STEP_MIN, get_availability_slots, get_setting as get_setting_value, parse_date_param
+from app.services.telegram_access import publish_telegram_access_change, telegram_access_cache
+from app.services.telegram_breaker import telegram_breaker
+from app.services.telegram_dedup import telegram_dedup
+from app.services.telegram_outbox import OUTBOX_MASTER_CONFIRMED, OUTBOX_MASTER_RESCHEDULED, enqueue_telegram_message, outbox_stats
+from app.services.telegram_scheduler import send_scheduler
+from app.services.telegram_updates import update_dispatcher
+from app.utils import DEFAULT_SLOT_STEP_MIN, get_availability_matrix, get_availability_slots, get_setting as get_setting_value, parse_date_param
 from app.schemas import (
     AuditLogOut,
+    BackupCatalogOut,
     BookingAdminCreate,
     BookingOut,
     BookingMovePayload,
@@ -191,6 +202,7 @@ async def create_service(payload: ServiceCreate, request: Request, db: AsyncSess
         service_out = ServiceOut.model_validate(result.scalar_one())
     except IntegrityError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Service with this slug already exists") from exc
+    await publish_availability_reset(db)
     ip, user_agent = _request_context(request)
     await log_event(db, actor_type=AuditActorType.web, actor_admin=admin, actor_role=_admin_role_enum(current_admin), action="service.create", entity_type="service", entity_id=service_out.id, meta={"title": service_out.title}, ip=ip, user_agent=user_agent)
     return service_out
@@ -219,6 +231,7 @@ async def update_service(service_id: int, payload: ServiceUpdate, request: Reque
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Service with this slug already exists") from exc
     result = await db.execute(_service_with_category_query().where(Service.id == service.id))
     service = result.scalar_one()
+    await publish_availability_reset(db)
     ip, user_agent = _request_context(request)
     await log_event(db, actor_type=AuditActorType.web, actor_admin=admin, actor_role=_admin_role_enum(current_admin), action="service.update", entity_type="service", entity_id=service.id, meta={"fields": list(updates.keys())}, ip=ip, user_agent=user_agent)
     return service
@@ -232,6 +245,7 @@ async def delete_service(service_id: int, request: Request, db: AsyncSession = D
     if not service:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
     await db.delete(service)
+    await publish_availability_reset(db)
     ip, user_agent = _request_context(request)
     await log_event(db, actor_type=AuditActorType.web, actor_admin=admin, actor_role=_admin_role_enum(current_admin), action="service.delete", entity_type="service", entity_id=service_id, ip=ip, user_agent=user_agent)
     return {"status": "deleted"}
@@ -261,6 +275,7 @@ async def create_master(payload: MasterCreate, db: AsyncSession = Depends(get_db
         master.services = services
     db.add(master)
     await db.flush()
+    await publish_availability_reset(db)
     result = await db.execute(select(Master).where(Master.id == master.id).options(selectinload(Master.services).selectinload(Service.category)))
     return result.scalar_one()
 
@@ -286,6 +301,9 @@ async def update_master(master_id: int, payload: MasterUpdate, db: AsyncSession
             services = (await db.execute(select(Service).where(Service.id.in_(service_ids)))).scalars().all()
         master.services = services
     await db.flush()
+    await publish_availability_reset(db)
+    if "telegram_user_id" in updates:
+        await publish_telegram_access_change(db)
     result = await db.execute(select(Master).where(Master.id == master.id).options(selectinload(Master.services).selectinload(Service.category)))
     return result.scalar_one()
 
@@ -297,6 +315,7 @@ async def delete_master(master_id: int, db: AsyncSession = Depends(get_db)):
     if not master:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Master not found")
     master.is_active = False
+    await publish_availability_reset(db)
     return {"status": "deactivated"}
 
 
@@ -329,6 +348,7 @@ async def unlink_master_telegram(master_id: int, db: AsyncSession = Depends(get_
     master.telegram_username = None
     master.telegram_linked_at = None
     await db.flush()
+    await publish_telegram_access_change(db)
     return MasterTelegramUnlinkOut(master_id=master.id, unlinked=True)
 
 
@@ -538,6 +558,7 @@ async def update_setting(key: str, payload: SettingUpdate, request: Request, db:
         db.add(setting)
     await db.flush()
     await db.refresh(setting)
+    await publish_setting_change(db, key)
     ip, user_agent = _request_context(request)
     await log_event(db, actor_type=AuditActorType.web, actor_admin=admin, actor_role=_admin_role_enum(current_admin), action="settings.update", entity_type="settings", entity_id=key, meta={"keys": list(payload.value_jsonb.keys())[:10]}, ip=ip, user_agent=user_agent)
     return setting
@@ -710,11 +731,11 @@ async def get_admin_availability(
 
     masters = (await db.execute(masters_query)).scalars().all()
 
-    now = datetime.now()
-    slots_by_master: dict[str, list[str]] = {}
-    for master in masters:
-        slots = await get_availability_slots(db, service_id, target_date, now, master_id=master.id)
-        slots_by_master[str(master.id)] = [slot_start.strftime("%H:%M") for slot_start, _ in slots]
+    available = await get_availability_matrix(db, service, target_date, datetime.now(), [master.id for master in masters])
+    slots_by_master = {
+        str(master.id): [slot_start.strftime("%H:%M") for slot_start, _ in available[master.id]]
+        for master in masters
+    }
 
     return AdminAvailabilityOut(
         date=target_date,
@@ -810,7 +831,8 @@ async def create_booking(payload: BookingAdminCreate, request: Request, db: Asyn
         is_read=True,
     )
     db.add(booking)
-    await db.flush()
+    await flush_booking(db)
+    await publish_booking_change(db, booking)
 
     result = await db.execute(
         select(Booking)
@@ -855,10 +877,12 @@ async def move_booking(
         master_id=payload.master_id,
     )
 
+    previous_occupancy = BookingOccupancy.of(booking)
     booking.master_id = payload.master_id
     booking.starts_at = chosen_start
     booking.ends_at = chosen_end
-    await db.flush()
+    await flush_booking(db)
+    await publish_booking_change(db, booking, previous=previous_occupancy)
 
     refreshed = await db.execute(
         select(Booking)
@@ -895,6 +919,7 @@ async def update_booking(booking_id: int, payload: BookingUpdate, request: Reque
     old_status = booking.status
     old_starts_at = booking.starts_at
     old_ends_at = booking.ends_at
+    previous_occupancy = BookingOccupancy.of(booking)
     updates = payload.model_dump(exclude_unset=True)
 
     if "status" in updates and updates["status"] is not None:
@@ -975,7 +1000,9 @@ async def update_booking(booking_id: int, payload: BookingUpdate, request: Reque
 
     for key, value in updates.items():
         setattr(booking, key, value)
-    await db.flush()
+    await flush_booking(db)
+    if updates.keys() & {"status", "master_id", "starts_at", "ends_at"}:
+        await publish_booking_change(db, booking, previous=previous_occupancy)
 
     result = await db.execute(
         select(Booking)
@@ -988,10 +1015,10 @@ async def update_booking(booking_id: int, payload: BookingUpdate, request: Reque
     datetime_changed = old_starts_at != updated_booking.starts_at or old_ends_at != updated_booking.ends_at
 
     if status_changed_to_confirmed:
-        await send_master_booking_confirmed(db, updated_booking)
+        await enqueue_telegram_message(db, OUTBOX_MASTER_CONFIRMED, updated_booking.id)
 
     if datetime_changed:
-        await send_master_booking_rescheduled(db, updated_booking, old_starts_at)
+        await enqueue_telegram_message(db, OUTBOX_MASTER_RESCHEDULED, updated_booking.id, {"old_starts_at": old_starts_at.isoformat()})
 
     ip, user_agent = _request_context(request)
     await log_event(db, actor_type=AuditActorType.web, actor_admin=admin, actor_role=_admin_role_enum(current_admin), action="booking.update", entity_type="booking", entity_id=updated_booking.id, meta={"fields": list(updates.keys())}, ip=ip, user_agent=user_agent)
@@ -1021,6 +1048,41 @@ async def list_audit_logs(
     return result.scalars().all()
 
 
+@router.get("/backups", response_model=BackupCatalogOut)
+async def list_backups(
+    limit: int = Query(default=20, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    _: CurrentAdmin = Depends(require_sys_admin),
+):
+    items, total = backup_service.list_backups(offset=offset, limit=limit)
+    return {"total": total, "items": items}
+
+
+@router.get("/metrics")
+async def get_runtime_metrics(_: CurrentAdmin = Depends(require_sys_admin)):
+    return {
+        "settings_cache": settings_cache.stats(),
+        "pg_events": event_bus.stats(),
+        "occupancy": occupancy_store.stats(),
+        "availability_cache": availability_cache.stats(),
+        "telegram_outbox": outbox_stats(),
+        "telegram_sends": send_scheduler.stats(),
+        "telegram_breaker": telegram_breaker.stats(),
+        "telegram_updates": update_dispatcher.stats(),
+        "telegram_dedup": telegram_dedup.stats(),
+        "telegram_access": telegram_access_cache.stats(),
+        "request_latency": request_latency.stats(),
+        "backup_throttle": backup_service.throttle.stats(),
+    }
+
+
+@router.post("/occupancy/rebuild")
+async def rebuild_occupancy(db: AsyncSession = Depends(get_db), _: CurrentAdmin = Depends(require_sys_admin)):
+    await publish_occupancy_rebuild(db)
+    logger.info("occupancy.rebuild requested source=admin")
+    return {"status": "ok"}
+
+
 @router.get("/notifications", response_model=list[NotificationOut])
 async def list_notifications(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Notification).order_by(Notification.created_at.desc()))
@@ -1,28 +1,35 @@
 import logging
 from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import or_, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.sql import nullslast
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
 from app.models import Booking, BookingStatus, Master, Notification, NotificationType, Review, Service, ServiceCategory, WeeklyRitual
 from app.schemas import (
+    AvailabilityNextOut,
     AvailabilityOut,
+    AvailabilityRangeOut,
     BookingCreate,
-    BookingOut,
     BookingSlotOut,
     MasterPublicOut,
+    PublicBookingOut,
     ReviewOut,
     ServiceCategoryOut,
     ServiceOut,
+    SlotHoldCreate,
+    SlotHoldOut,
     WeeklyRitualOut,
 )
-from app.services.bookings import booking_validation_error, normalize_booking_start, resolve_available_slot
-from app.services.telegram import build_booking_notification_payload, send_booking_created_to_admin
-from app.utils import get_availability_slots, get_setting, parse_date_param
+from app.services.bookings import booking_validation_error, flush_booking, normalize_booking_start, resolve_available_slot
+from app.services.occupancy import BookingOccupancy, publish_occupancy_changes
+from app.services.slot_holds import create_slot_hold, get_active_hold, release_slot_hold
+from app.services.telegram import build_booking_notification_payload
+from app.services.telegram_outbox import OUTBOX_BOOKING_CREATED, enqueue_telegram_message
+from app.utils import find_next_available_slots, get_availability_range, get_availability_slots, get_setting, parse_date_param, parse_local_datetime
 
 router = APIRouter(prefix="/public", tags=["public"])
 logger = logging.getLogger(__name__)
@@ -113,6 +120,68 @@ async def get_availability(service_id: int, date: str, master_id: int | None = N
     return {"slots": [{"starts_at": slot[0], "ends_at": slot[1]} for slot in slots]}
 
 
+@router.get("/availability/range", response_model=AvailabilityRangeOut)
+async def get_availability_range_view(
+    service_id: int,
+    date_from: str,
+    date_to: str,
+    master_id: int | None = None,
+    counts_only: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        first_date = parse_date_param(date_from)
+        last_date = parse_date_param(date_to)
+    except ValueError as exc:
+        logger.warning("Invalid date in public availability range request: %s..%s", date_from, date_to)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    if last_date < first_date:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="date_to must not be before date_from")
+
+    now = datetime.now()
+    slots_by_day = await get_availability_range(db, service_id, first_date, last_date, now, master_id=master_id)
+    days = [
+        {
+            "date": day,
+            "free_slots": len(slots),
+            "slots": None if counts_only else [{"starts_at": slot[0], "ends_at": slot[1]} for slot in slots],
+        }
+        for day, slots in slots_by_day.items()
+    ]
+    return {
+        "date_from": days[0]["date"] if days else first_date,
+        "date_to": days[-1]["date"] if days else last_date,
+        "days": days,
+    }
+
+
+@router.get("/availability/next", response_model=AvailabilityNextOut)
+async def get_next_availability(
+    service_id: int,
+    master_id: int | None = None,
+    after: str | None = None,
+    limit: int = Query(default=1, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    now = datetime.now()
+    search_from = now
+    if after:
+        try:
+            search_from = parse_local_datetime(after)
+        except ValueError:
+            try:
+                search_from = datetime.combine(parse_date_param(after), datetime.min.time())
+            except ValueError as exc:
+                logger.warning("Invalid after in public next availability request: %s", after)
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+
+    slots, searched_until = await find_next_available_slots(db, service_id, search_from, now, limit, master_id=master_id)
+    return {
+        "slots": [{"starts_at": slot[0], "ends_at": slot[1]} for slot in slots],
+        "searched_until": searched_until,
+    }
+
+
 @router.get("/bookings/slots", response_model=list[BookingSlotOut])
 async def get_booking_slots(service_id: int, date: str, master_id: int | None = None, db: AsyncSession = Depends(get_db)):
     try:
@@ -133,7 +202,25 @@ async def get_public_setting(key: str, db: AsyncSession = Depends(get_db)):
     return {"key": key, "value_jsonb": value}
 
 
-@router.post("/bookings", response_model=BookingOut)
+@router.post("/slot-holds", response_model=SlotHoldOut)
+async def create_slot_hold_view(payload: SlotHoldCreate, db: AsyncSession = Depends(get_db)):
+    try:
+        requested_start = normalize_booking_start(payload.starts_at, payload.date, payload.time)
+    except ValueError as exc:
+        raise booking_validation_error(str(exc)) from exc
+    return await create_slot_hold(db, payload.service_id, requested_start, datetime.now(), master_id=payload.master_id)
+
+
+@router.delete("/slot-holds/{token}")
+async def release_slot_hold_view(token: str, db: AsyncSession = Depends(get_db)):
+    hold = await get_active_hold(db, token, datetime.now())
+    if not hold:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found")
+    await release_slot_hold(db, hold)
+    return {"status": "released"}
+
+
+@router.post("/bookings", response_model=PublicBookingOut)
 async def create_booking(payload: BookingCreate, db: AsyncSession = Depends(get_db)):
     now = datetime.now()
     try:
@@ -141,37 +228,51 @@ async def create_booking(payload: BookingCreate, db: AsyncSession = Depends(get_
     except ValueError as exc:
         raise booking_validation_error(str(exc)) from exc
 
-    chosen = await resolve_available_slot(db, payload.service_id, requested_start, now, master_id=payload.master_id)
+    service = (
+        await db.execute(select(Service).where(Service.id == payload.service_id).options(joinedload(Service.category)))
+    ).scalar_one_or_none()
+    if not service:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="slot busy")
+
+    hold = await get_active_hold(db, payload.hold_token, now) if payload.hold_token else None
+    if hold and (hold.service_id, hold.master_id, hold.starts_at) != (payload.service_id, payload.master_id, requested_start):
+        logger.info("slot_hold.mismatch hold_id=%s service_id=%s", hold.id, payload.service_id)
+        hold = None
+
+    # The availability check reuses the service above through the identity map and leaves
+    # the chosen master there too, so the new booking is built without any re-select.
+    chosen = await resolve_available_slot(
+        db,
+        payload.service_id,
+        requested_start,
+        now,
+        master_id=payload.master_id,
+        exclude_hold_id=hold.id if hold else None,
+    )
+    master = await db.get(Master, payload.master_id) if payload.master_id is not None else None
 
     booking = Booking(
         client_name=payload.client_name,
         client_phone=payload.client_phone,
-        service_id=payload.service_id,
-        master_id=payload.master_id,
+        service=service,
+        master=master,
         starts_at=chosen[0],
         ends_at=chosen[1],
         comment=payload.comment,
         status=BookingStatus.new,
     )
     db.add(booking)
-    await db.flush()
-
-    booking_result = await db.execute(
-        select(Booking)
-        .where(Booking.id == booking.id)
-        .options(
-            selectinload(Booking.service),
-            selectinload(Booking.service).selectinload(Service.category),
-            selectinload(Booking.master).selectinload(Master.services),
-        )
-    )
-    booking_full = booking_result.scalar_one()
-
-    notification = await build_booking_notification_payload(db, booking_full)
-
+    changes = []
+    if hold:
+        await db.delete(hold)
+        changes.append(BookingOccupancy.of_hold(hold, is_active=False))
+    await flush_booking(db)
+    await publish_occupancy_changes(db, [BookingOccupancy.of(booking), *changes])
+
+    notification = await build_booking_notification_payload(db, booking)
     db.add(Notification(type=NotificationType.booking_created, payload=notification, is_read=False))
 
     logger.info("booking.create completed booking_id=%s source=public", booking.id)
-    await send_booking_created_to_admin(db, booking.id)
+    await enqueue_telegram_message(db, OUTBOX_BOOKING_CREATED, booking.id)
 
-    return booking_full
+    return booking
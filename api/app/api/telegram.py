@@ -1,22 +1,24 @@
 import asyncio
 import logging
-import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app import db as db_module
 from app.core.config import settings
 from app.db import get_db
 from app.models import AdminRole, AuditActorType, Booking, BookingStatus, Master
-from app.services.access import resolve_telegram_role
 from app.services.audit import log_event
 from app.services.backup_service import BackupBusyError, backup_service
+from app.services.bookings import lock_booking_day, master_has_overlap
+from app.services.occupancy import BookingOccupancy, publish_booking_change
 from app.services.telegram import (
     answer_callback_query,
     booking_admin_text,
@@ -28,6 +30,10 @@ from app.services.telegram import (
     send_master_booking_notification,
     send_message,
 )
+from app.services.telegram_access import publish_telegram_access_change, resolve_telegram_access
+from app.services.telegram_breaker import telegram_breaker
+from app.services.telegram_dedup import telegram_dedup
+from app.services.telegram_updates import update_dispatcher
 
 router = APIRouter(tags=["telegram"])
 logger = logging.getLogger(__name__)
@@ -35,6 +41,7 @@ logger = logging.getLogger(__name__)
 ADMIN_MENU = "Выберите действие (нажмите кнопку ниже):\n• Новые записи\n• Ожидают подтверждения\n• Мастера\n• Помощь"
 MASTER_MENU = "Раздел мастера:\n• Мои заявки\n• Помощь"
 MASTER_PAGE_SIZE = 10
+BACKUP_PAGE_SIZE = 5
 BACKUP_MENU_LABEL = "🛡 Резервные копии"
 @dataclass(slots=True)
 class PendingRestoreUpload:
@@ -49,25 +56,6 @@ class PendingRestoreUpload:
 PENDING_RESTORE_UPLOADS: dict[int, PendingRestoreUpload] = {}
 
 
-_IDEMPOTENCY_TTL_SECONDS = 300
-_PROCESSED_CALLBACKS: dict[str, float] = {}
-_PROCESSED_UPDATES: dict[int, float] = {}
-
-
-def _is_processed_recently(cache: dict[Any, float], key: Any, now: float | None = None) -> bool:
-    if now is None:
-        now = time.monotonic()
-    expired = [cache_key for cache_key, ts in cache.items() if now - ts > _IDEMPOTENCY_TTL_SECONDS]
-    for cache_key in expired:
-        cache.pop(cache_key, None)
-
-    ts = cache.get(key)
-    if ts is None:
-        cache[key] = now
-        return False
-    return now - ts <= _IDEMPOTENCY_TTL_SECONDS
-
-
 ADMIN_ACTION_ALIASES: dict[str, set[str]] = {
     "new": {"новые записи", "новые"},
     "pending": {"ожидают подтверждения", "ожидают", "ожидание"},
@@ -87,7 +75,7 @@ MASTER_ACTION_ALIASES: dict[str, set[str]] = {
 class TelegramAccessContext:
     tg_user_id: int
     admin_role: AdminRole | None = None
-    master: Master | None = None
+    master_id: int | None = None
 
     @property
     def is_admin(self) -> bool:
@@ -95,7 +83,7 @@ class TelegramAccessContext:
 
     @property
     def is_master(self) -> bool:
-        return self.master is not None
+        return self.master_id is not None
 
 
 def _admin_reply_keyboard(role: AdminRole | None = None) -> dict[str, Any]:
@@ -214,9 +202,8 @@ async def _send_admin_booking_list(db: AsyncSession, chat_id: int, list_type: st
 
 
 async def _resolve_telegram_access(db: AsyncSession, tg_user_id: int) -> TelegramAccessContext:
-    admin_role = await resolve_telegram_role(db, tg_user_id)
-    master = (await db.execute(select(Master).where(Master.telegram_user_id == tg_user_id))).scalar_one_or_none()
-    return TelegramAccessContext(tg_user_id=tg_user_id, admin_role=admin_role, master=master)
+    access = await resolve_telegram_access(db, tg_user_id)
+    return TelegramAccessContext(tg_user_id=tg_user_id, admin_role=access.admin_role, master_id=access.master_id)
 
 
 def _master_booking_card_text(booking: Booking) -> str:
@@ -265,11 +252,11 @@ def _master_pagination_markup(page: int, total: int) -> dict[str, Any] | None:
     return {"inline_keyboard": [row]}
 
 
-async def _send_master_bookings(db: AsyncSession, chat_id: int, master: Master, page: int = 0) -> None:
+async def _send_master_bookings(db: AsyncSession, chat_id: int, master_id: int, page: int = 0) -> None:
     total = (
         await db.execute(
             select(func.count(Booking.id)).where(
-                Booking.master_id == master.id,
+                Booking.master_id == master_id,
                 Booking.status.in_([BookingStatus.confirmed, BookingStatus.done]),
             )
         )
@@ -285,7 +272,7 @@ async def _send_master_bookings(db: AsyncSession, chat_id: int, master: Master,
         await db.execute(
             select(Booking)
             .where(
-                Booking.master_id == master.id,
+                Booking.master_id == master_id,
                 Booking.status.in_([BookingStatus.confirmed, BookingStatus.done]),
             )
             .options(selectinload(Booking.service))
@@ -303,10 +290,10 @@ async def _send_master_bookings(db: AsyncSession, chat_id: int, master: Master,
     await send_message(chat_id=chat_id, text=page_text, reply_markup=pagination)
 
 
-async def _handle_master_message(db: AsyncSession, chat_id: int, text: str, master: Master) -> None:
+async def _handle_master_message(db: AsyncSession, chat_id: int, text: str, master_id: int) -> None:
     normalized_text = _normalize_action_text(text)
     if normalized_text in MASTER_ACTION_ALIASES["my"]:
-        await _send_master_bookings(db, chat_id, master, page=0)
+        await _send_master_bookings(db, chat_id, master_id, page=0)
         return
     if normalized_text in MASTER_ACTION_ALIASES["help"]:
         await send_message(chat_id=chat_id, text="Используйте кнопку «Мои заявки» или команду /my.", reply_markup=_master_reply_keyboard())
@@ -321,6 +308,7 @@ def _is_private_chat(message: dict[str, Any]) -> bool:
 def _backup_menu_markup(has_pending_upload: bool = False) -> dict[str, Any]:
     rows = [
         [{"text": "📦 Статус", "callback_data": "bk:status"}],
+        [{"text": "🗂 Список копий", "callback_data": "bk:list:0"}],
         [{"text": "▶ Сделать сейчас", "callback_data": "bk:run"}],
         [{"text": "📤 Отправить в backup-чат", "callback_data": "bk:send"}],
         [{"text": "♻ Восстановить последний", "callback_data": "bk:restore_latest:confirm"}],
@@ -340,6 +328,8 @@ def _detect_uploaded_restore_type(file_name: str) -> str:
         return "sql"
     if lowered.endswith(".dump") or lowered.endswith(".backup"):
         return "custom"
+    if lowered.endswith(".tar"):
+        return "directory"
     return "unknown"
 
 
@@ -349,6 +339,51 @@ def _format_file_size(size_bytes: int) -> str:
     return f"{size_bytes / (1024 * 1024):.1f} MB"
 
 
+def _backup_summary_text(metadata: dict[str, Any]) -> str:
+    lines = [
+        f"Копия: {metadata.get('filename')}",
+        f"Создана: {metadata.get('created_at')}",
+        f"Размер: {_format_file_size(int(metadata.get('size_bytes') or 0))}",
+        f"Формат: {metadata.get('format') or 'unknown'}",
+    ]
+    if metadata.get("duration_ms") is not None:
+        lines.append(f"Длительность: {int(metadata['duration_ms']) / 1000:.1f} сек")
+    if metadata.get("db_size_bytes"):
+        lines.append(f"Размер БД: {_format_file_size(int(metadata['db_size_bytes']))}")
+    if metadata.get("sha256"):
+        lines.append(f"SHA-256: {str(metadata['sha256'])[:16]}…")
+    lines.append(f"Источник: {metadata.get('source') or 'disk'}")
+    return "\n".join(lines)
+
+
+async def _send_backup_list(chat_id: int, page: int) -> None:
+    items, total = backup_service.list_backups(offset=page * BACKUP_PAGE_SIZE, limit=BACKUP_PAGE_SIZE)
+    if total == 0:
+        await send_message(chat_id=chat_id, text="Резервных копий пока нет.")
+        return
+    max_page = max((total - 1) // BACKUP_PAGE_SIZE, 0)
+    if page > max_page:
+        page = max_page
+        items, _ = backup_service.list_backups(offset=page * BACKUP_PAGE_SIZE, limit=BACKUP_PAGE_SIZE)
+
+    rows: list[list[dict[str, str]]] = [
+        [{"text": f"{item.get('created_at')} · {_format_file_size(int(item.get('size_bytes') or 0))}", "callback_data": f"bk:pick:{item['id']}"}]
+        for item in items
+    ]
+    navigation: list[dict[str, str]] = []
+    if page > 0:
+        navigation.append({"text": "⬅️ Назад", "callback_data": f"bk:list:{page - 1}"})
+    if page < max_page:
+        navigation.append({"text": "Дальше ➡️", "callback_data": f"bk:list:{page + 1}"})
+    if navigation:
+        rows.append(navigation)
+    await send_message(
+        chat_id=chat_id,
+        text=f"Резервные копии, страница {page + 1} из {max_page + 1}. Всего: {total}.",
+        reply_markup={"inline_keyboard": rows},
+    )
+
+
 def _restore_confirmation_markup() -> dict[str, Any]:
     return {
         "inline_keyboard": [
@@ -380,18 +415,40 @@ async def _handle_backup_callback(callback_id: str | None, data: str, message: d
         metadata = backup_service.get_latest_metadata()
         if not metadata:
             await send_message(chat_id=chat_id, text="Резервных копий пока нет.")
+        else:
+            await send_message(chat_id=chat_id, text=f"Последняя резервная копия.\n{_backup_summary_text(metadata)}")
+    elif action[1] == "list":
+        page = int(action[2]) if len(action) > 2 and action[2].isdigit() else 0
+        await _send_backup_list(chat_id=chat_id, page=page)
+    elif action[1] == "pick" and len(action) > 2:
+        metadata = backup_service.get_backup_metadata(action[2])
+        if metadata is None:
+            await send_message(chat_id=chat_id, text="Копия не найдена, возможно, она удалена по retention.")
         else:
             await send_message(
                 chat_id=chat_id,
-                text=(
-                    f"Последняя копия: {metadata.get('filename')}\n"
-                    f"Создана: {metadata.get('created_at')}\n"
-                    f"Размер: {metadata.get('size_bytes')} байт"
-                ),
+                text=_backup_summary_text(metadata),
+                reply_markup={
+                    "inline_keyboard": [
+                        [{"text": "♻ Восстановить эту копию", "callback_data": f"bk:restore_pick:{metadata['id']}"}],
+                        [{"text": "🗂 К списку", "callback_data": "bk:list:0"}],
+                    ]
+                },
             )
+    elif action[1] == "restore_pick" and len(action) > 2:
+        try:
+            result = await backup_service.restore_catalog_backup(entry_id=action[2], actor_tg_user_id=actor_tg_user_id)
+            if result.get("status") == "ok_with_warnings":
+                await send_message(chat_id=chat_id, text="⚠️ Восстановлено с warnings. Подробности в логах.")
+            else:
+                await send_message(chat_id=chat_id, text=f"Восстановление из {result.get('file')} завершено.")
+        except BackupBusyError:
+            await send_message(chat_id=chat_id, text="Операция уже выполняется. Попробуйте позже.")
+        except Exception as exc:  # noqa: BLE001
+            await send_message(chat_id=chat_id, text=f"❌ Ошибка восстановления: {exc}")
     elif action[1] == "run":
         try:
-            metadata = await backup_service.run_backup_script()
+            metadata = await backup_service.run_backup_script(source=f"telegram:{actor_tg_user_id}")
             await send_message(chat_id=chat_id, text=f"Бэкап создан: {metadata.get('filename')}")
         except BackupBusyError:
             await send_message(chat_id=chat_id, text="Операция уже выполняется. Попробуйте позже.")
@@ -426,7 +483,7 @@ async def _handle_backup_callback(callback_id: str | None, data: str, message: d
         await send_message(
             chat_id=chat_id,
             text=(
-                "Отправьте файлом бэкап в этот чат. Поддерживается: .dump/.backup (pg_dump custom), .sql, .sql.gz, "
+                "Отправьте файлом бэкап в этот чат. Поддерживается: .dump/.backup (pg_dump custom), .tar (pg_dump directory), .sql, .sql.gz, "
                 "а также .gpg (если используется шифрование). После загрузки бот попросит подтверждение."
             ),
         )
@@ -463,6 +520,7 @@ async def _run_restore_and_report(chat_id: int, actor_tg_user_id: int, restore_p
                 f"Файл: {result.get('file')}\n"
                 f"Тип: {result.get('file_type')}\n"
                 f"Время: {result.get('duration_seconds')} сек\n"
+                f"Простой API: {result.get('maintenance_seconds')} сек\n"
                 f"Размер: {file_size} байт\n"
                 f"Подробности: {warning_summary or 'см. логи'}"
             )
@@ -472,6 +530,7 @@ async def _run_restore_and_report(chat_id: int, actor_tg_user_id: int, restore_p
                 f"Файл: {result.get('file')}\n"
                 f"Тип: {result.get('file_type')}\n"
                 f"Время: {result.get('duration_seconds')} сек\n"
+                f"Простой API: {result.get('maintenance_seconds')} сек\n"
                 f"Размер: {file_size} байт"
             )
         await send_message(chat_id=chat_id, text=text)
@@ -482,16 +541,16 @@ async def _run_restore_and_report(chat_id: int, actor_tg_user_id: int, restore_p
 
 
 @router.get("/telegram/health")
-async def telegram_health() -> dict[str, bool]:
-    return {"ok": True}
+async def telegram_health() -> dict[str, Any]:
+    # ok reflects this process; the breaker shows whether the Bot API is reachable.
+    return {"ok": True, "breaker": telegram_breaker.stats()}
 
 
 @router.post("/telegram/webhook")
 async def telegram_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     if backup_service.is_maintenance:
         return {"ok": True, "detail": "maintenance: restore in progress"}
-    tg_settings = await get_tg_notifications_settings(db)
-    required_secret = settings.telegram_webhook_secret or tg_settings.webhook_secret
+    required_secret = settings.telegram_webhook_secret or (await get_tg_notifications_settings(db)).webhook_secret
     if not required_secret:
         logger.error("tg_webhook.reject reason=no_secret")
         return {"ok": False, "detail": "webhook secret is not configured"}
@@ -504,13 +563,35 @@ async def telegram_webhook(request: Request, db: AsyncSession = Depends(get_db))
     except Exception:  # noqa: BLE001
         return {"ok": True}
 
-    await process_update(update, db)
+    if not update_dispatcher.running:
+        await process_update(update, db)
+        return {"ok": True}
+    # Acknowledge right away; Telegram re-delivers updates whose webhook call is slow.
+    if update_dispatcher.submit(update) is None:
+        logger.warning("tg_webhook.busy update_id=%s pending=%s", update.get("update_id"), update_dispatcher.pending)
+        return JSONResponse(status_code=503, content={"ok": False, "detail": "busy"})
     return {"ok": True}
 
 
+async def process_update_in_session(update: dict[str, Any]) -> None:
+    while backup_service.is_maintenance:
+        await asyncio.sleep(1)
+    update_id = update.get("update_id")
+    async with db_module.AsyncSessionLocal() as db:
+        await process_update(update, db)
+        try:
+            await db.commit()
+        except Exception:  # noqa: BLE001
+            logger.warning("tg_update.commit_skipped update_id=%s", update_id, exc_info=True)
+            try:
+                await db.rollback()
+            except Exception:  # noqa: BLE001
+                logger.warning("tg_update.rollback_failed update_id=%s", update_id, exc_info=True)
+
+
 async def process_update(update: dict[str, Any], db: AsyncSession) -> None:
     update_id = update.get("update_id")
-    if isinstance(update_id, int) and _is_processed_recently(_PROCESSED_UPDATES, update_id):
+    if isinstance(update_id, int) and await telegram_dedup.seen(db, f"update:{update_id}"):
         logger.info("tg_update.skipped reason=duplicate update_id=%s", update_id)
         return
 
@@ -566,9 +647,10 @@ async def _handle_message(message: dict[str, Any], db: AsyncSession) -> None:
                 master.telegram_linked_at = datetime.now(timezone.utc)
                 master.telegram_link_code = None
                 await db.flush()
+                await publish_telegram_access_change(db)
                 await send_message(chat_id=telegram_user_id, text=f"Telegram успешно привязан к мастеру {master.name}.")
                 linked_master = True
-                access.master = master
+                access.master_id = master.id
             else:
                 await send_message(chat_id=telegram_user_id, text="Код привязки не найден или устарел.")
 
@@ -597,10 +679,10 @@ async def _handle_message(message: dict[str, Any], db: AsyncSession) -> None:
                 await send_message(chat_id=telegram_user_id, text="Ожидаю документ с файлом бэкапа.")
                 return
 
-            allowed_suffixes = (".dump", ".backup", ".sql", ".sql.gz", ".gpg")
+            allowed_suffixes = (".dump", ".backup", ".tar", ".sql", ".sql.gz", ".gpg")
             lowered = file_name.lower()
             if not lowered.endswith(allowed_suffixes):
-                await send_message(chat_id=telegram_user_id, text="Неподдерживаемый формат. Разрешено: .dump, .backup, .sql, .sql.gz, .gpg")
+                await send_message(chat_id=telegram_user_id, text="Неподдерживаемый формат. Разрешено: .dump, .backup, .tar, .sql, .sql.gz, .gpg")
                 return
 
             max_bytes = int(settings.restore_max_mb) * 1024 * 1024
@@ -657,7 +739,7 @@ async def _handle_message(message: dict[str, Any], db: AsyncSession) -> None:
         return
 
     if access.is_master:
-        await _handle_master_message(db, int(chat_id), text, access.master)
+        await _handle_master_message(db, int(chat_id), text, access.master_id)
         return
 
     logger.info("tg_access denied user_id=%s", telegram_user_id)
@@ -701,7 +783,7 @@ async def _handle_callback(callback_query: dict[str, Any], db: AsyncSession) ->
             await answer_callback_query(callback_id, "Нет доступа")
         return
 
-    if callback_id and _is_processed_recently(_PROCESSED_CALLBACKS, callback_id):
+    if callback_id and await telegram_dedup.seen(db, f"callback:{callback_id}"):
         logger.info("tg_callback.skipped reason=duplicate callback_id=%s", callback_id)
         await answer_callback_query(callback_id, "Уже обработано")
         return
@@ -723,7 +805,7 @@ async def _handle_callback(callback_query: dict[str, Any], db: AsyncSession) ->
         await _send_master_bookings(
             db=db,
             chat_id=int(callback_chat_id),
-            master=access.master,
+            master_id=access.master_id,
             page=int(master_parsed["page"]),
         )
         if callback_id:
@@ -772,6 +854,17 @@ async def _handle_callback(callback_query: dict[str, Any], db: AsyncSession) ->
         return
 
     action = parsed["action"]
+    if action == "open":
+        await send_message(
+            chat_id=message.get("chat", {}).get("id"),
+            thread_id=message.get("message_thread_id"),
+            text=_admin_update_text(booking, "Ожидает действий"),
+            reply_markup=build_admin_inline_keyboard(booking.id),
+        )
+        if callback_id:
+            await answer_callback_query(callback_id)
+        return
+
     if action == "choose":
         masters = (
             await db.execute(select(Master).where(Master.is_active.is_(True)).order_by(Master.sort_order, Master.name))
@@ -793,9 +886,18 @@ async def _handle_callback(callback_query: dict[str, Any], db: AsyncSession) ->
             if callback_id:
                 await answer_callback_query(callback_id, "Мастер не найден")
             return
+        await lock_booking_day(db, booking.starts_at.date())
+        if booking.status in {BookingStatus.new, BookingStatus.confirmed} and await master_has_overlap(
+            db, master.id, booking.starts_at, booking.ends_at, exclude_booking_id=booking.id
+        ):
+            if callback_id:
+                await answer_callback_query(callback_id, "Мастер занят в это время")
+            return
+        previous_occupancy = BookingOccupancy.of(booking)
         booking.master_id = master.id
         booking.master = master
         await db.flush()
+        await publish_booking_change(db, booking, previous=previous_occupancy)
         await log_event(
             db,
             actor_type=AuditActorType.telegram,
@@ -875,6 +977,7 @@ async def _handle_callback(callback_query: dict[str, Any], db: AsyncSession) ->
             booking.status = BookingStatus.cancelled
             booking.is_read = True
             await db.flush()
+            await publish_booking_change(db, booking)
         await log_event(
             db,
             actor_type=AuditActorType.telegram,
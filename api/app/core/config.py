@@ -62,6 +62,7 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         enable_decoding=False,
+        protected_namespaces=("model_",),
     )
 
     @classmethod
@@ -94,6 +95,34 @@ class Settings(BaseSettings):
     telegram_admin_ids: str | None = None
     telegram_sys_admin_ids: str | None = None
     telegram_mode: str = "webhook"
+    telegram_api_base_url: str = "https://api.telegram.org"
+    telegram_http2: bool = False
+    telegram_max_connections: int = 20
+    telegram_max_keepalive_connections: int = 10
+    telegram_keepalive_expiry_seconds: float = 30.0
+    telegram_rate_limit_enabled: bool = True
+    telegram_send_global_per_second: float = 25.0
+    telegram_send_chat_per_second: float = 1.0
+    telegram_send_chat_burst: float = 3.0
+    telegram_send_group_per_minute: float = 20.0
+    telegram_breaker_enabled: bool = True
+    telegram_breaker_window_seconds: float = 60.0
+    telegram_breaker_min_calls: int = 5
+    telegram_breaker_failure_ratio: float = 0.5
+    telegram_breaker_open_seconds: float = 30.0
+    telegram_update_workers: int = 8
+    telegram_update_queue_max: int = 1000
+    telegram_polling_max_in_flight: int = 32
+    telegram_dedup_backend: str = "memory"
+    telegram_dedup_ttl_seconds: int = 300
+    telegram_dedup_max_entries: int = 10000
+    telegram_outbox_poll_seconds: float = 5.0
+    telegram_outbox_batch_size: int = 20
+    telegram_outbox_max_attempts: int = 8
+    telegram_outbox_lease_seconds: int = 300
+    master_agenda_enabled: bool = False
+    master_agenda_hour: int = 8
+    master_agenda_minute: int = 0
     backup_enabled: bool = False
     backup_chat_id: int | None = None
     backup_dir: str = "/app/backups"
@@ -101,13 +130,41 @@ class Settings(BaseSettings):
     backup_env_path: str = "/app/scripts/backup.env"
     backup_passphrase: str | None = None
     restore_max_mb: int = 200
+    backup_restore_streaming: bool = True
+    backup_restore_mode: str = "in_place"
+    backup_restore_keep_previous_db: bool = False
+    backup_format: str = "custom"
+    backup_jobs: int = 4
     backup_cron_hour: int = 3
     backup_cron_minute: int = 15
     retention_keep: int = Field(
         default=7,
         validation_alias=AliasChoices("RETENTION_KEEP", "retention_keep"),
     )
+    backup_retention_daily: int = 0
+    backup_retention_weekly: int = 0
+    backup_retention_monthly: int = 0
+    backup_restore_uploads_keep_days: int = 7
+    backup_throttle_enabled: bool = False
+    backup_throttle_nice: int = 10
+    backup_throttle_ionice_class: int = 3
+    backup_throttle_rate_bytes: int = 8 * 1024 * 1024
+    backup_throttle_p95_ms: float = 500.0
+    backup_throttle_check_seconds: float = 1.0
+    backup_throttle_max_pause_seconds: float = 300.0
+    request_latency_window_seconds: float = 30.0
+    request_latency_min_samples: int = 20
     log_level: str = "INFO"
+    pg_events_enabled: bool = True
+    settings_cache_ttl_seconds: float = 60.0
+    telegram_access_cache_ttl_seconds: float = 300.0
+    telegram_access_cache_max_entries: int = 10000
+    occupancy_bitmaps_enabled: bool = True
+    availability_cache_enabled: bool = True
+    availability_cache_max_entries: int = 5000
+    availability_cache_ttl_seconds: float = 300.0
+    slot_hold_ttl_seconds: int = 300
+    slot_hold_sweep_seconds: float = 30.0
     sys_admin_tokens: list[str] = Field(
         default_factory=list,
         validation_alias=AliasChoices("SYS_ADMIN_TOKENS", "SYS_ADMIN_API_KEYS"),
@@ -138,6 +195,14 @@ class Settings(BaseSettings):
     def _validate_backup_configuration(self) -> "Settings":
         if self.backup_enabled and self.backup_chat_id is None:
             raise ValueError("BACKUP_CHAT_ID must be configured when BACKUP_ENABLED=true")
+        if self.backup_format not in {"custom", "directory"}:
+            raise ValueError("BACKUP_FORMAT must be custom or directory")
+        if self.backup_jobs < 1:
+            raise ValueError("BACKUP_JOBS must be at least 1")
+        if self.backup_restore_mode not in {"in_place", "shadow"}:
+            raise ValueError("BACKUP_RESTORE_MODE must be in_place or shadow")
+        if self.backup_throttle_ionice_class not in {0, 1, 2, 3}:
+            raise ValueError("BACKUP_THROTTLE_IONICE_CLASS must be 0 (off), 1, 2 or 3")
         return self
 
     @model_validator(mode="after")
@@ -1,12 +1,19 @@
-from collections.abc import AsyncGenerator
+import logging
+from collections.abc import AsyncGenerator, Callable
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 engine = create_async_engine(settings.database_url, pool_pre_ping=True)
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+
 
 async def dispose_engine() -> None:
     await engine.dispose()
@@ -18,6 +25,26 @@ def reinitialize_engine() -> None:
     AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 
+def run_after_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    db.sync_session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+        try:
+            callback()
+        except Exception:  # noqa: BLE001
+            logger.exception("db.after_commit callback failed")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_commit_callbacks(session: Session, previous_transaction) -> None:
+    if previous_transaction.nested:
+        return
+    session.info.pop(_AFTER_COMMIT_KEY, None)
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         async with session.begin():
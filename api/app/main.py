@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 
 import httpx
@@ -7,11 +8,17 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app import db as db_module
 from app.api import admin, auth, public, telegram
 from app.core.config import settings
-from app.db import AsyncSessionLocal
 from app.services.backup_service import BackupBusyError, backup_service
-from app.services.telegram import TelegramError, get_me, get_updates
+from app.services.events import event_bus
+from app.services.master_agenda import send_master_agendas
+from app.services.request_latency import request_latency
+from app.services.slot_holds import sweep_expired_holds
+from app.services.telegram import TelegramError, close_telegram_client, get_me, get_updates, start_telegram_client
+from app.services.telegram_outbox import deliver_telegram_outbox, wait_for_outbox
+from app.services.telegram_updates import UpdatePoller, update_dispatcher
 
 
 def _configure_logging() -> None:
@@ -27,6 +34,7 @@ _configure_logging()
 
 logger = logging.getLogger(__name__)
 app = FastAPI(title="SalonMassaj API")
+LATENCY_EXCLUDED_PATHS = {"/health", "/telegram/health"}
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +50,16 @@ app.include_router(admin.router)
 app.include_router(telegram.router)
 
 
+@app.middleware("http")
+async def request_latency_middleware(request: Request, call_next):
+    # Registered before the maintenance check, so it sits inside it and 503s stay out of the window.
+    started = time.perf_counter()
+    response = await call_next(request)
+    if request.url.path not in LATENCY_EXCLUDED_PATHS:
+        request_latency.record((time.perf_counter() - started) * 1000)
+    return response
+
+
 @app.middleware("http")
 async def maintenance_middleware(request: Request, call_next):
     if backup_service.is_maintenance:
@@ -52,38 +70,25 @@ async def maintenance_middleware(request: Request, call_next):
 
 
 
+async def _fetch_updates(offset: int | None, timeout: int) -> list[dict]:
+    logger.info("polling: request sent offset=%s", offset)
+    response = await get_updates(offset=offset, timeout=timeout, allowed_updates=["message", "callback_query"])
+    updates = response.get("result") or []
+    logger.info("polling: got %s updates", len(updates))
+    return updates
+
+
 async def _telegram_polling_loop() -> None:
-    logger.info("Telegram polling worker started")
-    offset: int | None = None
+    logger.info("Telegram polling worker started max_in_flight=%s", settings.telegram_polling_max_in_flight)
+    poller = UpdatePoller(update_dispatcher, settings.telegram_polling_max_in_flight)
     backoff_seconds = 1
     while True:
         try:
             if backup_service.is_maintenance:
                 await asyncio.sleep(1)
                 continue
-            logger.info("polling: request sent offset=%s", offset)
-            response = await get_updates(offset=offset, timeout=30, allowed_updates=["message", "callback_query"])
-            updates = response.get("result") or []
-            logger.info("polling: got %s updates", len(updates))
+            await poller.poll_once(_fetch_updates)
             backoff_seconds = 1
-            for update in updates:
-                update_id = update.get("update_id")
-                try:
-                    async with AsyncSessionLocal() as db:
-                        await telegram.process_update(update, db)
-                        try:
-                            await db.commit()
-                        except Exception:  # noqa: BLE001
-                            logger.warning("polling: commit skipped update_id=%s", update_id, exc_info=True)
-                            try:
-                                await db.rollback()
-                            except Exception:  # noqa: BLE001
-                                logger.warning("polling: rollback failed update_id=%s", update_id, exc_info=True)
-                except Exception:  # noqa: BLE001
-                    logger.exception("polling: update processing failed update_id=%s", update_id)
-                finally:
-                    if isinstance(update_id, int):
-                        offset = update_id + 1
         except asyncio.CancelledError:
             logger.info("Telegram polling worker stopped")
             raise
@@ -106,9 +111,40 @@ async def _telegram_polling_loop() -> None:
             continue
 
 
-async def _run_scheduled_backup() -> None:
+async def _slot_hold_sweeper_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.slot_hold_sweep_seconds)
+        if backup_service.is_maintenance:
+            continue
+        try:
+            async with db_module.AsyncSessionLocal() as db:
+                async with db.begin():
+                    swept = await sweep_expired_holds(db, datetime.now())
+            if swept:
+                logger.info("slot_hold.sweep removed=%s", swept)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            logger.exception("slot_hold.sweep failed")
+
+
+async def _telegram_outbox_loop() -> None:
+    while True:
+        await wait_for_outbox(settings.telegram_outbox_poll_seconds)
+        if backup_service.is_maintenance:
+            continue
+        try:
+            while await deliver_telegram_outbox() >= settings.telegram_outbox_batch_size:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            logger.exception("tg_outbox.loop failed")
+
+
+async def _run_scheduled_backup(source: str = "scheduled") -> None:
     try:
-        await backup_service.run_backup_script()
+        await backup_service.run_backup_script(source=source)
         await backup_service.send_latest_to_backup_chat()
     except BackupBusyError:
         logger.info("backup.scheduler skipped: operation already in progress")
@@ -121,7 +157,7 @@ async def _backup_scheduler_loop() -> None:
     logger.info("backup scheduler started")
     if backup_service.is_catchup_required():
         logger.info("backup scheduler catch-up triggered")
-        await _run_scheduled_backup()
+        await _run_scheduled_backup(source="catchup")
 
     while True:
         now = datetime.now(timezone.utc)
@@ -134,8 +170,37 @@ async def _backup_scheduler_loop() -> None:
         await _run_scheduled_backup()
 
 
+async def _master_agenda_loop() -> None:
+    logger.info("master agenda scheduler started at %02d:%02d", settings.master_agenda_hour, settings.master_agenda_minute)
+    while True:
+        # Booking times are stored as salon-local naive datetimes, so the schedule is local too.
+        now = datetime.now()
+        run_at = now.replace(hour=settings.master_agenda_hour, minute=settings.master_agenda_minute, second=0, microsecond=0)
+        if run_at <= now:
+            run_at = run_at + timedelta(days=1)
+        await asyncio.sleep((run_at - now).total_seconds())
+        if backup_service.is_maintenance:
+            continue
+        try:
+            await send_master_agendas(run_at.date())
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            logger.exception("master_agenda.loop failed")
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
+    if settings.pg_events_enabled:
+        await event_bus.start()
+    else:
+        logger.info("pg events listener disabled; cached settings rely on TTL only")
+
+    app.state.slot_hold_sweeper_task = asyncio.create_task(_slot_hold_sweeper_loop())
+    await start_telegram_client()
+    app.state.telegram_outbox_task = asyncio.create_task(_telegram_outbox_loop())
+    update_dispatcher.start(telegram.process_update_in_session)
+
     mode = (settings.telegram_mode or "webhook").strip().lower()
     logger.info("Telegram startup config: mode=%s token_set=%s webhook_secret_set=%s", mode, bool(settings.telegram_bot_token), bool(settings.telegram_webhook_secret))
 
@@ -156,6 +221,10 @@ async def startup_event() -> None:
         if not settings.telegram_webhook_secret:
             logger.error("TELEGRAM_WEBHOOK_SECRET is not configured; webhook requests will be rejected")
 
+    app.state.master_agenda_task = None
+    if settings.master_agenda_enabled and settings.telegram_bot_token:
+        app.state.master_agenda_task = asyncio.create_task(_master_agenda_loop())
+
     app.state.backup_scheduler_task = None
     if settings.backup_enabled and settings.backup_chat_id:
         app.state.backup_scheduler_task = asyncio.create_task(_backup_scheduler_loop())
@@ -165,6 +234,8 @@ async def startup_event() -> None:
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
+    await event_bus.stop()
+
     task = getattr(app.state, "telegram_polling_task", None)
     if task:
         task.cancel()
@@ -181,6 +252,33 @@ async def shutdown_event() -> None:
         except asyncio.CancelledError:
             pass
 
+    sweeper_task = getattr(app.state, "slot_hold_sweeper_task", None)
+    if sweeper_task:
+        sweeper_task.cancel()
+        try:
+            await sweeper_task
+        except asyncio.CancelledError:
+            pass
+
+    agenda_task = getattr(app.state, "master_agenda_task", None)
+    if agenda_task:
+        agenda_task.cancel()
+        try:
+            await agenda_task
+        except asyncio.CancelledError:
+            pass
+
+    outbox_task = getattr(app.state, "telegram_outbox_task", None)
+    if outbox_task:
+        outbox_task.cancel()
+        try:
+            await outbox_task
+        except asyncio.CancelledError:
+            pass
+
+    await update_dispatcher.stop()
+    await close_telegram_client()
+
 
 @app.get("/health")
 def health_check() -> dict:
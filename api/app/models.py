@@ -17,9 +17,9 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, ExcludeConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 
 class Base(DeclarativeBase):
@@ -222,9 +222,59 @@ class Booking(Base):
         Index("ix_bookings_is_read", "is_read"),
         Index("ix_bookings_master_id", "master_id"),
         CheckConstraint("final_price_cents IS NULL OR final_price_cents >= 0", name="ck_bookings_final_price_cents_non_negative"),
+        ExcludeConstraint(
+            ("master_id", "="),
+            (func.tsrange(starts_at, ends_at, text("'[)'")), "&&"),
+            name="ex_bookings_master_no_overlap",
+            using="gist",
+            where=text("master_id IS NOT NULL AND status IN ('NEW', 'CONFIRMED')"),
+        ),
     )
 
 
+class SlotHold(Base):
+    __tablename__ = "slot_holds"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    token: Mapped[str] = mapped_column(String(64), unique=True)
+    service_id: Mapped[int] = mapped_column(ForeignKey("services.id", ondelete="CASCADE"))
+    master_id: Mapped[int | None] = mapped_column(ForeignKey("masters.id", ondelete="CASCADE"), nullable=True)
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_slot_holds_expires_at", "expires_at"),
+        Index("ix_slot_holds_starts_at", "starts_at"),
+    )
+
+
+class TelegramOutbox(Base):
+    __tablename__ = "telegram_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    booking_id: Mapped[int | None] = mapped_column(ForeignKey("bookings.id", ondelete="CASCADE"), nullable=True)
+    payload: Mapped[dict] = mapped_column(JSONB, default=dict)
+    status: Mapped[str] = mapped_column(String(20), default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_telegram_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+
+class TelegramProcessedUpdate(Base):
+    __tablename__ = "telegram_processed_updates"
+
+    key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_telegram_processed_updates_seen_at", "seen_at"),)
+
+
 class Notification(Base):
     __tablename__ = "notifications"
 
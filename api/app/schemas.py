@@ -285,6 +285,7 @@ class TgNotificationsSettings(BaseModel):
     template_booking_assigned_master: str | None = None
     template_admin: str | None = None
     send_inline_actions: bool = True
+    new_booking_digest_seconds: int = Field(default=0, ge=0, le=3600)
     public_webhook_base_url: str | None = None
     webhook_secret: str | None = None
 
@@ -311,6 +312,26 @@ class BookingCreate(BookingBase):
     starts_at: datetime | None = None
     date: date | str | None = None
     time: time | str | None = None
+    hold_token: str | None = None
+
+
+class SlotHoldCreate(BaseModel):
+    service_id: int
+    master_id: int | None = None
+    starts_at: datetime | None = None
+    date: date | str | None = None
+    time: time | str | None = None
+
+
+class SlotHoldOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    token: str
+    service_id: int
+    master_id: int | None = None
+    starts_at: datetime
+    ends_at: datetime
+    expires_at: datetime
 
 
 class BookingOut(BookingBase):
@@ -384,6 +405,23 @@ class AvailabilityOut(BaseModel):
     slots: list[AvailabilitySlot]
 
 
+class AvailabilityDayOut(BaseModel):
+    date: date
+    free_slots: int
+    slots: list[AvailabilitySlot] | None = None
+
+
+class AvailabilityRangeOut(BaseModel):
+    date_from: date
+    date_to: date
+    days: list[AvailabilityDayOut]
+
+
+class AvailabilityNextOut(BaseModel):
+    slots: list[AvailabilitySlot]
+    searched_until: date | None = None
+
+
 class BookingSlotOut(BaseModel):
     time: str
     starts_at: datetime
@@ -391,10 +429,16 @@ class BookingSlotOut(BaseModel):
 
 
 class ScheduleMasterOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
 
 
+class PublicBookingOut(BookingOut):
+    master: ScheduleMasterOut | None = None
+
+
 class AdminScheduleBookingOut(BaseModel):
     id: int
     master_id: int | None = None
@@ -436,3 +480,21 @@ class BookingMovePayload(BaseModel):
     master_id: int | None = None
     date: date
     time: time
+
+
+class BackupEntryOut(BaseModel):
+    id: str
+    filename: str
+    created_at: datetime
+    size_bytes: int
+    sha256: str | None = None
+    duration_ms: int | None = None
+    db_size_bytes: int | None = None
+    format: str | None = None
+    jobs: int | None = None
+    source: str
+
+
+class BackupCatalogOut(BaseModel):
+    total: int
+    items: list[BackupEntryOut]
@@ -0,0 +1,59 @@
+import argparse
+import random
+import timeit
+from datetime import date, datetime, timedelta
+
+from app.services.availability import OccupancyIndex, build_day_slots
+
+TARGET_DATE = date(2026, 3, 2)
+MASTER_IDS = list(range(1, 9))
+
+
+def _legacy_free_for_pool(slots, bookings, master_ids):
+    available = []
+    for slot_start, slot_end in slots:
+        occupied_master_ids = {
+            master_id
+            for starts_at, ends_at, master_id in bookings
+            if master_id is not None and master_id in master_ids and starts_at < slot_end and ends_at > slot_start
+        }
+        unassigned_overlaps = sum(
+            1 for starts_at, ends_at, master_id in bookings if master_id is None and starts_at < slot_end and ends_at > slot_start
+        )
+        if len(master_ids) - len(occupied_master_ids) - unassigned_overlaps > 0:
+            available.append((slot_start, slot_end))
+    return available
+
+
+def _make_bookings(count: int, seed: int) -> list[tuple[datetime, datetime, int | None]]:
+    rng = random.Random(seed)
+    day_start = datetime.combine(TARGET_DATE, datetime.min.time())
+    bookings = []
+    for _ in range(count):
+        starts_at = day_start + timedelta(minutes=rng.randrange(10 * 60, 21 * 60, 15))
+        bookings.append((starts_at, starts_at + timedelta(minutes=rng.choice([30, 60, 90])), rng.choice([*MASTER_IDS, None])))
+    return bookings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the legacy per-slot availability loop with the sweep engine.")
+    parser.add_argument("--sizes", default="10,100,1000", help="bookings per day, comma separated")
+    parser.add_argument("--step", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    slots = build_day_slots(TARGET_DATE, ((10 * 60, 21 * 60),), 60, args.step)
+    print(f"slots per day: {len(slots)}, masters: {len(MASTER_IDS)}")
+    print(f"{'bookings':>9} {'legacy ms':>10} {'sweep ms':>10} {'speedup':>8}")
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        bookings = _make_bookings(size, seed=size)
+        assert OccupancyIndex(bookings).free_for_pool(slots, MASTER_IDS) == _legacy_free_for_pool(slots, bookings, MASTER_IDS)
+
+        number = max(1, 2000 // max(size, 1))
+        legacy = min(timeit.repeat(lambda: _legacy_free_for_pool(slots, bookings, MASTER_IDS), number=number, repeat=args.repeat)) / number
+        sweep = min(timeit.repeat(lambda: OccupancyIndex(bookings).free_for_pool(slots, MASTER_IDS), number=number, repeat=args.repeat)) / number
+        print(f"{size:>9} {legacy * 1000:>10.3f} {sweep * 1000:>10.3f} {legacy / sweep:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
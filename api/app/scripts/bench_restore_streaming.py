@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import gzip
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.backup_service import BackupService, RestoreStream, SqlTimeoutSetFilter
+
+PASSPHRASE = "bench"
+# Stands in for psql: reads the whole dump from stdin or from the file it is given.
+CONSUMER = ["sh", "-c", 'cat "${1:-/dev/stdin}" >/dev/null', "consumer"]
+
+
+def _make_backup(root: Path, megabytes: int) -> Path:
+    sql_path = root / "salon.sql"
+    row = b"INSERT INTO public.bookings VALUES (%d, 'client name', '+70000000000', 'comment about the visit');\n"
+    with sql_path.open("wb") as target:
+        target.write(b"SET statement_timeout = 0;\nSET transaction_timeout = 0;\n")
+        index = 0
+        while target.tell() < megabytes * 1024 * 1024:
+            target.write(b"".join(row % (index + offset) for offset in range(1000)))
+            index += 1000
+    gz_path = root / "salon.sql.gz"
+    with sql_path.open("rb") as source, gzip.open(gz_path, "wb", compresslevel=6) as target:
+        shutil.copyfileobj(source, target)
+    sql_path.unlink()
+    encrypted = root / "salon.sql.gz.gpg"
+    subprocess.run(
+        ["gpg", "--batch", "--yes", "--symmetric", "--pinentry-mode", "loopback", "--passphrase", PASSPHRASE, "-o", str(encrypted), str(gz_path)],
+        check=True,
+        capture_output=True,
+    )
+    gz_path.unlink()
+    return encrypted
+
+
+def _dir_size(path: Path) -> int:
+    return sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+
+
+async def _temp_files(service: BackupService, backup: Path, scratch: Path) -> tuple[float, int]:
+    # The restore path before streaming: three full copies on disk before psql starts.
+    started = time.perf_counter()
+    decrypted = scratch / "decrypted.restore"
+    await service._decrypt_backup(encrypted_dump_path=backup, decrypted_dump_path=decrypted, passphrase=PASSPHRASE)
+    gunzipped = scratch / "restore.sql"
+    with gzip.open(decrypted, "rb") as source, gunzipped.open("wb") as target:
+        shutil.copyfileobj(source, target)
+    filtered = scratch / "filtered.sql"
+    service._filter_incompatible_sql_settings(source_path=gunzipped, target_path=filtered)
+    peak = _dir_size(scratch)
+    execution = await service._run_restore_command("plain_sql", [*CONSUMER, str(filtered)], dict(os.environ), None)
+    assert execution.returncode == 0, execution.stderr
+    return time.perf_counter() - started, peak
+
+
+async def _streaming(service: BackupService, backup: Path, scratch: Path) -> tuple[float, int]:
+    started = time.perf_counter()
+    stream = RestoreStream(backup, PASSPHRASE)
+    try:
+        await stream.open()
+        sql_filter = SqlTimeoutSetFilter(service._should_remove_timeout_set)
+        execution = await service._run_restore_command("plain_sql", CONSUMER, dict(os.environ), sql_filter.filter(stream.chunks()))
+    finally:
+        await stream.close()
+    assert execution.returncode == 0, execution.stderr
+    return time.perf_counter() - started, _dir_size(scratch)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory(prefix="bench_restore_") as tmp:
+        root = Path(tmp)
+        gnupg_home = root / "gnupg"
+        gnupg_home.mkdir(mode=0o700)
+        os.environ["GNUPGHOME"] = str(gnupg_home)
+        backup = _make_backup(root, args.megabytes)
+        service = BackupService.__new__(BackupService)
+        print(f"plain sql: {args.megabytes} MB, backup file: {backup.stat().st_size / 1024 / 1024:.1f} MB (gzip + gpg)")
+        print(f"{'restore':>12} {'seconds':>9} {'scratch MB':>11}")
+        for name, runner in (("temp files", _temp_files), ("streaming", _streaming)):
+            scratch = root / name.replace(" ", "_")
+            scratch.mkdir()
+            elapsed, peak = await runner(service, backup, scratch)
+            print(f"{name:>12} {elapsed:>9.2f} {peak / 1024 / 1024:>11.1f}")
+        subprocess.run(["gpgconf", "--homedir", str(gnupg_home), "--kill", "all"], capture_output=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the temp-file and streaming restore pipelines on a synthetic encrypted SQL dump.")
+    parser.add_argument("--megabytes", type=int, default=200, help="size of the uncompressed SQL dump")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.services.telegram import close_telegram_client, send_message, telegram_api_url
+
+TOKEN = "123456:bench"
+
+
+def _stub_app(delay_ms: float) -> FastAPI:
+    stub = FastAPI()
+
+    @stub.post("/bot{token}/{method}")
+    async def bot_method(token: str, method: str) -> dict:
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        return {"ok": True, "result": {"message_id": 1}}
+
+    return stub
+
+
+async def _per_call_client(chat_id: int, text: str) -> None:
+    # What _telegram_api did before: a fresh client, connection and handshake per message.
+    async with httpx.AsyncClient(timeout=httpx.Timeout(connect=10.0, read=60.0, write=10.0, pool=10.0)) as client:
+        response = await client.post(telegram_api_url(f"bot{TOKEN}/sendMessage"), json={"chat_id": chat_id, "text": text})
+        response.raise_for_status()
+
+
+async def _shared_client(chat_id: int, text: str) -> None:
+    await send_message(chat_id=chat_id, text=text)
+
+
+async def _measure(send, messages: int) -> list[float]:
+    latencies = []
+    for index in range(messages):
+        started = time.perf_counter()
+        await send(1, f"bench {index}")
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:>12} {statistics.median(ordered):>9.2f} {p95:>9.2f} {statistics.fmean(ordered):>9.2f}")
+
+
+async def _run(args: argparse.Namespace) -> None:
+    server = uvicorn.Server(uvicorn.Config(_stub_app(args.delay_ms), host="127.0.0.1", port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    settings.telegram_api_base_url = f"http://127.0.0.1:{args.port}"
+    settings.telegram_bot_token = TOKEN
+    try:
+        await _measure(_shared_client, 5)
+        print(f"stub: {settings.telegram_api_base_url}, messages: {args.messages}, server delay: {args.delay_ms} ms")
+        print(f"{'client':>12} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+        _report("per-call", await _measure(_per_call_client, args.messages))
+        _report("shared", await _measure(_shared_client, args.messages))
+    finally:
+        await close_telegram_client()
+        server.should_exit = True
+        await server_task
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare a per-call httpx client with the shared Telegram client against a local stub.")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="artificial Bot API processing time")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
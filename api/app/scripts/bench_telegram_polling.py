@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import time
+
+from app.services.telegram_updates import UpdateDispatcher, UpdatePoller
+
+
+class FakeGetUpdates:
+    # Local stand-in for getUpdates: an offset confirms everything below it, and the
+    # reply carries a round-trip delay like the real Bot API.
+    def __init__(self, total: int, chats: int, rtt_ms: float) -> None:
+        self.updates = [
+            {"update_id": update_id, "message": {"chat": {"id": update_id % chats}, "from": {"id": update_id % chats}, "text": "/start"}}
+            for update_id in range(1, total + 1)
+        ]
+        self.rtt = rtt_ms / 1000
+        self.calls = 0
+
+    async def __call__(self, offset: int | None, timeout: int) -> list[dict]:
+        self.calls += 1
+        if offset is not None:
+            while self.updates and self.updates[0]["update_id"] < offset:
+                self.updates.pop(0)
+        await asyncio.sleep(self.rtt)
+        return self.updates[:100]
+
+
+def _handler(handler_ms: float):
+    async def handle(update: dict) -> None:
+        await asyncio.sleep(handler_ms / 1000)
+
+    return handle
+
+
+async def _sequential(args: argparse.Namespace) -> tuple[float, int]:
+    # The loop before concurrent polling: one update at a time, offset after each.
+    fetch = FakeGetUpdates(args.updates, args.chats, args.rtt_ms)
+    handle = _handler(args.handler_ms)
+    offset = None
+    started = time.perf_counter()
+    while updates := await fetch(offset, 0):
+        for update in updates:
+            await handle(update)
+            offset = update["update_id"] + 1
+    return time.perf_counter() - started, fetch.calls
+
+
+async def _concurrent(args: argparse.Namespace) -> tuple[float, int]:
+    fetch = FakeGetUpdates(args.updates, args.chats, args.rtt_ms)
+    dispatcher = UpdateDispatcher(workers=args.workers, max_pending=args.max_in_flight)
+    dispatcher.start(_handler(args.handler_ms))
+    poller = UpdatePoller(dispatcher, args.max_in_flight, long_poll_seconds=0, idle_seconds=0.05)
+    started = time.perf_counter()
+    try:
+        while poller.advance() != args.updates + 1:
+            await poller.poll_once(fetch)
+    finally:
+        await dispatcher.stop()
+    return time.perf_counter() - started, fetch.calls
+
+
+async def _run(args: argparse.Namespace) -> None:
+    print(
+        f"updates: {args.updates}, chats: {args.chats}, handler: {args.handler_ms} ms, getUpdates rtt: {args.rtt_ms} ms, "
+        f"workers: {args.workers}, max in flight: {args.max_in_flight}"
+    )
+    print(f"{'loop':>12} {'seconds':>9} {'updates/s':>10} {'polls':>7}")
+    for name, runner in (("sequential", _sequential), ("concurrent", _concurrent)):
+        elapsed, calls = await runner(args)
+        print(f"{name:>12} {elapsed:>9.2f} {args.updates / elapsed:>10.1f} {calls:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sequential and concurrent Telegram polling against a local fake getUpdates.")
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--handler-ms", type=float, default=20.0, help="simulated processing time per update")
+    parser.add_argument("--rtt-ms", type=float, default=5.0, help="simulated getUpdates round trip")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=32)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
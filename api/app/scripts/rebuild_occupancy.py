@@ -0,0 +1,27 @@
+import asyncio
+import logging
+import sys
+
+from app.db import AsyncSessionLocal
+from app.services.occupancy import publish_occupancy_rebuild
+
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_occupancy() -> None:
+    # Every API worker drops its bitmaps on this notification and reloads them from
+    # the bookings table on the next availability read.
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            await publish_occupancy_rebuild(session)
+    logger.info("occupancy.rebuild requested source=script")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(rebuild_occupancy())
+    except Exception:
+        logger.exception("Unhandled error during occupancy rebuild.")
+        sys.exit(1)
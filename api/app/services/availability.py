@@ -0,0 +1,223 @@
+import heapq
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from operator import itemgetter
+
+Slot = tuple[datetime, datetime]
+BusyInterval = tuple[datetime, datetime, int | None]
+MinuteWindow = tuple[int, int]
+
+MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass(frozen=True, slots=True)
+class AvailabilityRules:
+    windows_by_weekday: dict[int, tuple[MinuteWindow, ...]]
+    step_min: int
+    min_lead_min: int
+    max_days_ahead: int
+
+    def windows_for(self, target_date: date) -> tuple[MinuteWindow, ...]:
+        return self.windows_by_weekday.get(target_date.weekday(), ())
+
+    def last_bookable_date(self, now: datetime) -> date:
+        return now.date() + timedelta(days=self.max_days_ahead)
+
+    def earliest_start(self, now: datetime) -> datetime:
+        return now + timedelta(minutes=self.min_lead_min)
+
+
+def build_day_slots(target_date: date, windows: Sequence[MinuteWindow], duration_min: int, step_min: int) -> list[Slot]:
+    day_start = datetime.combine(target_date, datetime.min.time())
+    duration = timedelta(minutes=duration_min)
+    slots: list[Slot] = []
+    for window_start, window_end in windows:
+        for offset in range(window_start, window_end - duration_min + 1, step_min):
+            slot_start = day_start + timedelta(minutes=offset)
+            slots.append((slot_start, slot_start + duration))
+    return slots
+
+
+def slots_not_before(slots: Iterable[Slot], earliest: datetime) -> list[Slot]:
+    return [slot for slot in slots if slot[0] >= earliest]
+
+
+def slots_span(slots: Sequence[Slot]) -> tuple[datetime, datetime]:
+    return min(slot[0] for slot in slots), max(slot[1] for slot in slots)
+
+
+class OccupancyIndex:
+    def __init__(self, intervals: Iterable[BusyInterval] = ()) -> None:
+        self._by_master: dict[int | None, list[BusyInterval]] = {}
+        for interval in intervals:
+            self._by_master.setdefault(interval[2], []).append(interval)
+        for master_intervals in self._by_master.values():
+            master_intervals.sort(key=itemgetter(0))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> "OccupancyIndex":
+        return cls((starts_at, ends_at, master_id) for starts_at, ends_at, master_id in rows)
+
+    def intervals_for(self, master_ids: Iterable[int | None]) -> list[BusyInterval]:
+        lists = [self._by_master[master_id] for master_id in set(master_ids) if master_id in self._by_master]
+        if len(lists) == 1:
+            return lists[0]
+        return list(heapq.merge(*lists, key=itemgetter(0)))
+
+    def free_for_master(self, slots: Sequence[Slot], master_id: int) -> list[Slot]:
+        intervals = self._by_master.get(master_id, [])
+        free = [False] * len(slots)
+        for index, active in _sweep_active(slots, intervals):
+            free[index] = not active
+        return [slot for slot, is_free in zip(slots, free) if is_free]
+
+    def free_for_pool(self, slots: Sequence[Slot], master_ids: Sequence[int]) -> list[Slot]:
+        capacity = len(master_ids)
+        intervals = self.intervals_for([*master_ids, None])
+        free = [False] * len(slots)
+        for index, active in _sweep_active(slots, intervals):
+            unassigned = active.get(None, 0)
+            occupied_masters = len(active) - (1 if unassigned else 0)
+            free[index] = capacity - occupied_masters - unassigned > 0
+        return [slot for slot, is_free in zip(slots, free) if is_free]
+
+    def free_by_master(self, slots: Sequence[Slot], master_ids: Sequence[int]) -> dict[int, list[Slot]]:
+        busy: dict[int, set[int]] = {master_id: set() for master_id in master_ids}
+        for index, active in _sweep_active(slots, self.intervals_for(master_ids)):
+            for master_id in active:
+                busy[master_id].add(index)
+        return {
+            master_id: [slot for index, slot in enumerate(slots) if index not in busy_indexes]
+            for master_id, busy_indexes in busy.items()
+        }
+
+
+def minute_mask(start_minute: int, end_minute: int) -> int:
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def day_minute_masks(starts_at: datetime, ends_at: datetime) -> Iterator[tuple[date, int]]:
+    # Bit n of a day mask is minute n after midnight. Partial minutes round outwards,
+    # which keeps overlap checks exact for the minute-aligned slots we generate.
+    day = starts_at.date()
+    while True:
+        day_start = datetime.combine(day, time.min)
+        offset_start = max(starts_at, day_start) - day_start
+        offset_end = min(ends_at, day_start + timedelta(days=1)) - day_start
+        start_minute = int(offset_start.total_seconds() // 60)
+        end_minute = -int(-offset_end.total_seconds() // 60)
+        if end_minute > start_minute:
+            yield day, minute_mask(start_minute, end_minute)
+        if ends_at <= day_start + timedelta(days=1):
+            return
+        day += timedelta(days=1)
+
+
+def _slot_mask(slot: Slot) -> int:
+    day_start = datetime.combine(slot[0].date(), time.min)
+    start_minute = int((slot[0] - day_start).total_seconds() // 60)
+    end_minute = -int(-(slot[1] - day_start).total_seconds() // 60)
+    return minute_mask(start_minute, min(end_minute, MINUTES_PER_DAY))
+
+
+class DayBitmap:
+    __slots__ = ("_bookings", "_masters")
+
+    def __init__(self) -> None:
+        self._bookings: dict[int, tuple[int | None, int]] = {}
+        self._masters: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._bookings)
+
+    @property
+    def booking_ids(self) -> list[int]:
+        return list(self._bookings)
+
+    def add(self, booking_id: int, master_id: int | None, mask: int) -> None:
+        self.remove(booking_id)
+        self._bookings[booking_id] = (master_id, mask)
+        if master_id is not None:
+            self._masters[master_id] = self._masters.get(master_id, 0) | mask
+
+    def remove(self, booking_id: int) -> None:
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None or entry[0] is None:
+            return
+        master_id = entry[0]
+        # Bookings of one master may overlap, so the union is rebuilt rather than XOR-ed.
+        combined = 0
+        for other_master_id, mask in self._bookings.values():
+            if other_master_id == master_id:
+                combined |= mask
+        if combined:
+            self._masters[master_id] = combined
+        else:
+            self._masters.pop(master_id, None)
+
+    def master_mask(self, master_id: int) -> int:
+        return self._masters.get(master_id, 0)
+
+    def unassigned_masks(self) -> list[int]:
+        return [mask for master_id, mask in self._bookings.values() if master_id is None]
+
+
+class OccupancyBitmaps:
+    # Same read interface as OccupancyIndex, answered with AND over per-day minute masks.
+
+    def __init__(self, days: dict[date, DayBitmap]) -> None:
+        self._days = days
+
+    def _day(self, slot: Slot) -> DayBitmap:
+        return self._days.get(slot[0].date()) or DayBitmap()
+
+    def free_for_master(self, slots: Sequence[Slot], master_id: int) -> list[Slot]:
+        return [slot for slot in slots if not self._day(slot).master_mask(master_id) & _slot_mask(slot)]
+
+    def free_for_pool(self, slots: Sequence[Slot], master_ids: Sequence[int]) -> list[Slot]:
+        capacity = len(master_ids)
+        pool_masks: dict[date, list[int]] = {}
+        free: list[Slot] = []
+        for slot in slots:
+            day = slot[0].date()
+            masks = pool_masks.get(day)
+            if masks is None:
+                bitmap = self._day(slot)
+                masks = [mask for mask in (bitmap.master_mask(master_id) for master_id in set(master_ids)) if mask]
+                masks.extend(bitmap.unassigned_masks())
+                pool_masks[day] = masks
+            slot_mask = _slot_mask(slot)
+            if capacity - sum(1 for mask in masks if mask & slot_mask) > 0:
+                free.append(slot)
+        return free
+
+    def free_by_master(self, slots: Sequence[Slot], master_ids: Sequence[int]) -> dict[int, list[Slot]]:
+        return {master_id: self.free_for_master(slots, master_id) for master_id in master_ids}
+
+
+def _sweep_active(slots: Sequence[Slot], intervals: Sequence[BusyInterval]) -> Iterator[tuple[int, dict[int | None, int]]]:
+    # Slots of one service share a duration, so ordering by start also orders by end:
+    # an interval enters once it starts before the slot end and leaves for good once
+    # it ends at or before the slot start. `active` is yielded live, read it immediately.
+    order = sorted(range(len(slots)), key=lambda index: slots[index][0])
+    active: dict[int | None, int] = {}
+    ending: list[tuple[datetime, int, int | None]] = []
+    cursor = 0
+    for index in order:
+        slot_start, slot_end = slots[index]
+        while cursor < len(intervals) and intervals[cursor][0] < slot_end:
+            _, ends_at, master_id = intervals[cursor]
+            heapq.heappush(ending, (ends_at, cursor, master_id))
+            active[master_id] = active.get(master_id, 0) + 1
+            cursor += 1
+        while ending and ending[0][0] <= slot_start:
+            _, _, master_id = heapq.heappop(ending)
+            remaining = active[master_id] - 1
+            if remaining:
+                active[master_id] = remaining
+            else:
+                del active[master_id]
+        yield index, active
@@ -0,0 +1,182 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import run_after_commit
+from app.services.availability import Slot
+from app.services.events import RESET_PAYLOAD, event_bus
+from app.services.occupancy import BookingChangeScope, on_booking_change
+from app.services.settings_cache import SETTINGS_CHANNEL
+
+AVAILABILITY_CHANNEL = "availability_changed"
+AVAILABILITY_SETTING_KEYS = {"business_hours", "slot_step_min", "booking_rules"}
+
+AvailabilityKey = tuple[int, date, int | None]
+
+
+@dataclass(frozen=True, slots=True)
+class CachedAvailability:
+    slots: tuple[Slot, ...]
+    master_ids: frozenset[int]
+    expires_at: datetime
+
+
+AvailabilityLoader = Callable[[], Awaitable[CachedAvailability]]
+
+
+class _LoadAbandoned(Exception):
+    pass
+
+
+class AvailabilityCache:
+    # (service_id, date, master_id) -> free slots. Entries remember the master pool they
+    # were computed for, so a booking write only drops keys on its dates whose pool it
+    # touches. Misses for the same key share one computation.
+
+    def __init__(self, enabled: bool, max_entries: int) -> None:
+        self._enabled = enabled
+        self.max_entries = max_entries
+        self._entries: OrderedDict[AvailabilityKey, CachedAvailability] = OrderedDict()
+        self._keys_by_date: dict[date, set[AvailabilityKey]] = {}
+        self._inflight: dict[AvailabilityKey, asyncio.Future] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.lru_evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled and self.max_entries > 0 and event_bus.is_connected
+
+    async def get_or_load(self, key: AvailabilityKey, now: datetime, loader: AvailabilityLoader) -> list[Slot]:
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry.slots)
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                return await self._load(key, now, loader)
+            self.coalesced += 1
+            try:
+                return list((await asyncio.shield(inflight)).slots)
+            except _LoadAbandoned:
+                # The leader was cancelled; the first waiter back here takes over the load.
+                self.coalesced -= 1
+
+    async def _load(self, key: AvailabilityKey, now: datetime, loader: AvailabilityLoader) -> list[Slot]:
+        self.misses += 1
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on the shared future; keep its exception from being reported as lost.
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = future
+        try:
+            loaded = await loader()
+        except asyncio.CancelledError:
+            # Only the leader was cancelled: the waiters retry instead of inheriting it.
+            future.set_exception(_LoadAbandoned())
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.set_result(loaded)
+
+        if generation == self._generation and loaded.expires_at > now:
+            self._store(key, loaded)
+        return list(loaded.slots)
+
+    def _store(self, key: AvailabilityKey, entry: CachedAvailability) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._keys_by_date.setdefault(key[1], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._forget_date_key(oldest)
+            self.lru_evictions += 1
+
+    def _forget_date_key(self, key: AvailabilityKey) -> None:
+        keys = self._keys_by_date.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_date[key[1]]
+
+    def _drop(self, key: AvailabilityKey) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._forget_date_key(key)
+            self.evictions += 1
+
+    def _invalidate(self) -> None:
+        # Loads already running may have read pre-change data: later misses must not join them.
+        self._generation += 1
+        self._inflight.clear()
+
+    def evict_booking_change(self, scope: BookingChangeScope | None) -> None:
+        self._invalidate()
+        if scope is None:
+            self.clear()
+            return
+        for day in scope.days:
+            for key in list(self._keys_by_date.get(day, ())):
+                entry = self._entries[key]
+                master_id = key[2]
+                if master_id is not None:
+                    affected = master_id in scope.master_ids
+                else:
+                    affected = None in scope.master_ids or not entry.master_ids.isdisjoint(scope.master_ids)
+                if affected:
+                    self._drop(key)
+
+    def handle_setting_change(self, key: str) -> None:
+        if key == RESET_PAYLOAD or key in AVAILABILITY_SETTING_KEYS:
+            self.clear()
+
+    def clear(self, _payload: str | None = None) -> None:
+        self._invalidate()
+        self.evictions += len(self._entries)
+        self._entries.clear()
+        self._keys_by_date.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "lru_evictions": self.lru_evictions,
+        }
+
+
+async def publish_availability_reset(db: AsyncSession) -> None:
+    # Services, masters and their links change the pools behind every key; drop everything.
+    availability_cache.clear()
+    run_after_commit(db, availability_cache.clear)
+    await event_bus.publish(db, AVAILABILITY_CHANNEL, RESET_PAYLOAD)
+
+
+availability_cache = AvailabilityCache(
+    enabled=settings.availability_cache_enabled,
+    max_entries=settings.availability_cache_max_entries,
+)
+on_booking_change(availability_cache.evict_booking_change)
+event_bus.subscribe(SETTINGS_CHANNEL, availability_cache.handle_setting_change)
+event_bus.subscribe(AVAILABILITY_CHANNEL, availability_cache.clear)
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+BACKUP_FILE_PATTERNS = ("*.dump.gpg", "*.dir.tar.gpg")
+CATALOG_FILENAME = "catalog.json"
+CHECKSUM_CHUNK_BYTES = 1 << 20
+
+
+@dataclass(slots=True)
+class BackupEntry:
+    filename: str
+    created_at: str
+    size_bytes: int
+    sha256: str | None = None
+    duration_ms: int | None = None
+    db_size_bytes: int | None = None
+    format: str | None = None
+    jobs: int | None = None
+    source: str = "disk"
+
+    @property
+    def id(self) -> str:
+        # Short and stable enough for Telegram callback_data, which is capped at 64 bytes.
+        return hashlib.sha1(self.filename.encode()).hexdigest()[:12]
+
+    @property
+    def created_at_dt(self) -> datetime:
+        return _parse_created_at(self.created_at)
+
+    @classmethod
+    def from_metadata(cls, metadata: dict[str, Any], source: str) -> "BackupEntry":
+        timings = metadata.get("timings_ms") or {}
+        return cls(
+            filename=str(metadata["filename"]),
+            created_at=str(metadata.get("created_at") or datetime.now(tz=timezone.utc).isoformat()),
+            size_bytes=int(metadata.get("size_bytes") or 0),
+            sha256=metadata.get("sha256") or None,
+            duration_ms=timings.get("total"),
+            db_size_bytes=metadata.get("db_size_bytes"),
+            format=metadata.get("format"),
+            jobs=metadata.get("jobs"),
+            source=source,
+        )
+
+    def as_metadata(self, backup_dir: Path) -> dict[str, Any]:
+        return {**asdict(self), "id": self.id, "path": str(backup_dir / self.filename)}
+
+
+def _parse_created_at(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def select_retained(entries: list[BackupEntry], keep_last: int, daily: int, weekly: int, monthly: int) -> set[str]:
+    # Keep-last-N plus grandfather-father-son tiers: the newest backup of each of the
+    # newest `daily` days, `weekly` ISO weeks and `monthly` months is kept as well.
+    newest_first = sorted(entries, key=lambda entry: entry.created_at_dt, reverse=True)
+    retained = {entry.filename for entry in newest_first[: max(0, keep_last)]}
+    tiers = (
+        (daily, lambda moment: moment.date()),
+        (weekly, lambda moment: moment.isocalendar()[:2]),
+        (monthly, lambda moment: (moment.year, moment.month)),
+    )
+    for limit, bucket_of in tiers:
+        buckets: set[Any] = set()
+        for entry in newest_first:
+            if len(buckets) >= limit:
+                break
+            bucket = bucket_of(entry.created_at_dt)
+            if bucket not in buckets:
+                buckets.add(bucket)
+                retained.add(entry.filename)
+    return retained
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(CHECKSUM_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BackupCatalog:
+    # Index of every backup artifact, kept next to the backups as catalog.json. It is not a
+    # DB table on purpose: a restore replaces the database, the catalog must survive it.
+    # Reads are served from memory; only scan() looks at the directory.
+
+    def __init__(self, backup_dir: Path, restore_dir: Path) -> None:
+        self.backup_dir = backup_dir
+        self.restore_dir = restore_dir
+        self.path = backup_dir / CATALOG_FILENAME
+        self._entries: dict[str, BackupEntry] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, BackupEntry]:
+        if self._entries is not None:
+            return self._entries
+        entries: dict[str, BackupEntry] = {}
+        rebuild = not self.path.exists()
+        if not rebuild:
+            try:
+                names = {field.name for field in fields(BackupEntry)}
+                for raw in json.loads(self.path.read_text(encoding="utf-8")).get("entries", []):
+                    entry = BackupEntry(**{key: value for key, value in raw.items() if key in names})
+                    entries[entry.filename] = entry
+            except (json.JSONDecodeError, TypeError, AttributeError):
+                logger.warning("backup.catalog invalid json path=%s, rebuilding from disk", self.path)
+                entries = {}
+                rebuild = True
+        self._entries = entries
+        if rebuild:
+            # First start with a catalog (or a broken one): index what is already on disk.
+            self._reconcile(entries, checksums=False)
+            self._save(entries)
+        return self._entries
+
+    def _save(self, entries: dict[str, BackupEntry]) -> None:
+        ordered = sorted(entries.values(), key=lambda entry: entry.created_at_dt, reverse=True)
+        tmp_path = self.path.with_name(f".{CATALOG_FILENAME}.tmp")
+        tmp_path.write_text(json.dumps({"entries": [asdict(entry) for entry in ordered]}, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self._entries = {entry.filename: entry for entry in ordered}
+
+    def entries(self) -> list[BackupEntry]:
+        return list(self._load().values())
+
+    def page(self, offset: int, limit: int) -> tuple[list[BackupEntry], int]:
+        entries = self.entries()
+        return entries[offset : offset + limit], len(entries)
+
+    def latest(self) -> BackupEntry | None:
+        return next(iter(self._load().values()), None)
+
+    def get(self, entry_id_or_filename: str) -> BackupEntry | None:
+        entries = self._load()
+        entry = entries.get(entry_id_or_filename)
+        if entry is not None:
+            return entry
+        return next((entry for entry in entries.values() if entry.id == entry_id_or_filename), None)
+
+    def record(self, entry: BackupEntry) -> None:
+        with self._lock:
+            entries = dict(self._load())
+            entries[entry.filename] = entry
+            self._save(entries)
+        logger.info(
+            "backup.catalog recorded file=%s size=%s format=%s duration_ms=%s source=%s",
+            entry.filename,
+            entry.size_bytes,
+            entry.format,
+            entry.duration_ms,
+            entry.source,
+        )
+
+    def scan(
+        self,
+        keep_last: int,
+        daily: int = 0,
+        weekly: int = 0,
+        monthly: int = 0,
+        restore_keep_days: int = 7,
+        now: datetime | None = None,
+    ) -> dict[str, Any]:
+        # The one place that walks the directories: it reconciles the catalog with disk,
+        # applies retention and clears stale restore uploads. Blocking; run it in a thread.
+        now = now or datetime.now(tz=timezone.utc)
+        with self._lock:
+            entries = dict(self._load())
+            added, missing = self._reconcile(entries, checksums=True)
+            removed: list[str] = []
+            if keep_last > 0:
+                retained = select_retained(list(entries.values()), keep_last, daily, weekly, monthly)
+                for filename in [name for name in entries if name not in retained]:
+                    (self.backup_dir / filename).unlink(missing_ok=True)
+                    del entries[filename]
+                    removed.append(filename)
+            self._save(entries)
+
+        restores_removed = 0
+        if restore_keep_days > 0 and self.restore_dir.exists():
+            cutoff = (now - timedelta(days=restore_keep_days)).timestamp()
+            for path in self.restore_dir.iterdir():
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+                    restores_removed += 1
+
+        summary = {"kept": len(entries), "added": added, "missing": missing, "removed": removed, "restores_removed": restores_removed}
+        logger.info(
+            "backup.catalog scan kept=%s added=%s missing=%s removed=%s restores_removed=%s",
+            len(entries),
+            added,
+            missing,
+            len(removed),
+            restores_removed,
+        )
+        return summary
+
+    def _reconcile(self, entries: dict[str, BackupEntry], checksums: bool) -> tuple[int, int]:
+        on_disk = {path.name: path for pattern in BACKUP_FILE_PATTERNS for path in self.backup_dir.glob(pattern)}
+        missing = [filename for filename in entries if filename not in on_disk]
+        for filename in missing:
+            del entries[filename]
+        added = 0
+        for filename, path in on_disk.items():
+            if filename in entries:
+                continue
+            stat = path.stat()
+            entries[filename] = BackupEntry(
+                filename=filename,
+                created_at=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+                size_bytes=stat.st_size,
+                sha256=_sha256(path) if checksums else None,
+                format="directory" if filename.endswith(".dir.tar.gpg") else "custom",
+            )
+            added += 1
+        return added, len(missing)
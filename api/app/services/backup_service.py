@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import fcntl
 import gzip
 import json
@@ -8,17 +9,23 @@ import re
 import shutil
 import subprocess
 import tempfile
+import zlib
+from collections.abc import AsyncIterator, Callable, Iterator
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 from urllib.parse import unquote, urlparse
 
-import httpx
-
 from app.core.config import settings
-from app.db import dispose_engine
-from app.services.telegram import TelegramError, get_file, send_document, send_message
+from app.db import dispose_engine, reinitialize_engine
+from app.services.backup_catalog import BackupCatalog, BackupEntry
+from app.services.backup_throttle import BackupThrottle
+from app.services.occupancy import reset_occupancy
+from app.services.request_latency import request_latency
+from app.services.settings_cache import settings_cache
+from app.services.telegram_access import telegram_access_cache
+from app.services.telegram import TelegramError, get_file, get_telegram_client, send_document, send_message, telegram_api_url
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +44,7 @@ class RestoreResult:
     removed_incompatible_sets: int = 0
     stderr_tail: str | None = None
     warning_summary: str | None = None
+    maintenance_seconds: float | None = None
 
 
 @dataclass(slots=True)
@@ -46,6 +54,174 @@ class RestoreExecution:
     returncode: int
 
 
+RESTORE_CHUNK_BYTES = 1 << 20
+GZIP_MAGIC = b"\x1f\x8b"
+TAR_MAGIC = b"ustar"
+TAR_MAGIC_OFFSET = 257
+DUMP_HEADER_BYTES = TAR_MAGIC_OFFSET + len(TAR_MAGIC)
+MAINTENANCE_DB = "postgres"
+SHADOW_DB_SUFFIX = "_restore_shadow"
+PREVIOUS_DB_SUFFIX = "_pre_restore"
+PG_MAX_IDENTIFIER_BYTES = 63
+SWAP_TERMINATE_TIMEOUT_MS = 5000
+
+
+class RestoreStream:
+    # Yields the dump inside a backup file without writing it anywhere: gpg decrypts into
+    # a pipe and gzip (detected by magic bytes, not by suffix) is inflated chunk by chunk.
+
+    def __init__(self, path: Path, passphrase: str | None, chunk_size: int = RESTORE_CHUNK_BYTES) -> None:
+        self.path = path
+        self.passphrase = passphrase
+        self.chunk_size = chunk_size
+        self.encrypted = path.suffix.lower() == ".gpg"
+        self.compressed = False
+        self._process: asyncio.subprocess.Process | None = None
+        self._stderr_task: asyncio.Task | None = None
+        self._file = None
+        self._inflater = None
+        self._inflating = False
+        self._header = b""
+
+    @property
+    def is_raw(self) -> bool:
+        return not self.encrypted and not self.compressed
+
+    async def open(self) -> bytes:
+        if self.encrypted:
+            if not self.passphrase:
+                raise RuntimeError("BACKUP_PASSPHRASE is not configured")
+            self._process = await asyncio.create_subprocess_exec(
+                "gpg",
+                "--batch",
+                "--decrypt",
+                "--pinentry-mode",
+                "loopback",
+                "--passphrase",
+                self.passphrase,
+                "--output",
+                "-",
+                str(self.path),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            assert self._process.stderr is not None
+            self._stderr_task = asyncio.create_task(self._process.stderr.read())
+        else:
+            self._file = self.path.open("rb")
+
+        raw = b""
+        while len(raw) < len(GZIP_MAGIC) and (data := await self._read_raw()):
+            raw += data
+        if raw.startswith(GZIP_MAGIC):
+            self.compressed = True
+            self._inflater = zlib.decompressobj(wbits=31)
+        header = b"".join(self._inflate(raw))
+        while len(header) < DUMP_HEADER_BYTES and (data := await self._read_raw()):
+            header += b"".join(self._inflate(data))
+        if not header:
+            await self._finish()
+            raise RuntimeError("Restore file is empty")
+        self._header = header
+        return header
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        header, self._header = self._header, b""
+        yield header
+        while data := await self._read_raw():
+            for decoded in self._inflate(data):
+                yield decoded
+        await self._finish()
+
+    async def close(self) -> None:
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        if self._stderr_task is not None:
+            with contextlib.suppress(Exception):
+                await self._stderr_task
+        if self._file is not None:
+            self._file.close()
+
+    async def _read_raw(self) -> bytes:
+        if self._process is not None:
+            assert self._process.stdout is not None
+            return await self._process.stdout.read(self.chunk_size)
+        return await asyncio.to_thread(self._file.read, self.chunk_size)
+
+    def _inflate(self, data: bytes) -> Iterator[bytes]:
+        if self._inflater is None:
+            if data:
+                yield data
+            return
+        try:
+            while True:
+                # Bounded output keeps a highly compressed chunk from inflating into one huge buffer.
+                decoded = self._inflater.decompress(data, self.chunk_size)
+                if decoded:
+                    yield decoded
+                data = self._inflater.unconsumed_tail
+                if self._inflater.eof:
+                    # gzip allows several members back to back, like `cat a.gz b.gz`.
+                    self._inflating = False
+                    data = self._inflater.unused_data
+                    self._inflater = zlib.decompressobj(wbits=31)
+                    if not data:
+                        break
+                    continue
+                self._inflating = True
+                if not data and len(decoded) < self.chunk_size:
+                    break
+        except zlib.error as exc:
+            raise RuntimeError(f"Restore failed during gunzip: {exc}") from exc
+
+    async def _finish(self) -> None:
+        if self._process is not None:
+            returncode = await self._process.wait()
+            stderr = await self._stderr_task if self._stderr_task is not None else b""
+            if returncode != 0:
+                raise RuntimeError(f"Restore failed during decrypt: {(stderr or b'').decode(errors='replace').strip()}")
+        if self._inflating:
+            raise RuntimeError("Restore failed during gunzip: archive is truncated")
+
+
+class SqlTimeoutSetFilter:
+    # Streaming twin of BackupService._filter_incompatible_sql_settings. A line split
+    # across chunks is held back until its end arrives; chunks that cannot contain a
+    # timeout SET skip the per-line check.
+
+    def __init__(self, should_remove: Callable[[bytes], bool]) -> None:
+        self.should_remove = should_remove
+        self.removed = 0
+
+    async def filter(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        carry = b""
+        async with contextlib.aclosing(chunks) as source:
+            async for chunk in source:
+                data = carry + chunk if carry else chunk
+                end = data.rfind(b"\n") + 1
+                carry = data[end:]
+                if kept := self._filter_lines(data[:end]):
+                    yield kept
+        if kept := self._filter_lines(carry):
+            yield kept
+
+    def _filter_lines(self, data: bytes) -> bytes:
+        if not data or b"timeout" not in data.lower():
+            return data
+        # Split on "\n" only, the same way iterating over the dump file does.
+        lines = [line + b"\n" for line in data.split(b"\n")]
+        lines[-1] = lines[-1][:-1]
+        kept = []
+        for raw_line in lines:
+            if raw_line and self.should_remove(raw_line):
+                self.removed += 1
+                continue
+            kept.append(raw_line)
+        return b"".join(kept)
+
+
 class BackupService:
     CUSTOM_DUMP_MAGIC = b"PGDMP"
     SQL_SET_TIMEOUT_RE = re.compile(br"^\s*SET\s+([A-Za-z_][A-Za-z0-9_]*)\s*(?:=|TO)\s*[^;]+;\s*$", re.IGNORECASE)
@@ -67,12 +243,21 @@ class BackupService:
         self.restore_log_path = self.backup_dir / "restore.log"
         self.restore_dir = self.backup_dir / "restores"
         self.restore_dir.mkdir(parents=True, exist_ok=True)
+        self.catalog = BackupCatalog(self.backup_dir, self.restore_dir)
+        self.throttle = BackupThrottle(self.backup_dir / ".throttle", request_latency)
         self._maintenance_event = asyncio.Event()
 
     @property
     def is_maintenance(self) -> bool:
         return self._maintenance_event.is_set()
 
+    @staticmethod
+    def _reset_db_caches() -> None:
+        # Everything the API caches from the database a restore has just replaced.
+        settings_cache.invalidate()
+        reset_occupancy()
+        telegram_access_cache.invalidate()
+
     async def _with_operation_lock(self, coro):
         if self._async_lock.locked():
             raise BackupBusyError("backup or restore operation already in progress")
@@ -88,7 +273,7 @@ class BackupService:
                 finally:
                     fcntl.flock(lock_handle.fileno(), fcntl.LOCK_UN)
 
-    async def run_backup_script(self) -> dict[str, Any]:
+    async def run_backup_script(self, source: str = "manual") -> dict[str, Any]:
         async def _run() -> dict[str, Any]:
             env = os.environ.copy()
             backup_env_path = Path(settings.backup_env_path)
@@ -107,19 +292,52 @@ class BackupService:
             db_host, db_port, db_name, db_user, db_password = self._parse_database_url(database_url)
             env["PGPASSWORD"] = db_password
             await self._log_pg_runtime_versions(env, db_host=db_host, db_port=db_port, db_user=db_user, db_name=db_name)
+            env.setdefault("BACKUP_FORMAT", settings.backup_format)
+            env.setdefault("BACKUP_JOBS", str(settings.backup_jobs))
+            throttled = settings.backup_throttle_enabled
+            if throttled:
+                env.update(self.throttle.script_env())
+                self.throttle.start()
 
-            process = await asyncio.create_subprocess_exec(
-                bash_path,
-                str(script_path),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                env=env,
-            )
-            stdout, stderr = await process.communicate()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    bash_path,
+                    str(script_path),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    env=env,
+                )
+                stdout, stderr = await process.communicate()
+            finally:
+                if throttled:
+                    impact = await self.throttle.stop()
+                    logger.info(
+                        "backup.throttle done source=%s duration_s=%s baseline_p95_ms=%s mean_p95_ms=%s max_p95_ms=%s "
+                        "slow_s=%s paused_s=%s level_changes=%s",
+                        source,
+                        impact["duration_seconds"],
+                        impact["baseline_p95_ms"],
+                        impact["mean_p95_ms"],
+                        impact["max_p95_ms"],
+                        impact["slow_seconds"],
+                        impact["paused_seconds"],
+                        impact["level_changes"],
+                    )
             if process.returncode != 0:
                 raise RuntimeError(f"Backup script failed: {(stderr or b'').decode().strip()}")
 
             logger.info("backup.script success output=%s", (stdout or b"").decode().strip())
+            metadata = self._read_last_backup_json()
+            logger.info(
+                "backup.script timings format=%s jobs=%s timings_ms=%s size_bytes=%s",
+                metadata.get("format"),
+                metadata.get("jobs"),
+                metadata.get("timings_ms"),
+                metadata.get("size_bytes"),
+            )
+            if metadata.get("filename"):
+                self.catalog.record(BackupEntry.from_metadata(metadata, source=source))
+            await self.scan_catalog(env)
             return self.get_latest_metadata()
 
         return await self._with_operation_lock(_run)
@@ -172,6 +390,12 @@ class BackupService:
         logger.info("backup.script head path=%s head=%s", script_path, self._read_script_head(script_path))
 
     def get_latest_metadata(self) -> dict[str, Any]:
+        latest = self.catalog.latest()
+        if latest is not None:
+            return latest.as_metadata(self.backup_dir)
+        return self._read_last_backup_json()
+
+    def _read_last_backup_json(self) -> dict[str, Any]:
         if self.metadata_path.exists():
             try:
                 payload = json.loads(self.metadata_path.read_text(encoding="utf-8"))
@@ -179,18 +403,27 @@ class BackupService:
                     return payload
             except json.JSONDecodeError:
                 logger.warning("backup.metadata invalid json path=%s", self.metadata_path)
-
-        backups = sorted(self.backup_dir.glob("*.dump.gpg"), reverse=True)
-        if not backups:
-            return {}
-        latest = backups[0]
-        created_at = datetime.fromtimestamp(latest.stat().st_mtime, tz=timezone.utc).isoformat()
-        return {
-            "filename": latest.name,
-            "path": str(latest),
-            "created_at": created_at,
-            "size_bytes": latest.stat().st_size,
-        }
+        return {}
+
+    def list_backups(self, offset: int = 0, limit: int = 20) -> tuple[list[dict[str, Any]], int]:
+        entries, total = self.catalog.page(offset=offset, limit=limit)
+        return [entry.as_metadata(self.backup_dir) for entry in entries], total
+
+    def get_backup_metadata(self, entry_id: str) -> dict[str, Any] | None:
+        entry = self.catalog.get(entry_id)
+        return entry.as_metadata(self.backup_dir) if entry is not None else None
+
+    async def scan_catalog(self, env: dict[str, str] | None = None) -> dict[str, Any]:
+        # RETENTION_KEEP used to live in the backup script env, so it still wins there.
+        keep_last = int((env or {}).get("RETENTION_KEEP") or settings.retention_keep)
+        return await asyncio.to_thread(
+            self.catalog.scan,
+            keep_last=keep_last,
+            daily=settings.backup_retention_daily,
+            weekly=settings.backup_retention_weekly,
+            monthly=settings.backup_retention_monthly,
+            restore_keep_days=settings.backup_restore_uploads_keep_days,
+        )
 
     async def send_latest_to_backup_chat(self) -> dict[str, Any]:
         if not settings.backup_chat_id:
@@ -206,6 +439,15 @@ class BackupService:
 
         return await send_document(chat_id=settings.backup_chat_id, file_path=str(backup_path), caption=f"DB backup: {backup_path.name}")
 
+    async def restore_catalog_backup(self, entry_id: str, actor_tg_user_id: int) -> dict[str, Any]:
+        metadata = self.get_backup_metadata(entry_id)
+        if metadata is None:
+            raise RuntimeError("Backup not found in catalog")
+        path = Path(str(metadata["path"]))
+        if not path.exists():
+            raise RuntimeError("Backup file not found")
+        return await self.restore_from_path(path=path, actor_tg_user_id=actor_tg_user_id, source=f"catalog:{path.name}")
+
     async def restore_latest_local_backup(self, actor_tg_user_id: int) -> dict[str, Any]:
         metadata = self.get_latest_metadata()
         if not metadata.get("path"):
@@ -232,19 +474,21 @@ class BackupService:
 
         timestamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d_%H%M%S")
         destination = self.restore_dir / f"restore_{timestamp}_{self._sanitize_filename(original_name)}"
-        url = f"https://api.telegram.org/file/bot{token}/{file_path}"
+        url = telegram_api_url(f"file/bot{token}/{file_path}")
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.get(url)
+        async with get_telegram_client().stream("GET", url, timeout=120.0) as response:
             response.raise_for_status()
-            destination.write_bytes(response.content)
+            with destination.open("wb") as target:
+                async for chunk in response.aiter_bytes():
+                    target.write(chunk)
 
         return destination, int(destination.stat().st_size or file_size)
 
     async def restore_from_path(self, path: Path, actor_tg_user_id: int, source: str | None = None) -> dict[str, Any]:
         async def _run() -> dict[str, Any]:
             started = datetime.now(tz=timezone.utc)
-            self._maintenance_event.set()
+            if settings.backup_restore_mode != "shadow":
+                self._maintenance_event.set()
             try:
                 result = await self._restore_from_file(path)
             except Exception as exc:  # noqa: BLE001
@@ -253,15 +497,20 @@ class BackupService:
                 self._append_restore_log(actor_tg_user_id=actor_tg_user_id, source=source or f"path:{path.name}", status="error", detail=stderr_tail)
                 raise RuntimeError(stderr_tail) from exc
             finally:
+                self._reset_db_caches()
                 self._maintenance_event.clear()
 
             duration = (datetime.now(tz=timezone.utc) - started).total_seconds()
             result.duration_seconds = duration
+            maintenance = result.maintenance_seconds if result.maintenance_seconds is not None else duration
             self._append_restore_log(
                 actor_tg_user_id=actor_tg_user_id,
                 source=source or f"path:{path.name}",
                 status="ok",
-                detail=f"type={result.file_type} removed_sets={result.removed_incompatible_sets} duration={duration:.2f}s",
+                detail=(
+                    f"type={result.file_type} removed_sets={result.removed_incompatible_sets} duration={duration:.2f}s "
+                    f"mode={settings.backup_restore_mode} maintenance={maintenance:.2f}s"
+                ),
             )
             return {
                 "ok": result.ok,
@@ -271,6 +520,7 @@ class BackupService:
                 "duration_seconds": round(duration, 2),
                 "removed_incompatible_sets": result.removed_incompatible_sets,
                 "warning_summary": result.warning_summary,
+                "maintenance_seconds": round(maintenance, 2),
             }
 
         return await self._with_operation_lock(_run)
@@ -289,73 +539,51 @@ class BackupService:
         passphrase = env.get("BACKUP_PASSPHRASE") or settings.backup_passphrase
 
         env["PGPASSWORD"] = db_password
-        removed_count = 0
-        detected_type = "unknown"
-        execution = RestoreExecution(stdout="", stderr="", returncode=0)
         await self._log_pg_runtime_versions(env, db_host=db_host, db_port=db_port, db_user=db_user, db_name=db_name)
         logger.info("backup.restore started file=%s", input_path)
 
-        with tempfile.TemporaryDirectory(prefix="restore_") as tmp_dir:
+        # Shadow mode loads and verifies a separate database while the API keeps serving the
+        # live one; only the rename swap at the end runs under maintenance.
+        shadow = settings.backup_restore_mode == "shadow"
+        load_db_name = self._shadow_db_name(db_name) if shadow else db_name
+        maintenance_seconds = None
+        if not shadow:
             await dispose_engine()
-            try:
-                restore_input_path = input_path
-                if input_path.suffix.lower() == ".gpg":
-                    if not passphrase:
-                        raise RuntimeError("BACKUP_PASSPHRASE is not configured")
-                    decrypted_dump_path = Path(tmp_dir) / "decrypted.restore"
-                    await self._decrypt_backup(
-                        encrypted_dump_path=input_path,
-                        decrypted_dump_path=decrypted_dump_path,
+        try:
+            if settings.backup_restore_streaming:
+                detected_type, removed_count, execution = await self._restore_streaming(
+                    input_path=input_path,
+                    passphrase=passphrase,
+                    db_host=db_host,
+                    db_port=db_port,
+                    db_user=db_user,
+                    db_name=load_db_name,
+                    env=env,
+                )
+            else:
+                with tempfile.TemporaryDirectory(prefix="restore_") as tmp_dir:
+                    detected_type, removed_count, execution = await self._restore_via_temp_files(
+                        input_path=input_path,
+                        tmp_dir=Path(tmp_dir),
                         passphrase=passphrase,
-                    )
-                    restore_input_path = decrypted_dump_path
-
-                if restore_input_path.suffix.lower() == ".gz":
-                    gunzipped_path = Path(tmp_dir) / "restore.sql"
-                    with gzip.open(restore_input_path, "rb") as source, gunzipped_path.open("wb") as target:
-                        shutil.copyfileobj(source, target)
-                    restore_input_path = gunzipped_path
-
-                await self._ensure_restore_runtime_compatibility(db_host=db_host, db_port=db_port, db_user=db_user, db_name=db_name, env=env)
-                await self._terminate_other_db_connections(db_host, db_port, db_user, db_name, env)
-                await self._reset_public_schema(db_host, db_port, db_user, db_name, env)
-                dump_format = self._detect_dump_format(restore_input_path)
-                detected_type = dump_format
-                logger.info("backup.restore format_detected format=%s file=%s", dump_format, input_path)
-
-                if dump_format == "custom":
-                    execution = await self._restore_custom_dump(
-                        dump_path=restore_input_path,
                         db_host=db_host,
                         db_port=db_port,
                         db_user=db_user,
-                        db_name=db_name,
-                        env=env,
-                    )
-                else:
-                    filtered_sql_path = Path(tmp_dir) / "filtered.sql"
-                    removed_count = self._filter_incompatible_sql_settings(
-                        source_path=restore_input_path,
-                        target_path=filtered_sql_path,
-                    )
-                    if removed_count:
-                        logger.info(
-                            "backup.restore compatibility_filter removed=%s parameter=transaction_timeout reason=compat_with_pg",
-                            removed_count,
-                        )
-                    execution = await self._restore_plain_sql_dump(
-                        sql_path=filtered_sql_path,
-                        db_host=db_host,
-                        db_port=db_port,
-                        db_user=db_user,
-                        db_name=db_name,
+                        db_name=load_db_name,
                         env=env,
                     )
 
-                self._handle_restore_execution(execution)
-                await self._health_check_db(db_host=db_host, db_port=db_port, db_user=db_user, db_name=db_name, env=env)
-                await self._verify_restored_schema(db_host=db_host, db_port=db_port, db_user=db_user, db_name=db_name, env=env)
-            finally:
+            self._handle_restore_execution(execution)
+            await self._health_check_db(db_host=db_host, db_port=db_port, db_user=db_user, db_name=load_db_name, env=env)
+            await self._verify_restored_schema(db_host=db_host, db_port=db_port, db_user=db_user, db_name=load_db_name, env=env)
+            if shadow:
+                maintenance_seconds = await self._swap_in_shadow_database(db_host, db_port, db_user, db_name, load_db_name, env)
+        except Exception:
+            if shadow:
+                await self._drop_database_quietly(db_host, db_port, db_user, load_db_name, env)
+            raise
+        finally:
+            if not shadow:
                 await dispose_engine()
 
         warning_summary = self._summarize_warnings(execution.stderr)
@@ -369,7 +597,186 @@ class BackupService:
             duration_seconds=0,
             removed_incompatible_sets=removed_count,
             warning_summary=warning_summary,
+            maintenance_seconds=maintenance_seconds,
+        )
+
+    async def _restore_streaming(
+        self,
+        input_path: Path,
+        passphrase: str | None,
+        db_host: str,
+        db_port: str,
+        db_user: str,
+        db_name: str,
+        env: dict[str, str],
+    ) -> tuple[str, int, RestoreExecution]:
+        stream = RestoreStream(input_path, passphrase)
+        try:
+            # The first decoded bytes prove the passphrase and the archive are readable,
+            # so a bad file is rejected before the schema is dropped.
+            header = await stream.open()
+            dump_format = self._dump_format_from_header(header)
+            logger.info(
+                "backup.restore format_detected format=%s file=%s encrypted=%s compressed=%s streaming=true",
+                dump_format,
+                input_path,
+                stream.encrypted,
+                stream.compressed,
+            )
+
+            if dump_format == "directory":
+                # pg_restore -j needs random access to the archive, so this format alone is
+                # unpacked to disk; the tar itself is still never written out.
+                with tempfile.TemporaryDirectory(prefix="restore_") as tmp_dir:
+                    dump_dir = await self._unpack_directory_dump(target_dir=Path(tmp_dir), env=env, stream=stream.chunks())
+                    await self._prepare_restore_target(db_host, db_port, db_user, db_name, env)
+                    execution = await self._restore_directory_dump(
+                        dump_dir=dump_dir,
+                        db_host=db_host,
+                        db_port=db_port,
+                        db_user=db_user,
+                        db_name=db_name,
+                        env=env,
+                    )
+                return dump_format, 0, execution
+
+            await self._prepare_restore_target(db_host, db_port, db_user, db_name, env)
+            if dump_format == "custom":
+                # A bare custom dump on disk is handed to pg_restore as is.
+                execution = await self._restore_custom_dump(
+                    dump_path=input_path if stream.is_raw else None,
+                    db_host=db_host,
+                    db_port=db_port,
+                    db_user=db_user,
+                    db_name=db_name,
+                    env=env,
+                    stream=None if stream.is_raw else stream.chunks(),
+                )
+                return dump_format, 0, execution
+
+            sql_filter = SqlTimeoutSetFilter(self._should_remove_timeout_set)
+            execution = await self._restore_plain_sql_dump(
+                sql_path=None,
+                db_host=db_host,
+                db_port=db_port,
+                db_user=db_user,
+                db_name=db_name,
+                env=env,
+                stream=sql_filter.filter(stream.chunks()),
+            )
+            if sql_filter.removed:
+                logger.info(
+                    "backup.restore compatibility_filter removed=%s parameter=transaction_timeout reason=compat_with_pg",
+                    sql_filter.removed,
+                )
+            return dump_format, sql_filter.removed, execution
+        finally:
+            await stream.close()
+
+    async def _restore_via_temp_files(
+        self,
+        input_path: Path,
+        tmp_dir: Path,
+        passphrase: str | None,
+        db_host: str,
+        db_port: str,
+        db_user: str,
+        db_name: str,
+        env: dict[str, str],
+    ) -> tuple[str, int, RestoreExecution]:
+        restore_input_path = input_path
+        if input_path.suffix.lower() == ".gpg":
+            if not passphrase:
+                raise RuntimeError("BACKUP_PASSPHRASE is not configured")
+            decrypted_dump_path = tmp_dir / "decrypted.restore"
+            await self._decrypt_backup(
+                encrypted_dump_path=input_path,
+                decrypted_dump_path=decrypted_dump_path,
+                passphrase=passphrase,
+            )
+            restore_input_path = decrypted_dump_path
+
+        if restore_input_path.suffix.lower() == ".gz":
+            gunzipped_path = tmp_dir / "restore.sql"
+            with gzip.open(restore_input_path, "rb") as source, gunzipped_path.open("wb") as target:
+                shutil.copyfileobj(source, target)
+            restore_input_path = gunzipped_path
+
+        dump_format = self._detect_dump_format(restore_input_path)
+        logger.info("backup.restore format_detected format=%s file=%s", dump_format, input_path)
+        if dump_format == "directory":
+            dump_dir = await self._unpack_directory_dump(target_dir=tmp_dir / "unpacked", env=env, archive_path=restore_input_path)
+            await self._prepare_restore_target(db_host, db_port, db_user, db_name, env)
+            execution = await self._restore_directory_dump(
+                dump_dir=dump_dir,
+                db_host=db_host,
+                db_port=db_port,
+                db_user=db_user,
+                db_name=db_name,
+                env=env,
+            )
+            return dump_format, 0, execution
+
+        await self._prepare_restore_target(db_host, db_port, db_user, db_name, env)
+        if dump_format == "custom":
+            execution = await self._restore_custom_dump(
+                dump_path=restore_input_path,
+                db_host=db_host,
+                db_port=db_port,
+                db_user=db_user,
+                db_name=db_name,
+                env=env,
+            )
+            return dump_format, 0, execution
+
+        filtered_sql_path = tmp_dir / "filtered.sql"
+        removed_count = self._filter_incompatible_sql_settings(
+            source_path=restore_input_path,
+            target_path=filtered_sql_path,
+        )
+        if removed_count:
+            logger.info(
+                "backup.restore compatibility_filter removed=%s parameter=transaction_timeout reason=compat_with_pg",
+                removed_count,
+            )
+        execution = await self._restore_plain_sql_dump(
+            sql_path=filtered_sql_path,
+            db_host=db_host,
+            db_port=db_port,
+            db_user=db_user,
+            db_name=db_name,
+            env=env,
         )
+        return dump_format, removed_count, execution
+
+    async def _prepare_restore_target(self, db_host: str, db_port: str, db_user: str, db_name: str, env: dict[str, str]) -> None:
+        if settings.backup_restore_mode == "shadow":
+            # db_name is the shadow database here; the live one stays untouched until the swap.
+            await self._create_shadow_database(db_host, db_port, db_user, db_name, env)
+            await self._ensure_restore_runtime_compatibility(db_host=db_host, db_port=db_port, db_user=db_user, db_name=db_name, env=env)
+            return
+        await self._ensure_restore_runtime_compatibility(db_host=db_host, db_port=db_port, db_user=db_user, db_name=db_name, env=env)
+        await self._terminate_other_db_connections(db_host, db_port, db_user, db_name, env)
+        await self._reset_public_schema(db_host, db_port, db_user, db_name, env)
+
+    async def _unpack_directory_dump(
+        self,
+        target_dir: Path,
+        env: dict[str, str],
+        stream: AsyncIterator[bytes] | None = None,
+        archive_path: Path | None = None,
+    ) -> Path:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        command = ["tar", "-x", "--no-same-owner", "-f", str(archive_path) if archive_path is not None else "-", "-C", str(target_dir)]
+        started = asyncio.get_running_loop().time()
+        execution = await self._run_restore_command("directory_unpack", command, env, stream)
+        if execution.returncode != 0:
+            raise RuntimeError(f"Restore failed during unpack: {self._error_tail(execution.stderr)}")
+        toc_path = next(target_dir.rglob("toc.dat"), None)
+        if toc_path is None:
+            raise RuntimeError("Restore failed during unpack: toc.dat not found in archive")
+        logger.info("backup.restore unpacked dir=%s seconds=%.2f", toc_path.parent, asyncio.get_running_loop().time() - started)
+        return toc_path.parent
 
     async def _decrypt_backup(self, encrypted_dump_path: Path, decrypted_dump_path: Path, passphrase: str) -> None:
         process = await asyncio.create_subprocess_exec(
@@ -393,9 +800,15 @@ class BackupService:
 
     def _detect_dump_format(self, decrypted_dump_path: Path) -> str:
         with decrypted_dump_path.open("rb") as handle:
-            header = handle.read(len(self.CUSTOM_DUMP_MAGIC))
-        if header == self.CUSTOM_DUMP_MAGIC:
+            header = handle.read(DUMP_HEADER_BYTES)
+        return self._dump_format_from_header(header)
+
+    def _dump_format_from_header(self, header: bytes) -> str:
+        if header.startswith(self.CUSTOM_DUMP_MAGIC):
             return "custom"
+        # Directory-format backups are shipped as a tar of the pg_dump -Fd directory.
+        if header[TAR_MAGIC_OFFSET : TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC:
+            return "directory"
         return "plain_sql"
 
     def _filter_incompatible_sql_settings(self, source_path: Path, target_path: Path) -> int:
@@ -416,7 +829,16 @@ class BackupService:
         parameter_name = match.group(1).lower()
         return parameter_name.endswith(b"timeout") and parameter_name not in self.SUPPORTED_TIMEOUT_SETTINGS
 
-    async def _restore_custom_dump(self, dump_path: Path, db_host: str, db_port: str, db_user: str, db_name: str, env: dict[str, str]) -> RestoreExecution:
+    async def _restore_custom_dump(
+        self,
+        dump_path: Path | None,
+        db_host: str,
+        db_port: str,
+        db_user: str,
+        db_name: str,
+        env: dict[str, str],
+        stream: AsyncIterator[bytes] | None = None,
+    ) -> RestoreExecution:
         command = [
             "pg_restore",
             "--exit-on-error",
@@ -430,21 +852,43 @@ class BackupService:
             db_user,
             "-d",
             db_name,
-            str(dump_path),
         ]
-        process = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
-        )
-        stdout, stderr = await process.communicate()
-        stdout_text = (stdout or b"").decode(errors="replace").strip()
-        stderr_text = (stderr or b"").decode(errors="replace").strip()
-        self._log_restore_process_result("custom_dump", command, process.returncode, stderr_text)
-        return RestoreExecution(stdout=stdout_text, stderr=stderr_text, returncode=process.returncode)
+        # Without a file argument pg_restore reads the archive from stdin.
+        if dump_path is not None:
+            command.append(str(dump_path))
+        return await self._run_restore_command("custom_dump", command, env, stream)
 
-    async def _restore_plain_sql_dump(self, sql_path: Path, db_host: str, db_port: str, db_user: str, db_name: str, env: dict[str, str]) -> RestoreExecution:
+    async def _restore_directory_dump(self, dump_dir: Path, db_host: str, db_port: str, db_user: str, db_name: str, env: dict[str, str]) -> RestoreExecution:
+        command = [
+            "pg_restore",
+            "--exit-on-error",
+            "--no-owner",
+            "--no-privileges",
+            "--format=directory",
+            "--jobs",
+            str(max(1, settings.backup_jobs)),
+            "-h",
+            db_host,
+            "-p",
+            db_port,
+            "-U",
+            db_user,
+            "-d",
+            db_name,
+            str(dump_dir),
+        ]
+        return await self._run_restore_command("directory_dump", command, env, None)
+
+    async def _restore_plain_sql_dump(
+        self,
+        sql_path: Path | None,
+        db_host: str,
+        db_port: str,
+        db_user: str,
+        db_name: str,
+        env: dict[str, str],
+        stream: AsyncIterator[bytes] | None = None,
+    ) -> RestoreExecution:
         command = [
             "psql",
             "-v",
@@ -458,20 +902,58 @@ class BackupService:
             "-d",
             db_name,
             "-f",
-            str(sql_path),
+            str(sql_path) if sql_path is not None else "-",
         ]
+        return await self._run_restore_command("plain_sql", command, env, stream)
+
+    async def _run_restore_command(
+        self,
+        dump_format: str,
+        command: list[str],
+        env: dict[str, str],
+        stream: AsyncIterator[bytes] | None,
+    ) -> RestoreExecution:
         process = await asyncio.create_subprocess_exec(
             *command,
+            stdin=asyncio.subprocess.PIPE if stream is not None else asyncio.subprocess.DEVNULL,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             env=env,
         )
-        stdout, stderr = await process.communicate()
+        if stream is None:
+            stdout, stderr = await process.communicate()
+        else:
+            stdout, stderr = await self._pipe_into_process(process, stream)
         stdout_text = (stdout or b"").decode(errors="replace").strip()
         stderr_text = (stderr or b"").decode(errors="replace").strip()
-        self._log_restore_process_result("plain_sql", command, process.returncode, stderr_text)
+        self._log_restore_process_result(dump_format, command, process.returncode, stderr_text)
         return RestoreExecution(stdout=stdout_text, stderr=stderr_text, returncode=process.returncode)
 
+    async def _pipe_into_process(self, process: asyncio.subprocess.Process, stream: AsyncIterator[bytes]) -> tuple[bytes, bytes]:
+        assert process.stdin is not None and process.stdout is not None and process.stderr is not None
+        output = asyncio.gather(process.stdout.read(), process.stderr.read())
+        try:
+            async with contextlib.aclosing(stream) as chunks:
+                async for chunk in chunks:
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+            process.stdin.close()
+            await process.stdin.wait_closed()
+        except (BrokenPipeError, ConnectionResetError):
+            # The restore tool quit before reading everything; its exit code and stderr say why.
+            logger.warning("backup.restore consumer_closed_early pid=%s", process.pid)
+        except BaseException:
+            # A broken source must not look like a complete dump, so the tool is killed
+            # instead of seeing a clean end of input.
+            process.kill()
+            with contextlib.suppress(Exception):
+                await output
+            await process.wait()
+            raise
+        stdout, stderr = await output
+        await process.wait()
+        return stdout, stderr
+
     def _handle_restore_execution(self, execution: RestoreExecution) -> None:
         if execution.returncode != 0:
             raise RuntimeError(f"Restore failed: {self._error_tail(execution.stderr)}")
@@ -677,6 +1159,121 @@ class BackupService:
         if process.returncode != 0:
             raise RuntimeError(f"Не удалось очистить схему public: {(stderr or b'').decode(errors='replace').strip()}")
 
+    @staticmethod
+    def _quote_ident(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def _shadow_db_name(db_name: str) -> str:
+        shadow_name = f"{db_name}{SHADOW_DB_SUFFIX}"
+        if len(shadow_name.encode()) > PG_MAX_IDENTIFIER_BYTES or len(f"{db_name}{PREVIOUS_DB_SUFFIX}".encode()) > PG_MAX_IDENTIFIER_BYTES:
+            raise RuntimeError(f"Имя базы {db_name} слишком длинное для восстановления через теневую базу")
+        return shadow_name
+
+    async def _run_admin_sql(self, db_host: str, db_port: str, db_user: str, env: dict[str, str], sql: str, step: str) -> str:
+        # CREATE/DROP/RENAME DATABASE cannot run while connected to the database itself.
+        process = await asyncio.create_subprocess_exec(
+            "psql",
+            "-h",
+            db_host,
+            "-p",
+            db_port,
+            "-U",
+            db_user,
+            "-d",
+            MAINTENANCE_DB,
+            "-v",
+            "ON_ERROR_STOP=1",
+            "-Atq",
+            "-c",
+            sql,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"Restore failed during {step}: {(stderr or b'').decode(errors='replace').strip()}")
+        return (stdout or b"").decode(errors="replace").strip()
+
+    async def _create_shadow_database(self, db_host: str, db_port: str, db_user: str, shadow_name: str, env: dict[str, str]) -> None:
+        logger.info("backup.restore step=create_shadow database=%s", shadow_name)
+        # A leftover from an interrupted restore is never live, so it is safe to drop.
+        await self._run_admin_sql(db_host, db_port, db_user, env, f"DROP DATABASE IF EXISTS {self._quote_ident(shadow_name)} WITH (FORCE)", "shadow_drop")
+        await self._run_admin_sql(db_host, db_port, db_user, env, f"CREATE DATABASE {self._quote_ident(shadow_name)}", "shadow_create")
+
+    async def _drop_database_quietly(self, db_host: str, db_port: str, db_user: str, db_name: str, env: dict[str, str]) -> None:
+        try:
+            await self._run_admin_sql(db_host, db_port, db_user, env, f"DROP DATABASE IF EXISTS {self._quote_ident(db_name)} WITH (FORCE)", "drop")
+        except Exception:  # noqa: BLE001
+            logger.exception("backup.restore drop_database failed database=%s", db_name)
+
+    async def _swap_in_shadow_database(
+        self,
+        db_host: str,
+        db_port: str,
+        db_user: str,
+        db_name: str,
+        shadow_name: str,
+        env: dict[str, str],
+    ) -> float:
+        live = self._quote_ident(db_name)
+        previous_name = f"{db_name}{PREVIOUS_DB_SUFFIX}"
+        previous = self._quote_ident(previous_name)
+        await self._run_admin_sql(db_host, db_port, db_user, env, f"DROP DATABASE IF EXISTS {previous} WITH (FORCE)", "swap_prepare")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self._maintenance_event.set()
+        await dispose_engine()
+        try:
+            # Closing the live database to new sessions first keeps background loops from
+            # reconnecting between the terminate and the rename.
+            await self._run_admin_sql(db_host, db_port, db_user, env, f"ALTER DATABASE {live} WITH ALLOW_CONNECTIONS false", "swap_lock")
+            try:
+                await self._run_admin_sql(
+                    db_host,
+                    db_port,
+                    db_user,
+                    env,
+                    "SELECT count(pg_terminate_backend(pid, "
+                    f"{SWAP_TERMINATE_TIMEOUT_MS})) FROM pg_stat_activity "
+                    f"WHERE datname = '{db_name}' AND pid <> pg_backend_pid()",
+                    "swap_terminate",
+                )
+                await self._run_admin_sql(
+                    db_host,
+                    db_port,
+                    db_user,
+                    env,
+                    f"BEGIN; ALTER DATABASE {live} RENAME TO {previous}; "
+                    f"ALTER DATABASE {self._quote_ident(shadow_name)} RENAME TO {live}; "
+                    f"ALTER DATABASE {previous} WITH ALLOW_CONNECTIONS true; COMMIT;",
+                    "swap_rename",
+                )
+            except Exception:
+                try:
+                    await self._run_admin_sql(db_host, db_port, db_user, env, f"ALTER DATABASE {live} WITH ALLOW_CONNECTIONS true", "swap_unlock")
+                except Exception:  # noqa: BLE001
+                    logger.exception("backup.restore swap_unlock failed database=%s", db_name)
+                raise
+        finally:
+            # Traffic resumes only once nothing cached from the previous database is left.
+            reinitialize_engine()
+            self._reset_db_caches()
+            self._maintenance_event.clear()
+        maintenance_seconds = loop.time() - started
+        logger.info(
+            "backup.restore step=swap database=%s previous=%s maintenance_seconds=%.2f",
+            db_name,
+            previous_name,
+            maintenance_seconds,
+        )
+
+        if not settings.backup_restore_keep_previous_db:
+            await self._drop_database_quietly(db_host, db_port, db_user, previous_name, env)
+        return maintenance_seconds
+
     async def _health_check_db(self, db_host: str, db_port: str, db_user: str, db_name: str, env: dict[str, str]) -> None:
         process = await asyncio.create_subprocess_exec(
             "psql",
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.request_latency import RequestLatencyWindow
+
+logger = logging.getLogger(__name__)
+
+LEVEL_FULL = "full"
+LEVEL_SLOW = "slow"
+LEVEL_PAUSED = "paused"
+SLOW_RATE_WITHOUT_CAP = 1024 * 1024
+MIN_SLOW_RATE = 256 * 1024
+RECOVERY_RATIO = 0.8
+
+
+def next_level(current: str, p95_ms: float | None, threshold_ms: float, paused_seconds: float, max_pause_seconds: float) -> str:
+    # Slow down at the threshold, pause at twice the threshold. Going back up needs p95
+    # to drop a bit below the mark it crossed, so the level does not flap. Pauses share
+    # one budget per backup: latency the backup does not cause must not stall it forever.
+    if p95_ms is None or threshold_ms <= 0:
+        return LEVEL_FULL
+    if p95_ms >= threshold_ms * 2:
+        return LEVEL_PAUSED if paused_seconds < max_pause_seconds else LEVEL_SLOW
+    if current == LEVEL_PAUSED and paused_seconds < max_pause_seconds:
+        return LEVEL_PAUSED if p95_ms >= threshold_ms * 2 * RECOVERY_RATIO else LEVEL_SLOW
+    if p95_ms >= threshold_ms:
+        return LEVEL_SLOW
+    if current == LEVEL_SLOW and p95_ms >= threshold_ms * RECOVERY_RATIO:
+        return LEVEL_SLOW
+    return LEVEL_FULL
+
+
+class BackupThrottle:
+    # Runs next to a throttled backup. scripts/throttle_pipe.py sits in the dump pipe and
+    # rereads the control file, which holds "unlimited", "pause" or a byte rate.
+
+    def __init__(self, control_path: Path, latency: RequestLatencyWindow) -> None:
+        self.control_path = control_path
+        self.latency = latency
+        self.level = LEVEL_FULL
+        self.last_run: dict[str, object] | None = None
+        self._task: asyncio.Task | None = None
+        self._started_at = 0.0
+        self._baseline_p95: float | None = None
+        self._samples: list[float] = []
+        self._level_seconds = {LEVEL_FULL: 0.0, LEVEL_SLOW: 0.0, LEVEL_PAUSED: 0.0}
+        self._changes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def script_env(self) -> dict[str, str]:
+        return {
+            "BACKUP_NICE": str(settings.backup_throttle_nice),
+            "BACKUP_IONICE_CLASS": str(settings.backup_throttle_ionice_class or ""),
+            "BACKUP_RATE_LIMIT_BYTES": str(settings.backup_throttle_rate_bytes),
+            "BACKUP_THROTTLE_FILE": str(self.control_path),
+        }
+
+    def _rate_for(self, level: str) -> str:
+        cap = settings.backup_throttle_rate_bytes
+        if level == LEVEL_PAUSED:
+            return "pause"
+        if level == LEVEL_SLOW:
+            return str(max(cap // 4, MIN_SLOW_RATE) if cap > 0 else SLOW_RATE_WITHOUT_CAP)
+        return str(cap) if cap > 0 else "unlimited"
+
+    def _write_control(self) -> None:
+        tmp_path = self.control_path.with_name(f"{self.control_path.name}.tmp")
+        tmp_path.write_text(self._rate_for(self.level), encoding="utf-8")
+        tmp_path.replace(self.control_path)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self.level = LEVEL_FULL
+        self._started_at = time.monotonic()
+        self._baseline_p95 = self.latency.p95()
+        self._samples = []
+        self._level_seconds = {LEVEL_FULL: 0.0, LEVEL_SLOW: 0.0, LEVEL_PAUSED: 0.0}
+        self._changes = 0
+        self._write_control()
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> dict[str, object]:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.control_path.unlink(missing_ok=True)
+        samples = self._samples
+        self.last_run = {
+            "duration_seconds": round(time.monotonic() - self._started_at, 1),
+            "baseline_p95_ms": round(self._baseline_p95, 1) if self._baseline_p95 is not None else None,
+            "mean_p95_ms": round(sum(samples) / len(samples), 1) if samples else None,
+            "max_p95_ms": round(max(samples), 1) if samples else None,
+            "slow_seconds": round(self._level_seconds[LEVEL_SLOW], 1),
+            "paused_seconds": round(self._level_seconds[LEVEL_PAUSED], 1),
+            "level_changes": self._changes,
+        }
+        self.level = LEVEL_FULL
+        return self.last_run
+
+    def tick(self, elapsed: float) -> str:
+        self._level_seconds[self.level] += elapsed
+        p95 = self.latency.p95()
+        if p95 is not None:
+            self._samples.append(p95)
+        level = next_level(
+            self.level,
+            p95,
+            settings.backup_throttle_p95_ms,
+            self._level_seconds[LEVEL_PAUSED],
+            settings.backup_throttle_max_pause_seconds,
+        )
+        if level != self.level:
+            logger.info("backup.throttle level=%s previous=%s p95_ms=%s rate=%s", level, self.level, p95, self._rate_for(level))
+            self.level = level
+            self._changes += 1
+            self._write_control()
+        return level
+
+    async def _watch(self) -> None:
+        interval = settings.backup_throttle_check_seconds
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.tick(interval)
+            except OSError:
+                logger.exception("backup.throttle control write failed path=%s", self.control_path)
+
+    def stats(self) -> dict[str, object]:
+        return {"enabled": settings.backup_throttle_enabled, "running": self.running, "level": self.level, "last_run": self.last_run}
@@ -1,10 +1,17 @@
 from datetime import date, datetime, time
 
 from fastapi import HTTPException, status
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models import Booking, BookingStatus
 from app.utils import get_availability_slots
 
+BOOKING_OVERLAP_CONSTRAINT = "ex_bookings_master_no_overlap"
+# Arbitrary first key of pg_advisory_xact_lock(int, int); the second one is the day.
+BOOKING_DAY_LOCK_NAMESPACE = 0x5A10
+
 
 def _parse_date(value: str) -> date:
     for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
@@ -54,7 +61,9 @@ async def resolve_available_slot(
     now: datetime,
     master_id: int | None = None,
     exclude_booking_id: int | None = None,
+    exclude_hold_id: int | None = None,
 ) -> tuple[datetime, datetime]:
+    await lock_booking_day(db, requested_start.date())
     slots = await get_availability_slots(
         db,
         service_id,
@@ -62,6 +71,8 @@ async def resolve_available_slot(
         now,
         master_id=master_id,
         exclude_booking_id=exclude_booking_id,
+        fresh=True,
+        exclude_hold_id=exclude_hold_id,
     )
     for slot_start, slot_end in slots:
         if slot_start == requested_start:
@@ -69,5 +80,41 @@ async def resolve_available_slot(
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="slot busy")
 
 
+async def lock_booking_day(db: AsyncSession, booking_date: date) -> None:
+    # Check-then-insert for one day runs serially until commit. The exclusion constraint
+    # already stops master double-booking; this also keeps unassigned bookings within
+    # the pool capacity, which no constraint can express.
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, :day)"),
+        {"namespace": BOOKING_DAY_LOCK_NAMESPACE, "day": booking_date.toordinal()},
+    )
+
+
+async def master_has_overlap(db: AsyncSession, master_id: int, starts_at: datetime, ends_at: datetime, exclude_booking_id: int | None = None) -> bool:
+    query = select(Booking.id).where(
+        Booking.master_id == master_id,
+        Booking.status.in_([BookingStatus.new, BookingStatus.confirmed]),
+        Booking.starts_at < ends_at,
+        Booking.ends_at > starts_at,
+    )
+    if exclude_booking_id is not None:
+        query = query.where(Booking.id != exclude_booking_id)
+    result = await db.execute(query.limit(1))
+    return result.scalar_one_or_none() is not None
+
+
+def is_booking_overlap_error(exc: IntegrityError) -> bool:
+    return BOOKING_OVERLAP_CONSTRAINT in str(exc.orig)
+
+
+async def flush_booking(db: AsyncSession) -> None:
+    try:
+        await db.flush()
+    except IntegrityError as exc:
+        if is_booking_overlap_error(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="slot busy") from exc
+        raise
+
+
 def booking_validation_error(detail: str) -> HTTPException:
     return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
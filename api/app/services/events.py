@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESET_PAYLOAD = "*"
+
+EventHandler = Callable[[str], None]
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    scheme, separator, rest = database_url.partition("://")
+    return f"{scheme.split('+', 1)[0]}{separator}{rest}"
+
+
+class PgEventBus:
+    # Cross-worker invalidation over Postgres LISTEN/NOTIFY. Notifications are sent
+    # inside the writer's transaction, so listeners only hear about committed changes.
+    # After a (re)connect every handler receives RESET_PAYLOAD because anything sent
+    # while the listener was away is lost.
+
+    HEALTH_CHECK_SECONDS = 30.0
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[EventHandler]] = {}
+        self._task: asyncio.Task | None = None
+        self._connected = False
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def subscribe(self, channel: str, handler: EventHandler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def dispatch(self, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception:  # noqa: BLE001
+                logger.exception("pg_events.handler failed channel=%s payload=%s", channel, payload)
+
+    async def publish(self, db: AsyncSession, channel: str, payload: str = RESET_PAYLOAD) -> None:
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+    def stats(self) -> dict[str, object]:
+        return {"connected": self._connected, "channels": sorted(self._handlers)}
+
+    async def start(self) -> None:
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.dispatch(channel, payload)
+
+    def _reset_all(self) -> None:
+        for channel in self._handlers:
+            self.dispatch(channel, RESET_PAYLOAD)
+
+    async def _listen_loop(self) -> None:
+        backoff_seconds = 1
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(_asyncpg_dsn(settings.database_url))
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _connection: closed.set())
+                for channel in self._handlers:
+                    await connection.add_listener(channel, self._on_notification)
+                self._connected = True
+                backoff_seconds = 1
+                logger.info("pg_events.listening channels=%s", ",".join(self._handlers))
+                self._reset_all()
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), timeout=self.HEALTH_CHECK_SECONDS)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("pg_events.disconnected (retry in %ss): %s", backoff_seconds, exc)
+            finally:
+                self._connected = False
+                if connection is not None and not connection.is_closed():
+                    try:
+                        await connection.close(timeout=5)
+                    except Exception:  # noqa: BLE001
+                        connection.terminate()
+            self._reset_all()
+            await asyncio.sleep(backoff_seconds)
+            backoff_seconds = min(backoff_seconds * 2, 30)
+
+
+event_bus = PgEventBus()
@@ -0,0 +1,90 @@
+import itertools
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload
+
+from app import db as db_module
+from app.models import Booking, BookingStatus, Master, TelegramProcessedUpdate
+from app.services.telegram_outbox import OUTBOX_MASTER_AGENDA, enqueue_telegram_message
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class MasterAgenda:
+    master_id: int
+    chat_id: int
+    text: str
+    bookings: int
+
+
+def _agenda_line(booking: Booking) -> str:
+    service_title = booking.service.title if booking.service else f"Услуга #{booking.service_id}"
+    starts = booking.starts_at.strftime("%H:%M")
+    ends = booking.ends_at.strftime("%H:%M")
+    comment = f" · {booking.comment.strip()}" if booking.comment and booking.comment.strip() else ""
+    return f"{starts}–{ends} · {service_title} · {booking.client_name} ({booking.client_phone}){comment}"
+
+
+def agenda_text(day: date, bookings: list[Booking]) -> str:
+    lines = [f"📅 Ваши записи на {day.strftime('%d.%m.%Y')}", *(_agenda_line(booking) for booking in bookings), f"Всего: {len(bookings)}"]
+    return "\n".join(lines)
+
+
+async def load_master_agendas(db: AsyncSession, day: date) -> list[MasterAgenda]:
+    # One round trip for every master: confirmed bookings of the day joined with their
+    # linked master and service, ordered so that each master's rows are contiguous.
+    day_start = datetime.combine(day, time.min)
+    rows = (
+        await db.execute(
+            select(Booking)
+            .join(Master, Booking.master_id == Master.id)
+            .where(
+                Booking.status == BookingStatus.confirmed,
+                Booking.starts_at >= day_start,
+                Booking.starts_at < day_start + timedelta(days=1),
+                Master.is_active.is_(True),
+                Master.telegram_chat_id.is_not(None),
+            )
+            .options(contains_eager(Booking.master), joinedload(Booking.service))
+            .order_by(Booking.master_id, Booking.starts_at, Booking.id)
+        )
+    ).scalars().all()
+    agendas = []
+    for master_id, group in itertools.groupby(rows, key=lambda booking: booking.master_id):
+        bookings = list(group)
+        agendas.append(MasterAgenda(master_id=master_id, chat_id=bookings[0].master.telegram_chat_id, text=agenda_text(day, bookings), bookings=len(bookings)))
+    return agendas
+
+
+async def _claim_day(db: AsyncSession, day: date) -> bool:
+    # With several API workers only the first one to get here queues the day's agendas.
+    # The key is outside DEDUP_KEY_PREFIXES, so the update-dedup TTL purge leaves it alone.
+    statement = (
+        insert(TelegramProcessedUpdate)
+        .values(key=f"master_agenda:{day.isoformat()}")
+        .on_conflict_do_nothing(index_elements=[TelegramProcessedUpdate.key])
+        .returning(TelegramProcessedUpdate.key)
+    )
+    return (await db.execute(statement)).scalar_one_or_none() is not None
+
+
+async def send_master_agendas(day: date) -> dict[str, int]:
+    # The agendas go into the Telegram outbox in the transaction that claims the day, so a
+    # claimed day always has its messages queued and delivery gets the outbox retries.
+    async with db_module.AsyncSessionLocal() as db:
+        async with db.begin():
+            if not await _claim_day(db, day):
+                logger.info("master_agenda.skip reason=already_sent day=%s", day)
+                return {"masters": 0, "queued": 0}
+            agendas = await load_master_agendas(db, day)
+            for agenda in agendas:
+                await enqueue_telegram_message(db, OUTBOX_MASTER_AGENDA, None, {"chat_id": agenda.chat_id, "text": agenda.text})
+
+    logger.info("master_agenda.done day=%s masters=%s", day, len(agendas))
+    return {"masters": len(agendas), "queued": len(agendas)}
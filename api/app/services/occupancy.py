@@ -0,0 +1,284 @@
+import logging
+import uuid
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import run_after_commit
+from app.models import Booking, BookingStatus, SlotHold
+from app.services.availability import DayBitmap, OccupancyBitmaps, day_minute_masks
+from app.services.events import RESET_PAYLOAD, event_bus
+
+logger = logging.getLogger(__name__)
+
+OCCUPANCY_CHANNEL = "occupancy_changed"
+
+ACTIVE_BOOKING_STATUSES = (BookingStatus.new, BookingStatus.confirmed)
+
+
+@dataclass(frozen=True, slots=True)
+class BookingOccupancy:
+    booking_id: int
+    master_id: int | None
+    starts_at: datetime
+    ends_at: datetime
+    is_active: bool
+    expires_at: datetime | None = None
+
+    @classmethod
+    def of(cls, booking: Booking) -> "BookingOccupancy":
+        return cls(booking.id, booking.master_id, booking.starts_at, booking.ends_at, booking.status in ACTIVE_BOOKING_STATUSES)
+
+    @classmethod
+    def of_hold(cls, hold: SlotHold, is_active: bool) -> "BookingOccupancy":
+        # Holds share the bitmaps with bookings under negative ids.
+        return cls(-hold.id, hold.master_id, hold.starts_at, hold.ends_at, is_active, hold.expires_at)
+
+
+@dataclass(frozen=True, slots=True)
+class BookingChangeScope:
+    days: frozenset[date]
+    master_ids: frozenset[int | None]
+
+    def encode(self) -> str:
+        days = ",".join(day.isoformat() for day in sorted(self.days))
+        masters = ",".join("-" if master_id is None else str(master_id) for master_id in sorted(self.master_ids, key=lambda value: value or 0))
+        return f"{days}:{masters}"
+
+    @classmethod
+    def decode(cls, value: str) -> "BookingChangeScope":
+        days, _, masters = value.partition(":")
+        return cls(
+            days=frozenset(date.fromisoformat(item) for item in days.split(",") if item),
+            master_ids=frozenset(None if item == "-" else int(item) for item in masters.split(",") if item),
+        )
+
+
+# Listeners get the scope of every committed booking change, local or remote; None means "everything".
+BookingChangeListener = Callable[[BookingChangeScope | None], None]
+_change_listeners: list[BookingChangeListener] = []
+
+
+def on_booking_change(listener: BookingChangeListener) -> None:
+    _change_listeners.append(listener)
+
+
+def _notify_listeners(scope: BookingChangeScope | None) -> None:
+    for listener in _change_listeners:
+        try:
+            listener(scope)
+        except Exception:  # noqa: BLE001
+            logger.exception("occupancy.listener failed")
+
+
+def _days_between(first_day: date, last_day: date) -> list[date]:
+    return [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+
+def _covered_days(starts_at: datetime, ends_at: datetime) -> set[date]:
+    return {day for day, _ in day_minute_masks(starts_at, ends_at)}
+
+
+class OccupancyStore:
+    # Per-day minute bitmaps of NEW/CONFIRMED bookings, kept for today onwards.
+    # Local writes are applied incrementally after commit; other workers learn about
+    # them over NOTIFY and drop the touched days, which are reloaded on the next read.
+
+    def __init__(self, enabled: bool) -> None:
+        self._enabled = enabled
+        self.origin = uuid.uuid4().hex[:12]
+        self._days: dict[date, DayBitmap] = {}
+        self._booking_days: dict[int, set[date]] = {}
+        # Holds lapse without any write; they are dropped from the bitmaps on the first read after expires_at.
+        self._hold_expiry: dict[int, datetime] = {}
+        self._generation = 0
+        self.day_hits = 0
+        self.day_loads = 0
+        self.applied_changes = 0
+        self.evicted_days = 0
+
+    @property
+    def enabled(self) -> bool:
+        # Without a live listener remote writes would go unnoticed, so reads fall back to SQL.
+        return self._enabled and event_bus.is_connected
+
+    async def view(self, db: AsyncSession, first_day: date, last_day: date) -> OccupancyBitmaps:
+        today = date.today()
+        self._prune_before(today)
+        self._expire_holds(datetime.now())
+        wanted = _days_between(first_day, last_day)
+        days = {day: self._days[day] for day in wanted if day in self._days}
+        self.day_hits += len(days)
+        missing = [day for day in wanted if day not in days]
+        if missing:
+            days.update(await self._load(db, missing[0], missing[-1], keep_from=today))
+        return OccupancyBitmaps(days)
+
+    async def _load(self, db: AsyncSession, first_day: date, last_day: date, keep_from: date) -> dict[date, DayBitmap]:
+        generation = self._generation
+        result = await db.execute(
+            select(Booking.id, Booking.starts_at, Booking.ends_at, Booking.master_id).where(
+                Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+                Booking.starts_at < datetime.combine(last_day + timedelta(days=1), time.min),
+                Booking.ends_at > datetime.combine(first_day, time.min),
+            )
+        )
+        holds = await db.execute(
+            select(-SlotHold.id, SlotHold.starts_at, SlotHold.ends_at, SlotHold.master_id, SlotHold.expires_at).where(
+                SlotHold.expires_at > datetime.now(),
+                SlotHold.starts_at < datetime.combine(last_day + timedelta(days=1), time.min),
+                SlotHold.ends_at > datetime.combine(first_day, time.min),
+            )
+        )
+        loaded = {day: DayBitmap() for day in _days_between(first_day, last_day)}
+        hold_expiry: dict[int, datetime] = {}
+        for booking_id, starts_at, ends_at, master_id, *expires_at in [*result.all(), *holds.all()]:
+            if expires_at:
+                hold_expiry[booking_id] = expires_at[0]
+            for day, mask in day_minute_masks(starts_at, ends_at):
+                bitmap = loaded.get(day)
+                if bitmap is not None:
+                    bitmap.add(booking_id, master_id, mask)
+        self.day_loads += len(loaded)
+
+        # A change applied while the query ran may be missing from its snapshot.
+        if generation == self._generation:
+            self._hold_expiry.update(hold_expiry)
+            for day, bitmap in loaded.items():
+                if day >= keep_from:
+                    self._store_day(day, bitmap)
+        return loaded
+
+    def _store_day(self, day: date, bitmap: DayBitmap) -> None:
+        self._drop_day(day)
+        self._days[day] = bitmap
+        for booking_id in bitmap.booking_ids:
+            self._booking_days.setdefault(booking_id, set()).add(day)
+
+    def _drop_day(self, day: date) -> bool:
+        bitmap = self._days.pop(day, None)
+        if bitmap is None:
+            return False
+        for booking_id in bitmap.booking_ids:
+            booking_days = self._booking_days.get(booking_id)
+            if booking_days is not None:
+                booking_days.discard(day)
+                if not booking_days:
+                    del self._booking_days[booking_id]
+                    self._hold_expiry.pop(booking_id, None)
+        return True
+
+    def _prune_before(self, today: date) -> None:
+        for day in [day for day in self._days if day < today]:
+            self._drop_day(day)
+
+    def _expire_holds(self, now: datetime) -> None:
+        for hold_id in [hold_id for hold_id, expires_at in self._hold_expiry.items() if expires_at <= now]:
+            self._remove(hold_id)
+
+    def _remove(self, booking_id: int) -> None:
+        self._hold_expiry.pop(booking_id, None)
+        for day in self._booking_days.pop(booking_id, set()):
+            bitmap = self._days.get(day)
+            if bitmap is not None:
+                bitmap.remove(booking_id)
+
+    def apply(self, change: BookingOccupancy) -> None:
+        self._generation += 1
+        self.applied_changes += 1
+        self._remove(change.booking_id)
+        if not change.is_active:
+            return
+        if change.expires_at is not None:
+            self._hold_expiry[change.booking_id] = change.expires_at
+        for day, mask in day_minute_masks(change.starts_at, change.ends_at):
+            bitmap = self._days.get(day)
+            if bitmap is not None:
+                bitmap.add(change.booking_id, change.master_id, mask)
+                self._booking_days.setdefault(change.booking_id, set()).add(day)
+
+    def evict(self, days: list[date]) -> None:
+        self._generation += 1
+        for day in days:
+            if self._drop_day(day):
+                self.evicted_days += 1
+
+    def reset(self) -> None:
+        self._generation += 1
+        self.evicted_days += len(self._days)
+        self._days.clear()
+        self._booking_days.clear()
+        self._hold_expiry.clear()
+
+    def handle_event(self, payload: str) -> None:
+        origin, _, body = payload.partition(":")
+        if origin == self.origin:
+            return
+        if payload == RESET_PAYLOAD or body == RESET_PAYLOAD:
+            self.reset()
+            _notify_listeners(None)
+            return
+        try:
+            scope = BookingChangeScope.decode(body)
+        except ValueError:
+            logger.warning("occupancy.event invalid payload=%s", payload)
+            self.reset()
+            _notify_listeners(None)
+            return
+        self.evict(list(scope.days))
+        _notify_listeners(scope)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "days": len(self._days),
+            "bookings": len(self._booking_days),
+            "holds": len(self._hold_expiry),
+            "day_hits": self.day_hits,
+            "day_loads": self.day_loads,
+            "applied_changes": self.applied_changes,
+            "evicted_days": self.evicted_days,
+        }
+
+
+async def publish_occupancy_changes(db: AsyncSession, changes: Sequence[BookingOccupancy], previous: Sequence[BookingOccupancy] = ()) -> None:
+    if not changes:
+        return
+    days: set[date] = set()
+    master_ids: set[int | None] = set()
+    for entry in [*changes, *previous]:
+        days |= _covered_days(entry.starts_at, entry.ends_at)
+        master_ids.add(entry.master_id)
+    scope = BookingChangeScope(frozenset(days), frozenset(master_ids))
+
+    def apply_committed() -> None:
+        for change in changes:
+            occupancy_store.apply(change)
+        _notify_listeners(scope)
+
+    run_after_commit(db, apply_committed)
+    await event_bus.publish(db, OCCUPANCY_CHANNEL, f"{occupancy_store.origin}:{scope.encode()}")
+
+
+async def publish_booking_change(db: AsyncSession, booking: Booking, previous: BookingOccupancy | None = None) -> None:
+    await publish_occupancy_changes(db, [BookingOccupancy.of(booking)], [previous] if previous is not None else [])
+
+
+def reset_occupancy() -> None:
+    occupancy_store.reset()
+    _notify_listeners(None)
+
+
+async def publish_occupancy_rebuild(db: AsyncSession) -> None:
+    reset_occupancy()
+    run_after_commit(db, reset_occupancy)
+    await event_bus.publish(db, OCCUPANCY_CHANNEL, RESET_PAYLOAD)
+
+
+occupancy_store = OccupancyStore(enabled=settings.occupancy_bitmaps_enabled)
+event_bus.subscribe(OCCUPANCY_CHANNEL, occupancy_store.handle_event)
@@ -0,0 +1,48 @@
+import time
+from collections import deque
+
+from app.core.config import settings
+
+
+class RequestLatencyWindow:
+    # Rolling window of recent API request durations; the backup throttle reads its p95
+    # to tell whether live traffic is suffering.
+
+    def __init__(self, window_seconds: float, max_samples: int, min_samples: int) -> None:
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+        self.recorded = 0
+
+    def record(self, duration_ms: float, now: float | None = None) -> None:
+        self._samples.append((time.monotonic() if now is None else now, duration_ms))
+        self.recorded += 1
+
+    def _recent(self, now: float | None) -> list[float]:
+        cutoff = (time.monotonic() if now is None else now) - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return sorted(duration for _, duration in self._samples)
+
+    def p95(self, now: float | None = None) -> float | None:
+        durations = self._recent(now)
+        if len(durations) < self.min_samples:
+            return None
+        return durations[max(0, int(len(durations) * 0.95) - 1)]
+
+    def stats(self) -> dict[str, object]:
+        durations = self._recent(None)
+        return {
+            "window_seconds": self.window_seconds,
+            "samples": len(durations),
+            "recorded": self.recorded,
+            "p50_ms": round(durations[len(durations) // 2], 1) if durations else 0.0,
+            "p95_ms": round(durations[max(0, int(len(durations) * 0.95) - 1)], 1) if durations else 0.0,
+        }
+
+
+request_latency = RequestLatencyWindow(
+    window_seconds=settings.request_latency_window_seconds,
+    max_samples=10000,
+    min_samples=settings.request_latency_min_samples,
+)
@@ -0,0 +1,78 @@
+import copy
+import time
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import run_after_commit
+from app.services.events import RESET_PAYLOAD, event_bus
+
+SETTINGS_CHANNEL = "settings_changed"
+
+_MISSING = object()
+
+
+class SettingsCache:
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def lookup(self, key: str, now: float | None = None) -> Any:
+        if now is None:
+            now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def store(self, key: str, value: Any, generation: int, now: float | None = None) -> None:
+        # A value read before an invalidation may already be stale; drop it instead of caching.
+        if generation != self._generation or self.ttl_seconds <= 0:
+            return
+        if now is None:
+            now = time.monotonic()
+        self._entries[key] = (now + self.ttl_seconds, copy.deepcopy(value))
+
+    def invalidate(self, key: str | None = None) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        if key is None or key == RESET_PAYLOAD:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def is_missing(value: Any) -> bool:
+    return value is _MISSING
+
+
+async def publish_setting_change(db: AsyncSession, key: str) -> None:
+    settings_cache.invalidate(key)
+    run_after_commit(db, lambda: settings_cache.invalidate(key))
+    await event_bus.publish(db, SETTINGS_CHANNEL, key)
+
+
+settings_cache = SettingsCache(ttl_seconds=settings.settings_cache_ttl_seconds)
+event_bus.subscribe(SETTINGS_CHANNEL, settings_cache.invalidate)
@@ -0,0 +1,53 @@
+import logging
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import SlotHold
+from app.services.bookings import resolve_available_slot
+from app.services.occupancy import BookingOccupancy, publish_occupancy_changes
+
+logger = logging.getLogger(__name__)
+
+
+async def create_slot_hold(db: AsyncSession, service_id: int, requested_start: datetime, now: datetime, master_id: int | None = None) -> SlotHold:
+    slot_start, slot_end = await resolve_available_slot(db, service_id, requested_start, now, master_id=master_id)
+    hold = SlotHold(
+        token=secrets.token_urlsafe(24),
+        service_id=service_id,
+        master_id=master_id,
+        starts_at=slot_start,
+        ends_at=slot_end,
+        expires_at=now + timedelta(seconds=settings.slot_hold_ttl_seconds),
+    )
+    db.add(hold)
+    await db.flush()
+    await publish_occupancy_changes(db, [BookingOccupancy.of_hold(hold, is_active=True)])
+    logger.info("slot_hold.create hold_id=%s service_id=%s master_id=%s starts_at=%s", hold.id, service_id, master_id, slot_start.isoformat())
+    return hold
+
+
+async def get_active_hold(db: AsyncSession, token: str, now: datetime) -> SlotHold | None:
+    # Row lock: two checkouts presenting the same token are consumed one after another.
+    result = await db.execute(select(SlotHold).where(SlotHold.token == token, SlotHold.expires_at > now).with_for_update())
+    return result.scalar_one_or_none()
+
+
+async def release_slot_hold(db: AsyncSession, hold: SlotHold) -> None:
+    await db.delete(hold)
+    await db.flush()
+    await publish_occupancy_changes(db, [BookingOccupancy.of_hold(hold, is_active=False)])
+
+
+async def sweep_expired_holds(db: AsyncSession, now: datetime) -> int:
+    result = await db.execute(
+        delete(SlotHold)
+        .where(SlotHold.expires_at <= now)
+        .returning(SlotHold.id, SlotHold.master_id, SlotHold.starts_at, SlotHold.ends_at)
+    )
+    expired = [BookingOccupancy(-hold_id, master_id, starts_at, ends_at, False) for hold_id, master_id, starts_at, ends_at in result.all()]
+    await publish_occupancy_changes(db, expired)
+    return len(expired)
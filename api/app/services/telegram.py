@@ -12,6 +12,8 @@ from sqlalchemy.orm import selectinload
 from app.core.config import settings
 from app.models import Booking, BookingStatus, Master, Service
 from app.schemas import TgNotificationsSettings
+from app.services.telegram_breaker import telegram_breaker
+from app.services.telegram_scheduler import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, send_scheduler
 from app.utils import get_setting
 
 logger = logging.getLogger(__name__)
@@ -34,6 +36,10 @@ DEFAULT_MASTER_TEMPLATE = (
 )
 
 
+# Methods that post into a chat and count against Telegram's flood limits.
+RATE_LIMITED_METHODS = {"sendMessage", "editMessageText", "editMessageReplyMarkup", "sendDocument", "sendPhoto", "copyMessage", "forwardMessage"}
+
+
 class TelegramError(RuntimeError):
     def __init__(self, message: str, *, status_code: int | None = None, description: str | None = None) -> None:
         super().__init__(message)
@@ -41,6 +47,10 @@ class TelegramError(RuntimeError):
         self.description = description
 
 
+class TelegramUnavailableError(TelegramError):
+    pass
+
+
 def _short_response_text(value: str, limit: int = 500) -> str:
     normalized = value.replace("\n", " ").strip()
     if len(normalized) <= limit:
@@ -103,6 +113,53 @@ def build_admin_inline_keyboard(booking_id: int) -> dict[str, Any]:
     }
 
 
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def telegram_api_url(path: str) -> str:
+    return f"{settings.telegram_api_base_url.rstrip('/')}/{path}"
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    http2 = settings.telegram_http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("telegram.http_client http2 disabled reason=h2_not_installed")
+            http2 = False
+    limits = httpx.Limits(
+        max_connections=settings.telegram_max_connections,
+        max_keepalive_connections=settings.telegram_max_keepalive_connections,
+        keepalive_expiry=settings.telegram_keepalive_expiry_seconds,
+    )
+    return httpx.AsyncClient(http2=http2, limits=limits, timeout=_build_telegram_timeout("", {}))
+
+
+def get_telegram_client() -> httpx.AsyncClient:
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to the loop that opened them: scripts and tests running
+    # their own loop get their own client instead of someone else's sockets.
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client, _http_client_loop = _build_http_client(), loop
+        logger.info("telegram.http_client open http2=%s max_connections=%s", settings.telegram_http2, settings.telegram_max_connections)
+    return _http_client
+
+
+async def start_telegram_client() -> None:
+    get_telegram_client()
+
+
+async def close_telegram_client() -> None:
+    global _http_client, _http_client_loop
+    client, _http_client, _http_client_loop = _http_client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("telegram.http_client closed")
+
+
 def _build_telegram_timeout(method: str, payload: dict[str, Any], timeout_override: httpx.Timeout | None = None) -> httpx.Timeout:
     if timeout_override is not None:
         return timeout_override
@@ -112,22 +169,52 @@ def _build_telegram_timeout(method: str, payload: dict[str, Any], timeout_overri
     return httpx.Timeout(connect=10.0, read=read_timeout, write=10.0, pool=10.0)
 
 
-async def _telegram_api(method: str, payload: dict[str, Any], timeout_override: httpx.Timeout | None = None) -> dict[str, Any]:
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        value = (response.json().get("parameters") or {}).get("retry_after")
+    except (ValueError, AttributeError):
+        return None
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _check_breaker(method: str) -> None:
+    # With the Bot API down, fail at once instead of paying connect timeouts and retries;
+    # outbox messages stay queued until the breaker lets a probe through.
+    if not telegram_breaker.allow():
+        logger.warning("Telegram API circuit open: method=%s retry_in=%.1fs", method, telegram_breaker.retry_in())
+        raise TelegramUnavailableError("Telegram API circuit is open")
+
+
+def _record_response(response: httpx.Response) -> None:
+    if response.status_code >= 500:
+        telegram_breaker.record_failure()
+    else:
+        telegram_breaker.record_success()
+
+
+async def _telegram_api(
+    method: str,
+    payload: dict[str, Any],
+    timeout_override: httpx.Timeout | None = None,
+    priority: int = PRIORITY_NORMAL,
+) -> dict[str, Any]:
     token = settings.telegram_bot_token
     if not token:
         raise TelegramError("TELEGRAM_BOT_TOKEN is not set")
 
     timeout = _build_telegram_timeout(method=method, payload=payload, timeout_override=timeout_override)
     retries = 2
+    scheduled = method in RATE_LIMITED_METHODS and send_scheduler.enabled
+    chat_id = payload.get("chat_id")
 
     for attempt in range(1, retries + 2):
+        _check_breaker(method)
+        if scheduled:
+            await send_scheduler.acquire(chat_id, priority)
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    f"https://api.telegram.org/bot{token}/{method}",
-                    json=payload,
-                )
+            response = await get_telegram_client().post(telegram_api_url(f"bot{token}/{method}"), json=payload, timeout=timeout)
         except httpx.HTTPError as exc:
+            telegram_breaker.record_failure()
             if attempt > retries:
                 logger.warning("Telegram API request failed: method=%s attempt=%s error=%s", method, attempt, exc.__class__.__name__)
                 raise TelegramError("Telegram API request failed") from exc
@@ -135,8 +222,18 @@ async def _telegram_api(method: str, payload: dict[str, Any], timeout_override:
             await asyncio.sleep(0.4 * attempt)
             continue
 
+        _record_response(response)
         short_text = _short_response_text(response.text)
 
+        retry_after = _retry_after(response) if response.status_code == 429 else None
+        if retry_after is not None and attempt <= retries:
+            logger.warning("Telegram API rate limited: method=%s attempt=%s chat_id=%s retry_after=%s", method, attempt, chat_id, retry_after)
+            if scheduled:
+                send_scheduler.throttle(chat_id, retry_after)
+            else:
+                await asyncio.sleep(retry_after)
+            continue
+
         if response.status_code in {429, 500, 502, 503, 504} and attempt <= retries:
             logger.warning(
                 "Telegram API temporary status: method=%s attempt=%s status=%s body=%s",
@@ -179,20 +276,26 @@ async def _telegram_api_multipart(
     data: dict[str, Any],
     files: dict[str, tuple[str, bytes, str]],
     timeout_seconds: float = 120.0,
+    priority: int = PRIORITY_LOW,
 ) -> dict[str, Any]:
     token = settings.telegram_bot_token
     if not token:
         raise TelegramError("TELEGRAM_BOT_TOKEN is not set")
 
     timeout = httpx.Timeout(connect=10.0, read=timeout_seconds, write=timeout_seconds, pool=10.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(
-            f"https://api.telegram.org/bot{token}/{method}",
-            data=data,
-            files=files,
-        )
+    _check_breaker(method)
+    await send_scheduler.acquire(data.get("chat_id"), priority)
+    try:
+        response = await get_telegram_client().post(telegram_api_url(f"bot{token}/{method}"), data=data, files=files, timeout=timeout)
+    except httpx.HTTPError:
+        telegram_breaker.record_failure()
+        raise
+    _record_response(response)
 
     short_text = _short_response_text(response.text)
+    retry_after = _retry_after(response) if response.status_code == 429 else None
+    if retry_after is not None:
+        send_scheduler.throttle(data.get("chat_id"), retry_after)
     if response.status_code >= 400:
         logger.warning("Telegram multipart API status=%s method=%s body=%s", response.status_code, method, short_text)
         raise TelegramError(f"Telegram API HTTP {response.status_code}: {short_text}")
@@ -239,13 +342,14 @@ async def send_message(
     text: str,
     reply_markup: dict[str, Any] | None = None,
     thread_id: int | None = None,
+    priority: int = PRIORITY_NORMAL,
 ) -> dict[str, Any]:
     payload: dict[str, Any] = {"chat_id": chat_id, "text": text}
     if reply_markup is not None:
         payload["reply_markup"] = reply_markup
     if thread_id is not None:
         payload["message_thread_id"] = thread_id
-    return await _telegram_api("sendMessage", payload)
+    return await _telegram_api("sendMessage", payload, priority=priority)
 
 
 async def edit_message_text(
@@ -253,6 +357,7 @@ async def edit_message_text(
     message_id: int,
     text: str,
     reply_markup: dict[str, Any] | None = None,
+    priority: int = PRIORITY_NORMAL,
 ) -> dict[str, Any]:
     payload: dict[str, Any] = {
         "chat_id": chat_id,
@@ -261,7 +366,7 @@ async def edit_message_text(
     }
     if reply_markup is not None:
         payload["reply_markup"] = reply_markup
-    return await _telegram_api("editMessageText", payload)
+    return await _telegram_api("editMessageText", payload, priority=priority)
 
 
 async def send_document(chat_id: int | str, file_path: str, caption: str | None = None) -> dict[str, Any]:
@@ -292,6 +397,10 @@ async def build_booking_notification_payload(db: AsyncSession, booking: Booking)
     if master is None and booking.master_id is not None:
         master = (await db.execute(select(Master).where(Master.id == booking.master_id))).scalar_one_or_none()
 
+    return booking_notification_payload(booking, service, master)
+
+
+def booking_notification_payload(booking: Booking, service: Service | None, master: Master | None) -> dict[str, Any]:
     return {
         "booking_id": booking.id,
         "service_id": booking.service_id,
@@ -307,36 +416,31 @@ async def build_booking_notification_payload(db: AsyncSession, booking: Booking)
     }
 
 
-async def send_booking_created_to_admin(db: AsyncSession, booking_id: int) -> None:
-    logger.info("tg_notify.booking_created start booking_id=%s", booking_id)
+async def load_booking_for_notification(db: AsyncSession, booking_id: int) -> Booking | None:
+    result = await db.execute(select(Booking).where(Booking.id == booking_id).options(selectinload(Booking.service), selectinload(Booking.master)))
+    return result.scalar_one_or_none()
+
+
+async def send_booking_created_to_admin(booking: Booking, tg_settings: TgNotificationsSettings) -> bool:
+    # Delivery errors propagate: the outbox worker decides whether to retry. No DB access
+    # here: the booking comes with service and master loaded, and the caller persists
+    # the tg_new_sent_at set on success.
+    logger.info("tg_notify.booking_created start booking_id=%s", booking.id)
 
-    tg_settings = await get_tg_notifications_settings(db)
     if not tg_settings.enabled:
-        logger.info("tg_notify.booking_created skip reason=disabled booking_id=%s", booking_id)
-        return
+        logger.info("tg_notify.booking_created skip reason=disabled booking_id=%s", booking.id)
+        return False
     if not settings.telegram_bot_token:
-        logger.warning("tg_notify.booking_created skip reason=no_token booking_id=%s", booking_id)
-        return
+        logger.warning("tg_notify.booking_created skip reason=no_token booking_id=%s", booking.id)
+        return False
     if not tg_settings.admin_chat_id:
-        logger.warning("tg_notify.booking_created skip reason=no_admin_chat_id booking_id=%s", booking_id)
-        return
-
-    booking = (
-        await db.execute(
-            select(Booking)
-            .where(Booking.id == booking_id)
-            .with_for_update()
-            .options(selectinload(Booking.service), selectinload(Booking.master))
-        )
-    ).scalar_one_or_none()
-    if not booking:
-        logger.warning("tg_notify.booking_created skip reason=booking_not_found booking_id=%s", booking_id)
-        return
+        logger.warning("tg_notify.booking_created skip reason=no_admin_chat_id booking_id=%s", booking.id)
+        return False
     if booking.tg_new_sent_at is not None:
-        logger.info("tg_notify.booking_created skip reason=already_sent booking_id=%s tg_new_sent_at=%s", booking_id, booking.tg_new_sent_at.isoformat())
-        return
+        logger.info("tg_notify.booking_created skip reason=already_sent booking_id=%s tg_new_sent_at=%s", booking.id, booking.tg_new_sent_at.isoformat())
+        return False
 
-    payload = await build_booking_notification_payload(db, booking)
+    payload = booking_notification_payload(booking, booking.service, booking.master)
     text = booking_admin_text(
         payload,
         template=tg_settings.template_booking_created or tg_settings.template_admin,
@@ -344,30 +448,82 @@ async def send_booking_created_to_admin(db: AsyncSession, booking_id: int) -> No
     )
     reply_markup = build_admin_inline_keyboard(booking.id) if tg_settings.send_inline_actions else None
 
-    try:
-        result = await send_message(
-            chat_id=tg_settings.admin_chat_id,
-            text=text,
-            reply_markup=reply_markup,
-            thread_id=tg_settings.thread_id,
-        )
-    except TelegramError:
-        logger.exception("tg_notify.booking_created failed booking_id=%s", booking_id)
-        return
-    except Exception:
-        logger.exception("tg_notify.booking_created failed reason=exception booking_id=%s", booking_id)
-        return
+    result = await send_message(
+        chat_id=tg_settings.admin_chat_id,
+        text=text,
+        reply_markup=reply_markup,
+        thread_id=tg_settings.thread_id,
+        priority=PRIORITY_HIGH,
+    )
 
     message_id = ((result or {}).get("result") or {}).get("message_id")
     booking.tg_new_sent_at = datetime.now(timezone.utc)
-    await db.flush()
-    logger.info("tg_notify.booking_created sent booking_id=%s message_id=%s", booking_id, message_id)
+    logger.info("tg_notify.booking_created sent booking_id=%s message_id=%s", booking.id, message_id)
+    return True
+
+
+def _booking_digest_line(booking: Booking) -> str:
+    service_title = booking.service.title if booking.service else f"ID {booking.service_id}"
+    return f"#{booking.id} · {booking_time_human(booking.starts_at)} · {service_title} · {booking.client_name} ({booking.client_phone})"
+
+
+async def send_booking_digest_to_admin(bookings: list[Booking], tg_settings: TgNotificationsSettings) -> bool:
+    # One admin message for several new bookings; each button opens the usual booking card.
+    # Like send_booking_created_to_admin it only sets tg_new_sent_at; the caller persists it.
+    pending = [booking for booking in bookings if booking.tg_new_sent_at is None]
+    if len(pending) <= 1:
+        return await send_booking_created_to_admin(pending[0], tg_settings) if pending else False
+
+    booking_ids = [booking.id for booking in pending]
+    if not tg_settings.enabled:
+        logger.info("tg_notify.booking_digest skip reason=disabled booking_ids=%s", booking_ids)
+        return False
+    if not settings.telegram_bot_token:
+        logger.warning("tg_notify.booking_digest skip reason=no_token booking_ids=%s", booking_ids)
+        return False
+    if not tg_settings.admin_chat_id:
+        logger.warning("tg_notify.booking_digest skip reason=no_admin_chat_id booking_ids=%s", booking_ids)
+        return False
+
+    text = "\n".join([f"🆕 Новые записи: {len(pending)}", *(_booking_digest_line(booking) for booking in pending)])
+    reply_markup = None
+    if tg_settings.send_inline_actions:
+        reply_markup = {
+            "inline_keyboard": [
+                [{"text": f"#{booking.id} · {booking_time_human(booking.starts_at)}", "callback_data": callback_data("open", booking.id)}]
+                for booking in pending
+            ]
+        }
+
+    result = await send_message(
+        chat_id=tg_settings.admin_chat_id,
+        text=text,
+        reply_markup=reply_markup,
+        thread_id=tg_settings.thread_id,
+        priority=PRIORITY_HIGH,
+    )
+
+    message_id = ((result or {}).get("result") or {}).get("message_id")
+    sent_at = datetime.now(timezone.utc)
+    for booking in pending:
+        booking.tg_new_sent_at = sent_at
+    logger.info("tg_notify.booking_digest sent booking_ids=%s message_id=%s", booking_ids, message_id)
+    return True
 
 
 async def send_booking_notification(db: AsyncSession, payload: dict[str, Any]) -> None:
     booking_id = payload.get("booking_id")
-    if isinstance(booking_id, int):
-        await send_booking_created_to_admin(db, booking_id)
+    if not isinstance(booking_id, int):
+        return
+    booking = await load_booking_for_notification(db, booking_id)
+    if not booking:
+        logger.warning("tg_notify.booking_created skip reason=booking_not_found booking_id=%s", booking_id)
+        return
+    try:
+        if await send_booking_created_to_admin(booking, await get_tg_notifications_settings(db)):
+            await db.flush()
+    except Exception:  # noqa: BLE001
+        logger.exception("tg_notify.booking_created failed booking_id=%s", booking_id)
 
 
 async def send_master_booking_notification(db: AsyncSession, booking_id: int) -> bool:
@@ -393,7 +549,7 @@ async def send_master_booking_notification(db: AsyncSession, booking_id: int) ->
     text = booking_admin_text(payload, tg_settings.template_booking_assigned_master or DEFAULT_MASTER_TEMPLATE)
 
     try:
-        result = await send_message(chat_id=booking.master.telegram_chat_id, text=text)
+        result = await send_message(chat_id=booking.master.telegram_chat_id, text=text, priority=PRIORITY_HIGH)
     except Exception:
         logger.exception("tg_notify.booking_master failed booking_id=%s master_id=%s", booking_id, booking.master.id)
         return False
@@ -414,13 +570,11 @@ def _master_booking_human_fields(booking: Booking) -> dict[str, str]:
     }
 
 
-async def send_master_booking_confirmed(db: AsyncSession, booking: Booking) -> bool:
+async def send_master_booking_confirmed(booking: Booking) -> bool:
     master = booking.master
     if booking.master_id is None:
         logger.info("tg_notify.master_confirmed skip reason=no_master booking_id=%s", booking.id)
         return False
-    if master is None:
-        master = (await db.execute(select(Master).where(Master.id == booking.master_id))).scalar_one_or_none()
     if not master:
         logger.warning("tg_notify.master_confirmed skip reason=master_not_found booking_id=%s master_id=%s", booking.id, booking.master_id)
         return False
@@ -439,24 +593,18 @@ async def send_master_booking_confirmed(db: AsyncSession, booking: Booking) -> b
         f"Клиент: {payload['client_name']} ({payload['client_phone']})\n"
         f"Комментарий: {payload['comment']}"
     )
-    try:
-        result = await send_message(chat_id=master.telegram_chat_id, text=text)
-    except Exception:
-        logger.exception("tg_notify.master_confirmed fail booking_id=%s master_id=%s", booking.id, master.id)
-        return False
+    result = await send_message(chat_id=master.telegram_chat_id, text=text, priority=PRIORITY_HIGH)
 
     message_id = ((result or {}).get("result") or {}).get("message_id")
     logger.info("tg_notify.master_confirmed sent booking_id=%s master_id=%s message_id=%s", booking.id, master.id, message_id)
     return True
 
 
-async def send_master_booking_rescheduled(db: AsyncSession, booking: Booking, old_starts_at: datetime) -> bool:
+async def send_master_booking_rescheduled(booking: Booking, old_starts_at: datetime) -> bool:
     master = booking.master
     if booking.master_id is None:
         logger.info("tg_notify.master_rescheduled skip reason=no_master booking_id=%s", booking.id)
         return False
-    if master is None:
-        master = (await db.execute(select(Master).where(Master.id == booking.master_id))).scalar_one_or_none()
     if not master:
         logger.warning("tg_notify.master_rescheduled skip reason=master_not_found booking_id=%s master_id=%s", booking.id, booking.master_id)
         return False
@@ -476,11 +624,7 @@ async def send_master_booking_rescheduled(db: AsyncSession, booking: Booking, ol
         f"Клиент: {payload['client_name']} ({payload['client_phone']})\n"
         f"Комментарий: {payload['comment']}"
     )
-    try:
-        result = await send_message(chat_id=master.telegram_chat_id, text=text)
-    except Exception:
-        logger.exception("tg_notify.master_rescheduled fail booking_id=%s master_id=%s", booking.id, master.id)
-        return False
+    result = await send_message(chat_id=master.telegram_chat_id, text=text, priority=PRIORITY_HIGH)
 
     message_id = ((result or {}).get("result") or {}).get("message_id")
     logger.info("tg_notify.master_rescheduled sent booking_id=%s master_id=%s message_id=%s", booking.id, master.id, message_id)
@@ -488,7 +632,7 @@ async def send_master_booking_rescheduled(db: AsyncSession, booking: Booking, ol
 
 
 def callback_data(action: str, booking_id: int, master_id: int | None = None) -> str:
-    if action in {"confirm", "cancel", "choose"}:
+    if action in {"confirm", "cancel", "choose", "open"}:
         return f"b:{booking_id}:{action}"
     if action == "assign" and master_id is not None:
         return f"b:{booking_id}:assign:{master_id}"
@@ -505,7 +649,7 @@ def parse_callback_data(value: str) -> dict[str, int | str] | None:
         return None
 
     action = parts[2]
-    if action in {"confirm", "cancel", "choose"} and len(parts) == 3:
+    if action in {"confirm", "cancel", "choose", "open"} and len(parts) == 3:
         return {"booking_id": booking_id, "action": action}
     if action == "assign" and len(parts) == 4:
         try:
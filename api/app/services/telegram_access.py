@@ -0,0 +1,101 @@
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import run_after_commit
+from app.models import AdminRole, Master
+from app.services.access import resolve_telegram_role
+from app.services.events import event_bus
+from app.services.settings_cache import settings_cache
+
+TELEGRAM_ACCESS_CHANNEL = "telegram_access_changed"
+
+
+@dataclass(frozen=True, slots=True)
+class TelegramAccess:
+    admin_role: AdminRole | None
+    master_id: int | None
+
+
+class TelegramAccessCache:
+    # Role and linked master per Telegram user, denied users included. Roles come from
+    # settings, so every entry remembers the settings cache generation it was built under
+    # and is dropped as soon as any setting changes.
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: dict[int, tuple[float, tuple[int, int], TelegramAccess]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> tuple[int, int]:
+        return self._generation, settings_cache.generation
+
+    def lookup(self, tg_user_id: int, now: float | None = None) -> TelegramAccess | None:
+        if now is None:
+            now = time.monotonic()
+        entry = self._entries.get(tg_user_id)
+        if entry is None or entry[0] <= now or entry[1] != self.generation:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def store(self, tg_user_id: int, access: TelegramAccess, generation: tuple[int, int], now: float | None = None) -> None:
+        if generation != self.generation or self.ttl_seconds <= 0:
+            return
+        if now is None:
+            now = time.monotonic()
+        self._entries.pop(tg_user_id, None)
+        self._entries[tg_user_id] = (now + self.ttl_seconds, generation, access)
+        if len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, _payload: str | None = None) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+async def resolve_telegram_access(db: AsyncSession, tg_user_id: int) -> TelegramAccess:
+    cached = telegram_access_cache.lookup(tg_user_id)
+    if cached is not None:
+        return cached
+    generation = telegram_access_cache.generation
+    admin_role = await resolve_telegram_role(db, tg_user_id)
+    master_id = (await db.execute(select(Master.id).where(Master.telegram_user_id == tg_user_id))).scalar_one_or_none()
+    access = TelegramAccess(admin_role=admin_role, master_id=master_id)
+    telegram_access_cache.store(tg_user_id, access, generation)
+    return access
+
+
+async def publish_telegram_access_change(db: AsyncSession) -> None:
+    # Called when a master's Telegram link changes.
+    telegram_access_cache.invalidate()
+    run_after_commit(db, telegram_access_cache.invalidate)
+    await event_bus.publish(db, TELEGRAM_ACCESS_CHANNEL)
+
+
+telegram_access_cache = TelegramAccessCache(
+    ttl_seconds=settings.telegram_access_cache_ttl_seconds,
+    max_entries=settings.telegram_access_cache_max_entries,
+)
+event_bus.subscribe(TELEGRAM_ACCESS_CHANNEL, telegram_access_cache.invalidate)
@@ -0,0 +1,112 @@
+import time
+from collections import deque
+
+from app.core.config import settings
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    # Trips when the share of failed Bot API calls in the recent window crosses the
+    # threshold. While open every call is refused at once; after open_seconds a single
+    # probe is let through and its outcome closes the breaker or opens it again.
+
+    def __init__(self, enabled: bool, window_seconds: float, min_calls: int, failure_ratio: float, open_seconds: float) -> None:
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self.min_calls = max(1, min_calls)
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.state = BREAKER_CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._failures = 0
+        self._retry_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def retry_in(self, now: float | None = None) -> float:
+        if self.state == BREAKER_CLOSED:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        return max(0.0, self._retry_at - now)
+
+    def is_open(self, now: float | None = None) -> bool:
+        return self.enabled and self.state != BREAKER_CLOSED and self.retry_in(now) > 0
+
+    def allow(self, now: float | None = None) -> bool:
+        if not self.enabled or self.state == BREAKER_CLOSED:
+            return True
+        if now is None:
+            now = time.monotonic()
+        if now < self._retry_at:
+            self.rejected += 1
+            return False
+        # One probe per open_seconds; a probe that never reports back cannot wedge the breaker.
+        self.state = BREAKER_HALF_OPEN
+        self._retry_at = now + self.open_seconds
+        return True
+
+    def record_success(self, now: float | None = None) -> None:
+        if not self.enabled:
+            return
+        if now is None:
+            now = time.monotonic()
+        if self.state != BREAKER_CLOSED:
+            self.state = BREAKER_CLOSED
+            self._outcomes.clear()
+            self._failures = 0
+        self._record(now, False)
+
+    def record_failure(self, now: float | None = None) -> None:
+        if not self.enabled:
+            return
+        if now is None:
+            now = time.monotonic()
+        if self.state == BREAKER_HALF_OPEN:
+            self._open(now)
+            return
+        self._record(now, True)
+        if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_ratio:
+            self._open(now)
+
+    def _record(self, now: float, failed: bool) -> None:
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        self._trim(now)
+
+    def _open(self, now: float) -> None:
+        self.state = BREAKER_OPEN
+        self._retry_at = now + self.open_seconds
+        self.opened += 1
+
+    def stats(self) -> dict[str, object]:
+        now = time.monotonic()
+        self._trim(now)
+        calls = len(self._outcomes)
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "retry_in_seconds": round(self.retry_in(now), 1),
+            "window_calls": calls,
+            "window_failure_ratio": round(self._failures / calls, 4) if calls else None,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+telegram_breaker = CircuitBreaker(
+    enabled=settings.telegram_breaker_enabled,
+    window_seconds=settings.telegram_breaker_window_seconds,
+    min_calls=settings.telegram_breaker_min_calls,
+    failure_ratio=settings.telegram_breaker_failure_ratio,
+    open_seconds=settings.telegram_breaker_open_seconds,
+)
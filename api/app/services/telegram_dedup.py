@@ -0,0 +1,110 @@
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import TelegramProcessedUpdate
+
+logger = logging.getLogger(__name__)
+
+DEDUP_BACKEND_MEMORY = "memory"
+DEDUP_BACKEND_POSTGRES = "postgres"
+# telegram_processed_updates also keeps master_agenda:<day> claims; the TTL purge only
+# touches the keys this module writes.
+DEDUP_KEY_PREFIXES = ("update:", "callback:")
+
+
+class TtlDedup:
+    # Keys are kept in first-seen order, so expired ones are always at the front and each
+    # check only pops what actually expired. The size cap evicts the oldest key first.
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._seen: OrderedDict[Hashable, float] = OrderedDict()
+        self.duplicates = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def seen(self, key: Hashable, now: float | None = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.ttl_seconds
+        while self._seen:
+            oldest_key, oldest_ts = next(iter(self._seen.items()))
+            if oldest_ts >= cutoff:
+                break
+            del self._seen[oldest_key]
+        if key in self._seen:
+            self.duplicates += 1
+            return True
+        self._seen[key] = now
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+            self.evicted += 1
+        return False
+
+
+class TelegramDedup:
+    # The in-process store answers most duplicates without a query. With the postgres
+    # backend the key is also claimed in telegram_processed_updates inside the update's
+    # own transaction, so other workers and restarts see it once that commits.
+
+    def __init__(self, backend: str, ttl_seconds: int, max_entries: int) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.local = TtlDedup(ttl_seconds, max_entries)
+        self.shared_duplicates = 0
+        self._last_purge = 0.0
+
+    async def seen(self, db: AsyncSession | None, key: str) -> bool:
+        if self.local.seen(key):
+            return True
+        if self.backend != DEDUP_BACKEND_POSTGRES or db is None:
+            return False
+        if await self._claim(db, key):
+            return False
+        self.shared_duplicates += 1
+        return True
+
+    async def _claim(self, db: AsyncSession, key: str) -> bool:
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=self.ttl_seconds)
+        statement = insert(TelegramProcessedUpdate).values(key=key, seen_at=func.now())
+        # An expired row is reclaimed in place instead of counting as a duplicate.
+        statement = statement.on_conflict_do_update(
+            index_elements=[TelegramProcessedUpdate.key],
+            set_={"seen_at": func.now()},
+            where=TelegramProcessedUpdate.seen_at < cutoff,
+        ).returning(TelegramProcessedUpdate.key)
+        claimed = (await db.execute(statement)).scalar_one_or_none() is not None
+        if time.monotonic() - self._last_purge >= self.ttl_seconds:
+            self._last_purge = time.monotonic()
+            result = await db.execute(
+                delete(TelegramProcessedUpdate).where(
+                    TelegramProcessedUpdate.seen_at < cutoff,
+                    or_(*(TelegramProcessedUpdate.key.startswith(prefix) for prefix in DEDUP_KEY_PREFIXES)),
+                )
+            )
+            if result.rowcount:
+                logger.info("tg_dedup.purged rows=%s", result.rowcount)
+        return claimed
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "backend": self.backend,
+            "entries": len(self.local),
+            "duplicates": self.local.duplicates + self.shared_duplicates,
+            "evicted": self.local.evicted,
+        }
+
+
+telegram_dedup = TelegramDedup(settings.telegram_dedup_backend, settings.telegram_dedup_ttl_seconds, settings.telegram_dedup_max_entries)
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app import db as db_module
+from app.core.config import settings
+from app.db import run_after_commit
+from app.models import Booking, BookingStatus, TelegramOutbox
+from app.schemas import TgNotificationsSettings
+from app.services.telegram import (
+    TelegramError,
+    TelegramUnavailableError,
+    get_tg_notifications_settings,
+    load_booking_for_notification,
+    send_booking_created_to_admin,
+    send_booking_digest_to_admin,
+    send_master_booking_confirmed,
+    send_master_booking_rescheduled,
+    send_message,
+)
+from app.services.telegram_breaker import telegram_breaker
+from app.services.telegram_scheduler import PRIORITY_LOW
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BOOKING_CREATED = "booking_created"
+OUTBOX_MASTER_CONFIRMED = "master_confirmed"
+OUTBOX_MASTER_RESCHEDULED = "master_rescheduled"
+OUTBOX_MASTER_AGENDA = "master_agenda"
+OUTBOX_PENDING = "pending"
+OUTBOX_FAILED = "failed"
+OUTBOX_RETRY_BASE_SECONDS = 2.0
+OUTBOX_RETRY_MAX_SECONDS = 600.0
+# Telegram answers these for chats that are gone or ids that are wrong; retrying will not help.
+PERMANENT_STATUS_CODES = {400, 403}
+
+_wakeup = asyncio.Event()
+_stats = {"delivered": 0, "skipped": 0, "retried": 0, "deferred": 0, "coalesced": 0, "failed": 0}
+# End of the current new-booking digest window per admin chat.
+_digest_windows: dict[str, datetime] = {}
+
+
+async def enqueue_telegram_message(db: AsyncSession, kind: str, booking_id: int | None, payload: dict[str, Any] | None = None) -> None:
+    db.add(TelegramOutbox(kind=kind, booking_id=booking_id, payload=payload or {}, status=OUTBOX_PENDING, attempts=0))
+    run_after_commit(db, _wakeup.set)
+
+
+def outbox_stats() -> dict[str, int]:
+    return dict(_stats)
+
+
+async def wait_for_outbox(timeout: float) -> None:
+    try:
+        await asyncio.wait_for(_wakeup.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+    _wakeup.clear()
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS))
+
+
+async def _claim_batch(now: datetime) -> list[tuple[int, str, int | None, dict[str, Any], int]]:
+    # The lease moves next_attempt_at forward, so other workers skip claimed rows while
+    # _deliver sends them outside of any transaction.
+    async with db_module.AsyncSessionLocal() as db:
+        async with db.begin():
+            due = (
+                select(TelegramOutbox.id)
+                .where(TelegramOutbox.status == OUTBOX_PENDING, TelegramOutbox.next_attempt_at <= now)
+                .order_by(TelegramOutbox.id)
+                .limit(settings.telegram_outbox_batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                update(TelegramOutbox)
+                .where(TelegramOutbox.id.in_(due.scalar_subquery()))
+                .values(next_attempt_at=now + timedelta(seconds=settings.telegram_outbox_lease_seconds), attempts=TelegramOutbox.attempts + 1)
+                .returning(TelegramOutbox.id, TelegramOutbox.kind, TelegramOutbox.booking_id, TelegramOutbox.payload, TelegramOutbox.attempts)
+            )
+            return sorted(result.all())
+
+
+async def _send(kind: str, booking: Booking | None, payload: dict[str, Any], tg_settings: TgNotificationsSettings) -> bool:
+    if kind == OUTBOX_MASTER_AGENDA:
+        # Not tied to one booking: the payload carries the finished message.
+        await send_message(chat_id=payload["chat_id"], text=payload["text"], priority=PRIORITY_LOW)
+        return True
+    if booking is None:
+        return False
+    if kind == OUTBOX_BOOKING_CREATED:
+        return await send_booking_created_to_admin(booking, tg_settings)
+    if kind == OUTBOX_MASTER_CONFIRMED:
+        if booking.status != BookingStatus.confirmed:
+            return False
+        return await send_master_booking_confirmed(booking)
+    if kind == OUTBOX_MASTER_RESCHEDULED:
+        return await send_master_booking_rescheduled(booking, datetime.fromisoformat(payload["old_starts_at"]))
+    logger.warning("tg_outbox.unknown_kind kind=%s", kind)
+    return False
+
+
+async def _deliver(outbox_id: int, kind: str, booking_id: int | None, payload: dict[str, Any]) -> bool:
+    # Load, send, record: the Bot API round trip (retries and scheduler waits included)
+    # runs with no session open, so it holds neither a pooled connection nor a transaction.
+    async with db_module.AsyncSessionLocal() as db:
+        async with db.begin():
+            booking = await load_booking_for_notification(db, booking_id) if booking_id is not None else None
+            tg_settings = await get_tg_notifications_settings(db)
+
+    unsent = booking is not None and booking.tg_new_sent_at is None
+    sent = await _send(kind, booking, payload, tg_settings)
+
+    async with db_module.AsyncSessionLocal() as db:
+        async with db.begin():
+            if sent and unsent and booking.tg_new_sent_at is not None:
+                await db.execute(update(Booking).where(Booking.id == booking.id).values(tg_new_sent_at=booking.tg_new_sent_at))
+            await db.execute(delete(TelegramOutbox).where(TelegramOutbox.id == outbox_id))
+    return sent
+
+
+async def _postpone(outbox_ids: list[int], retry_at: datetime) -> None:
+    # The rows were not sent for reasons of our own (open breaker, digest window), so the
+    # attempt taken by the claim is handed back.
+    async with db_module.AsyncSessionLocal() as db:
+        async with db.begin():
+            await db.execute(
+                update(TelegramOutbox)
+                .where(TelegramOutbox.id.in_(outbox_ids))
+                .values(next_attempt_at=retry_at, attempts=TelegramOutbox.attempts - 1)
+            )
+
+
+async def _defer(outbox_ids: list[int], now: datetime) -> None:
+    await _postpone(outbox_ids, now + timedelta(seconds=max(1.0, telegram_breaker.retry_in())))
+    _stats["deferred"] += len(outbox_ids)
+
+
+async def _record_failure(outbox_id: int, attempts: int, exc: Exception, now: datetime) -> None:
+    permanent = isinstance(exc, TelegramError) and exc.status_code in PERMANENT_STATUS_CODES
+    exhausted = permanent or attempts >= settings.telegram_outbox_max_attempts
+    values: dict[str, Any] = {"last_error": str(exc)[:1000] or exc.__class__.__name__}
+    if exhausted:
+        values["status"] = OUTBOX_FAILED
+    else:
+        values["next_attempt_at"] = now + _retry_delay(attempts)
+    async with db_module.AsyncSessionLocal() as db:
+        async with db.begin():
+            await db.execute(update(TelegramOutbox).where(TelegramOutbox.id == outbox_id).values(**values))
+    _stats["failed" if exhausted else "retried"] += 1
+    log = logger.error if exhausted else logger.warning
+    log("tg_outbox.delivery_failed outbox_id=%s attempts=%s final=%s error=%s", outbox_id, attempts, exhausted, values["last_error"])
+
+
+async def _digest_window() -> tuple[str, int] | None:
+    async with db_module.AsyncSessionLocal() as db:
+        tg_settings = await get_tg_notifications_settings(db)
+    if not tg_settings.new_booking_digest_seconds or not tg_settings.admin_chat_id:
+        return None
+    return f"{tg_settings.admin_chat_id}:{tg_settings.thread_id or ''}", tg_settings.new_booking_digest_seconds
+
+
+async def _deliver_digest(rows: list[tuple[int, str, int | None, dict[str, Any], int]]) -> None:
+    # Same three steps as _deliver: load and commit, send with no session open, then mark
+    # the bookings and drop the rows in one short transaction.
+    outbox_ids = [row[0] for row in rows]
+    try:
+        async with db_module.AsyncSessionLocal() as db:
+            async with db.begin():
+                bookings = list(
+                    (
+                        await db.execute(
+                            select(Booking)
+                            .where(Booking.id.in_([row[2] for row in rows if row[2] is not None]))
+                            .options(selectinload(Booking.service), selectinload(Booking.master))
+                            .order_by(Booking.id)
+                        )
+                    ).scalars().all()
+                )
+                tg_settings = await get_tg_notifications_settings(db)
+
+        unsent = [booking for booking in bookings if booking.tg_new_sent_at is None]
+        sent = await send_booking_digest_to_admin(bookings, tg_settings)
+        marked = [booking for booking in unsent if booking.tg_new_sent_at is not None]
+
+        async with db_module.AsyncSessionLocal() as db:
+            async with db.begin():
+                if sent and marked:
+                    await db.execute(
+                        update(Booking)
+                        .where(Booking.id.in_([booking.id for booking in marked]))
+                        .values(tg_new_sent_at=marked[0].tg_new_sent_at)
+                    )
+                await db.execute(delete(TelegramOutbox).where(TelegramOutbox.id.in_(outbox_ids)))
+    except asyncio.CancelledError:
+        raise
+    except TelegramUnavailableError:
+        await _defer(outbox_ids, datetime.now(timezone.utc))
+    except Exception as exc:  # noqa: BLE001
+        for outbox_id, _, _, _, attempts in rows:
+            await _record_failure(outbox_id, attempts, exc, datetime.now(timezone.utc))
+    else:
+        _stats["delivered" if sent else "skipped"] += len(rows)
+        if len(rows) > 1:
+            _stats["coalesced"] += len(rows)
+        logger.info("tg_outbox.digest_done outbox_ids=%s sent=%s", outbox_ids, sent)
+
+
+async def deliver_telegram_outbox() -> int:
+    if telegram_breaker.is_open():
+        return 0
+    now = datetime.now(timezone.utc)
+    claimed = await _claim_batch(now)
+    processed = len(claimed)
+    created = [row for row in claimed if row[1] == OUTBOX_BOOKING_CREATED]
+    if created and (window := await _digest_window()):
+        chat_key, window_seconds = window
+        claimed = [row for row in claimed if row[1] != OUTBOX_BOOKING_CREATED]
+        window_until = _digest_windows.get(chat_key)
+        if window_until is not None and now < window_until:
+            # The chat got a new-booking message moments ago: collect until the window closes.
+            await _postpone([row[0] for row in created], window_until)
+            asyncio.get_running_loop().call_later((window_until - now).total_seconds(), _wakeup.set)
+        else:
+            # Nothing went out recently, so whatever is due is sent at once and opens the window.
+            _digest_windows[chat_key] = now + timedelta(seconds=window_seconds)
+            await _deliver_digest(created)
+
+    for outbox_id, kind, booking_id, payload, attempts in claimed:
+        try:
+            sent = await _deliver(outbox_id, kind, booking_id, payload)
+        except asyncio.CancelledError:
+            raise
+        except TelegramUnavailableError:
+            await _defer([outbox_id], datetime.now(timezone.utc))
+        except Exception as exc:  # noqa: BLE001
+            await _record_failure(outbox_id, attempts, exc, datetime.now(timezone.utc))
+        else:
+            _stats["delivered" if sent else "skipped"] += 1
+            logger.info("tg_outbox.done outbox_id=%s kind=%s booking_id=%s sent=%s", outbox_id, kind, booking_id, sent)
+    return processed
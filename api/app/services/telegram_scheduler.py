@@ -0,0 +1,203 @@
+import asyncio
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+GLOBAL_KEY = "*"
+WAIT_SAMPLES = 500
+BUCKET_SWEEP_SECONDS = 60.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def ready_at(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return max(now, self.blocked_until)
+        return max(max(now, self.updated_at) + (1 - self.tokens) / self.rate, self.blocked_until)
+
+    def is_idle(self, now: float) -> bool:
+        # A full, unblocked bucket behaves exactly like a fresh one and can be dropped.
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until: float) -> None:
+        # Exactly one send is allowed when the ban ends; the burst refills from there.
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = min(self.tokens, 1.0)
+        self.updated_at = max(self.updated_at, until)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    chat_key: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class TelegramSendScheduler:
+    # Every rate-limited Bot API call waits here for a token from its chat bucket and from
+    # the global bucket. Waiters are granted in (priority, arrival) order, but a waiter
+    # whose chat is still throttled does not hold up other chats.
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._global: TokenBucket | None = None
+        self._chats: dict[str, TokenBucket] = {}
+        self._waiters: list[_Waiter] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._swept_at = 0.0
+        self._seq = itertools.count()
+        self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.granted = 0
+        self.throttled = 0
+        self.max_wait = 0.0
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Buckets and pending futures belong to one loop; a new loop starts clean.
+            self._loop = loop
+            self._global = None
+            self._chats.clear()
+            self._waiters.clear()
+            self._timer = None
+            self._swept_at = loop.time()
+        return loop
+
+    def _global_bucket(self, now: float) -> TokenBucket:
+        if self._global is None:
+            rate = settings.telegram_send_global_per_second
+            self._global = TokenBucket(rate, max(1.0, rate), now)
+        return self._global
+
+    def _chat_bucket(self, chat_key: str, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_key)
+        if bucket is None:
+            # Negative ids are groups and channels, which Telegram limits per minute.
+            if chat_key.startswith("-"):
+                rate = settings.telegram_send_group_per_minute / 60
+            else:
+                rate = settings.telegram_send_chat_per_second
+            bucket = self._chats[chat_key] = TokenBucket(rate, max(1.0, settings.telegram_send_chat_burst), now)
+        return bucket
+
+    async def acquire(self, chat_id: str | int | None, priority: int = PRIORITY_NORMAL) -> None:
+        if not self.enabled:
+            return
+        loop = self._bind_loop()
+        chat_key = str(chat_id) if chat_id is not None else GLOBAL_KEY
+        waiter = _Waiter(priority, next(self._seq), chat_key, loop.create_future(), loop.time())
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def throttle(self, chat_id: str | int | None, retry_after: float) -> None:
+        # Telegram's retry_after applies to the chat the request was for; without a chat
+        # the whole bot waits.
+        if not self.enabled:
+            return
+        loop = self._bind_loop()
+        now = loop.time()
+        until = now + retry_after
+        if chat_id is None:
+            self._global_bucket(now).block(until)
+        else:
+            self._chat_bucket(str(chat_id), now).block(until)
+        self.throttled += 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = loop.time()
+        global_bucket = self._global_bucket(now)
+        next_at: float | None = None
+        self._waiters.sort()
+        for waiter in list(self._waiters):
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+                continue
+            global_ready = global_bucket.ready_at(now)
+            if global_ready > now:
+                next_at = global_ready if next_at is None else min(next_at, global_ready)
+                break
+            chat_bucket = global_bucket if waiter.chat_key == GLOBAL_KEY else self._chat_bucket(waiter.chat_key, now)
+            chat_ready = chat_bucket.ready_at(now)
+            if chat_ready > now:
+                next_at = chat_ready if next_at is None else min(next_at, chat_ready)
+                continue
+            global_bucket.take(now)
+            if chat_bucket is not global_bucket:
+                chat_bucket.take(now)
+            self._waiters.remove(waiter)
+            self._record_wait(now - waiter.enqueued_at)
+            waiter.future.set_result(None)
+        if self._waiters and next_at is not None:
+            self._timer = loop.call_at(next_at, self._dispatch)
+        if now - self._swept_at >= BUCKET_SWEEP_SECONDS:
+            self._sweep_buckets(now)
+
+    def _sweep_buckets(self, now: float) -> None:
+        # One bucket per chat ever messaged would otherwise accumulate for the process lifetime.
+        self._swept_at = now
+        waiting = {waiter.chat_key for waiter in self._waiters}
+        for chat_key in [key for key, bucket in self._chats.items() if key not in waiting and bucket.is_idle(now)]:
+            del self._chats[chat_key]
+
+    def _record_wait(self, waited: float) -> None:
+        self.granted += 1
+        self._waits.append(waited)
+        self.max_wait = max(self.max_wait, waited)
+
+    def stats(self) -> dict[str, object]:
+        waits = sorted(self._waits)
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for waiter in self._waiters:
+            depth[PRIORITY_NAMES.get(waiter.priority, str(waiter.priority))] += 1
+        return {
+            "enabled": self.enabled,
+            "queue_depth": depth,
+            "chat_buckets": len(self._chats),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+            "wait_p95_ms": round(waits[max(0, int(len(waits) * 0.95) - 1)] * 1000, 1) if waits else 0.0,
+            "wait_max_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+send_scheduler = TelegramSendScheduler(enabled=settings.telegram_rate_limit_enabled)
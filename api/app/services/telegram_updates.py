@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UpdateHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+def update_chat_key(update: dict[str, Any]) -> Hashable:
+    message = update.get("message") or (update.get("callback_query") or {}).get("message") or {}
+    chat_id = (message.get("chat") or {}).get("id")
+    if chat_id is not None:
+        return chat_id
+    sender = (update.get("callback_query") or {}).get("from") or {}
+    if sender.get("id") is not None:
+        return sender["id"]
+    # Nothing to order against: the update gets a lane of its own.
+    return ("update", update.get("update_id"), id(update))
+
+
+class UpdateDispatcher:
+    # Worker pool for Telegram updates. Each chat has its own FIFO lane and at most one
+    # worker drains a lane at a time, so one chat's updates keep their order while
+    # different chats run in parallel.
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self._handler: UpdateHandler | None = None
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lanes: dict[Hashable, deque[tuple[dict[str, Any], asyncio.Future, float]]] = {}
+        self._ready: asyncio.Queue[Hashable] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.pending = 0
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_wait = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, handler: UpdateHandler) -> None:
+        if self._tasks:
+            return
+        self._handler = handler
+        self._ready = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(max(1, self.workers))]
+        logger.info("tg_updates.start workers=%s max_pending=%s", len(self._tasks), self.max_pending)
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for lane in self._lanes.values():
+            for _, future, _ in lane:
+                future.cancel()
+        self._lanes.clear()
+        self.pending = 0
+
+    def submit(self, update: dict[str, Any]) -> asyncio.Future | None:
+        if not self._tasks or self._ready is None:
+            raise RuntimeError("update dispatcher is not running")
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = update_chat_key(update)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+            self._ready.put_nowait(key)
+        lane.append((update, future, loop.time()))
+        self.pending += 1
+        self.submitted += 1
+        return future
+
+    async def _worker(self) -> None:
+        assert self._ready is not None and self._handler is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            key = await self._ready.get()
+            lane = self._lanes[key]
+            while lane:
+                update, future, enqueued_at = lane[0]
+                self.max_wait = max(self.max_wait, loop.time() - enqueued_at)
+                try:
+                    await self._handler(update)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # noqa: BLE001
+                    self.failed += 1
+                    logger.exception("tg_updates.failed update_id=%s", update.get("update_id"))
+                lane.popleft()
+                self.pending -= 1
+                self.processed += 1
+                if not future.done():
+                    future.set_result(None)
+            # No await since the lane emptied: a new update for this chat creates a fresh lane.
+            del self._lanes[key]
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "running": self.running,
+            "workers": len(self._tasks),
+            "pending": self.pending,
+            "active_chats": len(self._lanes),
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+UpdateFetcher = Callable[[int | None, int], Awaitable[list[dict[str, Any]]]]
+
+
+class UpdatePoller:
+    # getUpdates confirms everything below the offset it is sent, so the offset only moves
+    # past a contiguous run of finished updates. Unconfirmed updates come back on the
+    # next poll and are skipped while they are still in flight.
+
+    def __init__(self, dispatcher: UpdateDispatcher, max_in_flight: int, long_poll_seconds: int = 30, idle_seconds: float = 1.0) -> None:
+        self.dispatcher = dispatcher
+        self.max_in_flight = max(1, max_in_flight)
+        self.long_poll_seconds = long_poll_seconds
+        self.idle_seconds = idle_seconds
+        self.offset: int | None = None
+        self._inflight: dict[int, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def advance(self) -> int | None:
+        for update_id, future in list(self._inflight.items()):
+            if not future.done():
+                break
+            del self._inflight[update_id]
+            self.offset = update_id + 1
+        return self.offset
+
+    def accept(self, updates: list[dict[str, Any]]) -> int:
+        accepted = 0
+        for update in updates:
+            update_id = update.get("update_id")
+            if not isinstance(update_id, int) or update_id in self._inflight or (self.offset is not None and update_id < self.offset):
+                continue
+            if len(self._inflight) >= self.max_in_flight:
+                break
+            future = self.dispatcher.submit(update)
+            if future is None:
+                break
+            self._inflight[update_id] = future
+            accepted += 1
+        return accepted
+
+    async def wait_any(self, timeout: float) -> None:
+        pending = [future for future in self._inflight.values() if not future.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+    async def poll_once(self, fetch: UpdateFetcher) -> int:
+        while len(self._inflight) >= self.max_in_flight:
+            await self.wait_any(self.idle_seconds)
+            self.advance()
+        # Unconfirmed updates make getUpdates return at once, so long polling only
+        # makes sense with nothing in flight.
+        updates = await fetch(self.advance(), 0 if self._inflight else self.long_poll_seconds)
+        accepted = self.accept(updates)
+        if not accepted and self._inflight:
+            await self.wait_any(self.idle_seconds)
+        return accepted
+
+
+update_dispatcher = UpdateDispatcher(workers=settings.telegram_update_workers, max_pending=settings.telegram_update_queue_max)
@@ -1,9 +1,14 @@
 from datetime import date, datetime, time, timedelta
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Booking, BookingStatus, Master, Service, Setting, master_services
+from app.core.config import settings
+from app.models import Booking, BookingStatus, Master, Service, Setting, SlotHold, master_services
+from app.services.availability import AvailabilityRules, OccupancyBitmaps, OccupancyIndex, build_day_slots, slots_not_before, slots_span
+from app.services.availability_cache import CachedAvailability, availability_cache
+from app.services.occupancy import occupancy_store
+from app.services.settings_cache import is_missing, settings_cache
 
 DAY_MAP = {
     0: "mon",
@@ -26,13 +31,22 @@ DEFAULT_BUSINESS_HOURS = {
 }
 
 DEFAULT_SLOT_STEP_MIN = 30
+NEXT_SLOTS_MAX_CHUNK_DAYS = 16
 DEFAULT_BOOKING_RULES = {"min_lead_min": 0, "max_days_ahead": 60}
 
 
 async def get_setting(db: AsyncSession, key: str) -> dict:
-    result = await db.execute(select(Setting).where(Setting.key == key))
-    setting = result.scalar_one_or_none()
-    return setting.value_jsonb if setting else {}
+    cached = settings_cache.lookup(key)
+    if not is_missing(cached):
+        return cached
+
+    generation = settings_cache.generation
+    result = await db.execute(select(Setting.value_jsonb).where(Setting.key == key))
+    value = result.scalar_one_or_none()
+    if value is None:
+        value = {}
+    settings_cache.store(key, value, generation)
+    return value
 
 
 def parse_date_param(value: str) -> date:
@@ -47,13 +61,59 @@ def parse_date_param(value: str) -> date:
         raise ValueError("Invalid date format. Use YYYY-MM-DD or DD.MM.YYYY.") from exc
 
 
+def parse_local_datetime(value: str) -> datetime:
+    # Bookings are naive salon-local time, the server's zone just like datetime.now();
+    # an explicit offset is converted into it rather than dropped.
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
 def parse_time(value: str) -> time:
     return datetime.strptime(value, "%H:%M").time()
 
 
+def _minutes_of_day(value: str) -> int:
+    parsed = parse_time(value)
+    return parsed.hour * 60 + parsed.minute
+
+
+def compile_availability_rules(business_hours_setting: object, slot_step_min_setting: object, booking_rules_setting: object) -> AvailabilityRules:
+    business_hours = business_hours_setting if isinstance(business_hours_setting, dict) and business_hours_setting else DEFAULT_BUSINESS_HOURS
+
+    windows_by_weekday: dict[int, tuple[tuple[int, int], ...]] = {}
+    for weekday, day_key in DAY_MAP.items():
+        ranges = business_hours.get(day_key, [])
+        if not ranges:
+            ranges = DEFAULT_BUSINESS_HOURS.get(day_key, [])
+        windows_by_weekday[weekday] = tuple((_minutes_of_day(day_range["start"]), _minutes_of_day(day_range["end"])) for day_range in ranges)
+
+    step = (
+        int(slot_step_min_setting.get("value", DEFAULT_SLOT_STEP_MIN))
+        if isinstance(slot_step_min_setting, dict)
+        else int(slot_step_min_setting or DEFAULT_SLOT_STEP_MIN)
+    )
+    booking_rules = booking_rules_setting if isinstance(booking_rules_setting, dict) else DEFAULT_BOOKING_RULES
+    return AvailabilityRules(
+        windows_by_weekday=windows_by_weekday,
+        step_min=step,
+        min_lead_min=int(booking_rules.get("min_lead_min", DEFAULT_BOOKING_RULES["min_lead_min"])),
+        max_days_ahead=int(booking_rules.get("max_days_ahead", DEFAULT_BOOKING_RULES["max_days_ahead"])),
+    )
+
+
+async def load_availability_rules(db: AsyncSession) -> AvailabilityRules:
+    return compile_availability_rules(
+        await get_setting(db, "business_hours"),
+        await get_setting(db, "slot_step_min"),
+        await get_setting(db, "booking_rules"),
+    )
+
+
 async def _service_exists(db: AsyncSession, service_id: int) -> Service | None:
-    service_result = await db.execute(select(Service).where(Service.id == service_id))
-    return service_result.scalar_one_or_none()
+    # Identity-map first: a caller that already loaded the service pays no extra query.
+    return await db.get(Service, service_id)
 
 
 async def get_service_master_ids(db: AsyncSession, service_id: int) -> list[int]:
@@ -66,106 +126,278 @@ async def get_service_master_ids(db: AsyncSession, service_id: int) -> list[int]
     return list(result.scalars().all())
 
 
-async def get_availability_slots(
+async def load_occupancy(
+    db: AsyncSession,
+    from_dt: datetime,
+    to_dt: datetime,
+    master_ids: list[int],
+    include_unassigned: bool = False,
+    exclude_booking_id: int | None = None,
+    fresh: bool = False,
+    exclude_hold_id: int | None = None,
+) -> OccupancyIndex | OccupancyBitmaps:
+    # Reads go to the in-memory bitmaps; booking validation (fresh) and edits that
+    # must ignore the booking being changed still ask the database directly.
+    if not fresh and exclude_booking_id is None and exclude_hold_id is None and occupancy_store.enabled:
+        return await occupancy_store.view(db, from_dt.date(), (to_dt - timedelta(microseconds=1)).date())
+
+    master_filter = Booking.master_id.in_(master_ids)
+    if include_unassigned:
+        master_filter = or_(master_filter, Booking.master_id.is_(None))
+    booking_filter = [
+        Booking.status.in_([BookingStatus.new, BookingStatus.confirmed]),
+        Booking.starts_at < to_dt,
+        Booking.ends_at > from_dt,
+        master_filter,
+    ]
+    if exclude_booking_id is not None:
+        booking_filter.append(Booking.id != exclude_booking_id)
+
+    hold_master_filter = SlotHold.master_id.in_(master_ids)
+    if include_unassigned:
+        hold_master_filter = or_(hold_master_filter, SlotHold.master_id.is_(None))
+    hold_filter = [SlotHold.expires_at > datetime.now(), SlotHold.starts_at < to_dt, SlotHold.ends_at > from_dt, hold_master_filter]
+    if exclude_hold_id is not None:
+        hold_filter.append(SlotHold.id != exclude_hold_id)
+
+    # Unheld checkouts compete with active holds exactly like with bookings.
+    result = await db.execute(
+        select(Booking.starts_at, Booking.ends_at, Booking.master_id)
+        .where(*booking_filter)
+        .union_all(select(SlotHold.starts_at, SlotHold.ends_at, SlotHold.master_id).where(*hold_filter))
+    )
+    return OccupancyIndex.from_rows(result.all())
+
+
+async def _resolve_master_pool(db: AsyncSession, service_id: int, master_id: int | None) -> list[int]:
+    if master_id is None:
+        return await get_service_master_ids(db, service_id)
+
+    # Loads the entity rather than the id so callers can take the master from the session.
+    master_exists = await db.execute(
+        select(Master)
+        .join(master_services, and_(master_services.c.master_id == Master.id, master_services.c.service_id == service_id))
+        .where(Master.id == master_id, Master.is_active.is_(True))
+    )
+    return [master_id] if master_exists.scalar_one_or_none() is not None else []
+
+
+async def get_availability_range(
     db: AsyncSession,
     service_id: int,
-    target_date: date,
+    date_from: date,
+    date_to: date,
     now: datetime,
     master_id: int | None = None,
     exclude_booking_id: int | None = None,
-) -> list[tuple[datetime, datetime]]:
+    fresh: bool = False,
+    exclude_hold_id: int | None = None,
+) -> dict[date, list[tuple[datetime, datetime]]]:
+    available, _, _ = await _compute_availability_range(
+        db,
+        service_id,
+        date_from,
+        date_to,
+        now,
+        master_id=master_id,
+        exclude_booking_id=exclude_booking_id,
+        fresh=fresh,
+        exclude_hold_id=exclude_hold_id,
+    )
+    return available
+
+
+async def _compute_availability_range(
+    db: AsyncSession,
+    service_id: int,
+    date_from: date,
+    date_to: date,
+    now: datetime,
+    master_id: int | None = None,
+    exclude_booking_id: int | None = None,
+    fresh: bool = False,
+    exclude_hold_id: int | None = None,
+) -> tuple[dict[date, list[tuple[datetime, datetime]]], AvailabilityRules | None, list[int]]:
     service = await _service_exists(db, service_id)
     if not service:
-        return []
+        return {}, None, []
 
-    business_hours_setting = await get_setting(db, "business_hours")
-    slot_step_min_setting = await get_setting(db, "slot_step_min")
-    booking_rules_setting = await get_setting(db, "booking_rules")
+    rules = await load_availability_rules(db)
+    first_day = max(date_from, now.date())
+    last_day = min(date_to, rules.last_bookable_date(now))
+    earliest = rules.earliest_start(now)
 
-    business_hours = business_hours_setting if isinstance(business_hours_setting, dict) and business_hours_setting else DEFAULT_BUSINESS_HOURS
+    slots_by_day: dict[date, list[tuple[datetime, datetime]]] = {}
+    day = first_day
+    while day <= last_day:
+        day_slots = build_day_slots(day, rules.windows_for(day), service.duration_min, rules.step_min)
+        slots_by_day[day] = slots_not_before(day_slots, earliest)
+        day += timedelta(days=1)
 
-    day_key = DAY_MAP[target_date.weekday()]
-    ranges = business_hours.get(day_key, [])
-    if not ranges:
-        ranges = DEFAULT_BUSINESS_HOURS.get(day_key, [])
-    step = (
-        int(slot_step_min_setting.get("value", DEFAULT_SLOT_STEP_MIN))
-        if isinstance(slot_step_min_setting, dict)
-        else int(slot_step_min_setting or DEFAULT_SLOT_STEP_MIN)
+    slots = [slot for day_slots in slots_by_day.values() for slot in day_slots]
+    if not slots:
+        return slots_by_day, rules, []
+
+    master_ids = await _resolve_master_pool(db, service_id, master_id)
+    if not master_ids:
+        return {day: [] for day in slots_by_day}, rules, []
+
+    from_dt, to_dt = slots_span(slots)
+    occupancy = await load_occupancy(
+        db,
+        from_dt,
+        to_dt,
+        master_ids,
+        include_unassigned=master_id is None,
+        exclude_booking_id=exclude_booking_id,
+        fresh=fresh,
+        exclude_hold_id=exclude_hold_id,
     )
-    booking_rules = booking_rules_setting if isinstance(booking_rules_setting, dict) else DEFAULT_BOOKING_RULES
-    min_lead = int(booking_rules.get("min_lead_min", DEFAULT_BOOKING_RULES["min_lead_min"]))
-    max_days = int(booking_rules.get("max_days_ahead", DEFAULT_BOOKING_RULES["max_days_ahead"]))
-
-    if target_date > (now.date() + timedelta(days=max_days)):
-        return []
-
-    slots: list[tuple[datetime, datetime]] = []
-    duration = timedelta(minutes=service.duration_min)
-    for day_range in ranges:
-        start_time = parse_time(day_range["start"])
-        end_time = parse_time(day_range["end"])
-        start_dt = datetime.combine(target_date, start_time)
-        end_dt = datetime.combine(target_date, end_time)
-        cursor = start_dt
-        while cursor + duration <= end_dt:
-            slot_start = cursor
-            slot_end = cursor + duration
-            if slot_start >= now + timedelta(minutes=min_lead):
-                slots.append((slot_start, slot_end))
-            cursor += timedelta(minutes=step)
+    free_slots = occupancy.free_for_master(slots, master_id) if master_id is not None else occupancy.free_for_pool(slots, master_ids)
 
-    if not slots:
-        return []
+    available: dict[date, list[tuple[datetime, datetime]]] = {day: [] for day in slots_by_day}
+    for slot in free_slots:
+        available[slot[0].date()].append(slot)
+    return available, rules, master_ids
 
-    from_dt = slots[0][0]
-    to_dt = slots[-1][1]
 
-    base_booking_filter = [
-        Booking.status.in_([BookingStatus.new, BookingStatus.confirmed]),
-        Booking.starts_at < to_dt,
-        Booking.ends_at > from_dt,
-    ]
-    if exclude_booking_id is not None:
-        base_booking_filter.append(Booking.id != exclude_booking_id)
+async def find_next_available_slots(
+    db: AsyncSession,
+    service_id: int,
+    after: datetime,
+    now: datetime,
+    limit: int,
+    master_id: int | None = None,
+) -> tuple[list[tuple[datetime, datetime]], date | None]:
+    service = await _service_exists(db, service_id)
+    if not service:
+        return [], None
 
-    if master_id is not None:
-        master_exists = await db.execute(
-            select(Master.id)
-            .join(master_services, and_(master_services.c.master_id == Master.id, master_services.c.service_id == service_id))
-            .where(Master.id == master_id, Master.is_active.is_(True))
-        )
-        if master_exists.scalar_one_or_none() is None:
-            return []
-
-        result = await db.execute(select(Booking).where(*base_booking_filter, Booking.master_id == master_id))
-        bookings = result.scalars().all()
-        return [
-            (slot_start, slot_end)
-            for slot_start, slot_end in slots
-            if not any(booking.starts_at < slot_end and booking.ends_at > slot_start for booking in bookings)
-        ]
-
-    master_ids = await get_service_master_ids(db, service_id)
+    rules = await load_availability_rules(db)
+    earliest = max(after, rules.earliest_start(now))
+    last_day = rules.last_bookable_date(now)
+    if earliest.date() > last_day:
+        return [], None
+
+    master_ids = await _resolve_master_pool(db, service_id, master_id)
+    if not master_ids:
+        return [], None
+
+    # Chunks grow 1, 2, 4, ... days: the common "today or tomorrow" answer costs one
+    # bookings fetch, and a far-away first slot still needs only a few.
+    found: list[tuple[datetime, datetime]] = []
+    day = earliest.date()
+    searched_until = day
+    chunk_days = 1
+    while day <= last_day and len(found) < limit:
+        searched_until = min(day + timedelta(days=chunk_days - 1), last_day)
+        slots: list[tuple[datetime, datetime]] = []
+        while day <= searched_until:
+            day_slots = build_day_slots(day, rules.windows_for(day), service.duration_min, rules.step_min)
+            slots.extend(slots_not_before(day_slots, earliest))
+            day += timedelta(days=1)
+        if slots:
+            slots.sort()
+            from_dt, to_dt = slots_span(slots)
+            occupancy = await load_occupancy(db, from_dt, to_dt, master_ids, include_unassigned=master_id is None)
+            free_slots = occupancy.free_for_master(slots, master_id) if master_id is not None else occupancy.free_for_pool(slots, master_ids)
+            found.extend(free_slots[: limit - len(found)])
+        chunk_days = min(chunk_days * 2, NEXT_SLOTS_MAX_CHUNK_DAYS)
+    return found, searched_until
+
+
+async def get_availability_matrix(
+    db: AsyncSession,
+    service: Service,
+    target_date: date,
+    now: datetime,
+    master_ids: list[int],
+) -> dict[int, list[tuple[datetime, datetime]]]:
+    available: dict[int, list[tuple[datetime, datetime]]] = {master_id: [] for master_id in master_ids}
     if not master_ids:
-        return []
-
-    result = await db.execute(select(Booking).where(*base_booking_filter))
-    bookings = result.scalars().all()
-
-    available: list[tuple[datetime, datetime]] = []
-    for slot_start, slot_end in slots:
-        occupied_master_ids = {
-            booking.master_id
-            for booking in bookings
-            if booking.master_id is not None and booking.master_id in master_ids and booking.starts_at < slot_end and booking.ends_at > slot_start
-        }
-        unassigned_overlaps = sum(
-            1
-            for booking in bookings
-            if booking.master_id is None and booking.starts_at < slot_end and booking.ends_at > slot_start
+        return available
+
+    rules = await load_availability_rules(db)
+    if target_date > rules.last_bookable_date(now):
+        return available
+
+    day_slots = build_day_slots(target_date, rules.windows_for(target_date), service.duration_min, rules.step_min)
+    slots = slots_not_before(day_slots, rules.earliest_start(now))
+    if not slots:
+        return available
+
+    linked_result = await db.execute(
+        select(master_services.c.master_id).where(
+            master_services.c.service_id == service.id,
+            master_services.c.master_id.in_(master_ids),
         )
-        free_capacity = len(master_ids) - len(occupied_master_ids) - unassigned_overlaps
-        if free_capacity > 0:
-            available.append((slot_start, slot_end))
+    )
+    linked_master_ids = list(linked_result.scalars().all())
+    if not linked_master_ids:
+        return available
+
+    from_dt, to_dt = slots_span(slots)
+    occupancy = await load_occupancy(db, from_dt, to_dt, linked_master_ids)
+    available.update(occupancy.free_by_master(slots, linked_master_ids))
     return available
+
+
+async def get_availability_slots(
+    db: AsyncSession,
+    service_id: int,
+    target_date: date,
+    now: datetime,
+    master_id: int | None = None,
+    exclude_booking_id: int | None = None,
+    fresh: bool = False,
+    exclude_hold_id: int | None = None,
+) -> list[tuple[datetime, datetime]]:
+    if fresh or exclude_booking_id is not None or exclude_hold_id is not None or not availability_cache.enabled:
+        available = await get_availability_range(
+            db,
+            service_id,
+            target_date,
+            target_date,
+            now,
+            master_id=master_id,
+            exclude_booking_id=exclude_booking_id,
+            fresh=fresh,
+            exclude_hold_id=exclude_hold_id,
+        )
+        return available.get(target_date, [])
+
+    async def load() -> CachedAvailability:
+        available, rules, master_ids = await _compute_availability_range(db, service_id, target_date, target_date, now, master_id=master_id)
+        slots = available.get(target_date, [])
+        hold_expires_at = await _next_hold_expiry(db, target_date, now) if master_ids else None
+        return CachedAvailability(tuple(slots), frozenset(master_ids), availability_expires_at(slots, rules, now, hold_expires_at))
+
+    return await availability_cache.get_or_load((service_id, target_date, master_id), now, load)
+
+
+async def _next_hold_expiry(db: AsyncSession, target_date: date, now: datetime) -> datetime | None:
+    result = await db.execute(
+        select(func.min(SlotHold.expires_at)).where(
+            SlotHold.expires_at > now,
+            SlotHold.starts_at < datetime.combine(target_date + timedelta(days=1), time.min),
+            SlotHold.ends_at > datetime.combine(target_date, time.min),
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+def availability_expires_at(
+    slots: list[tuple[datetime, datetime]],
+    rules: AvailabilityRules | None,
+    now: datetime,
+    hold_expires_at: datetime | None = None,
+) -> datetime:
+    # The answer also changes without writes: the first free slot drops out once it is
+    # closer than min_lead_min, the max_days_ahead horizon moves at midnight, and a hold
+    # frees its slot at expires_at, before the sweep deletes it.
+    expires_at = min(now + timedelta(seconds=settings.availability_cache_ttl_seconds), datetime.combine(now.date() + timedelta(days=1), time.min))
+    if slots and rules is not None:
+        expires_at = min(expires_at, min(slot[0] for slot in slots) - timedelta(minutes=rules.min_lead_min))
+    if hold_expires_at is not None:
+        expires_at = min(expires_at, hold_expires_at)
+    return expires_at
@@ -2,9 +2,15 @@
 set -euo pipefail
 
 BACKUP_DIR="${BACKUP_DIR:-/app/backups}"
-RETENTION_KEEP="${RETENTION_KEEP:-7}"
 DATABASE_URL="${DATABASE_URL:-}"
 BACKUP_PASSPHRASE="${BACKUP_PASSPHRASE:-}"
+BACKUP_FORMAT="${BACKUP_FORMAT:-custom}"
+BACKUP_JOBS="${BACKUP_JOBS:-4}"
+BACKUP_NICE="${BACKUP_NICE:-}"
+BACKUP_IONICE_CLASS="${BACKUP_IONICE_CLASS:-}"
+BACKUP_RATE_LIMIT_BYTES="${BACKUP_RATE_LIMIT_BYTES:-0}"
+BACKUP_THROTTLE_FILE="${BACKUP_THROTTLE_FILE:-}"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 if [[ -z "$DATABASE_URL" ]]; then
   echo "DATABASE_URL is required" >&2
@@ -16,6 +22,21 @@ if [[ -z "$BACKUP_PASSPHRASE" ]]; then
   exit 1
 fi
 
+if [[ "$BACKUP_FORMAT" != "custom" && "$BACKUP_FORMAT" != "directory" ]]; then
+  echo "BACKUP_FORMAT must be custom or directory" >&2
+  exit 1
+fi
+
+if ! [[ "$BACKUP_JOBS" =~ ^[1-9][0-9]*$ ]]; then
+  echo "BACKUP_JOBS must be a positive integer" >&2
+  exit 1
+fi
+
+if ! [[ "$BACKUP_RATE_LIMIT_BYTES" =~ ^[0-9]+$ ]]; then
+  echo "BACKUP_RATE_LIMIT_BYTES must be a non-negative integer" >&2
+  exit 1
+fi
+
 mkdir -p "$BACKUP_DIR"
 
 readarray -t DB_PARTS < <(python - <<'PY'
@@ -48,21 +69,66 @@ DB_NAME="${DB_PARTS[2]}"
 DB_USER="${DB_PARTS[3]}"
 DB_PASSWORD="${DB_PARTS[4]}"
 
+now_ms() {
+  echo $(( $(date +%s%N) / 1000000 ))
+}
+
 TIMESTAMP="$(date -u +%Y%m%d_%H%M%S)"
-BASENAME="${DB_NAME}_${TIMESTAMP}.dump.gpg"
-TARGET_PATH="$BACKUP_DIR/$BASENAME"
+GPG_ARGS=(--batch --yes --symmetric --cipher-algo AES256 --pinentry-mode loopback --passphrase "$BACKUP_PASSPHRASE")
+PG_ARGS=(-h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME")
+STARTED_MS="$(now_ms)"
+
+# Throttled mode: dump and compression run at low CPU/IO priority, and the dump stream
+# passes through throttle_pipe.py. The database runs elsewhere, so nice/ionice only cover
+# the client side; the rate cap is what slows the server down, through pipe backpressure.
+LOW_PRIO=()
+if [[ -n "$BACKUP_NICE" ]] && command -v nice >/dev/null 2>&1; then
+  LOW_PRIO+=(nice -n "$BACKUP_NICE")
+fi
+if [[ -n "$BACKUP_IONICE_CLASS" ]] && command -v ionice >/dev/null 2>&1; then
+  LOW_PRIO+=(ionice -t -c "$BACKUP_IONICE_CLASS")
+fi
+
+throttled() {
+  if [[ "$BACKUP_RATE_LIMIT_BYTES" == "0" && -z "$BACKUP_THROTTLE_FILE" ]]; then
+    cat
+  else
+    python "$SCRIPT_DIR/throttle_pipe.py" --rate "$BACKUP_RATE_LIMIT_BYTES" ${BACKUP_THROTTLE_FILE:+--control-file "$BACKUP_THROTTLE_FILE"}
+  fi
+}
 
 export PGPASSWORD="$DB_PASSWORD"
-pg_dump \
-  -h "$DB_HOST" \
-  -p "$DB_PORT" \
-  -U "$DB_USER" \
-  -d "$DB_NAME" \
-  -Fc \
-| gpg --batch --yes --symmetric --cipher-algo AES256 --pinentry-mode loopback --passphrase "$BACKUP_PASSPHRASE" -o "$TARGET_PATH"
+if [[ "$BACKUP_FORMAT" == "directory" ]]; then
+  # pg_dump -j needs a directory archive, so the dump lands in a work dir first and is
+  # then packed and encrypted into a single file.
+  BASENAME="${DB_NAME}_${TIMESTAMP}.dir.tar.gpg"
+  TARGET_PATH="$BACKUP_DIR/$BASENAME"
+  WORK_DIR="$(mktemp -d "$BACKUP_DIR/.work_${TIMESTAMP}_XXXXXX")"
+  trap 'rm -rf "$WORK_DIR"' EXIT
+  # pg_dump writes the directory itself, so only the packing step goes through the pipe cap.
+  "${LOW_PRIO[@]}" pg_dump "${PG_ARGS[@]}" -Fd -j "$BACKUP_JOBS" -f "$WORK_DIR/dump"
+  DUMPED_MS="$(now_ms)"
+  "${LOW_PRIO[@]}" tar -C "$WORK_DIR" -cf - dump | throttled | "${LOW_PRIO[@]}" gpg "${GPG_ARGS[@]}" -o "$TARGET_PATH"
+  PACKED_MS="$(now_ms)"
+  rm -rf "$WORK_DIR"
+  JOBS=$BACKUP_JOBS
+else
+  BASENAME="${DB_NAME}_${TIMESTAMP}.dump.gpg"
+  TARGET_PATH="$BACKUP_DIR/$BASENAME"
+  "${LOW_PRIO[@]}" pg_dump "${PG_ARGS[@]}" -Fc | throttled | "${LOW_PRIO[@]}" gpg "${GPG_ARGS[@]}" -o "$TARGET_PATH"
+  # Dump and encryption share one pipe, so there is no separate packing step.
+  DUMPED_MS="$(now_ms)"
+  PACKED_MS="$DUMPED_MS"
+  JOBS=1
+fi
+DB_SIZE_BYTES=null
+if command -v psql >/dev/null 2>&1; then
+  DB_SIZE_BYTES="$(psql "${PG_ARGS[@]}" -Atc 'SELECT pg_database_size(current_database())' 2>/dev/null || echo null)"
+fi
 unset PGPASSWORD
 
 SIZE_BYTES="$(wc -c < "$TARGET_PATH" | tr -d ' ')"
+SHA256="$(sha256sum "$TARGET_PATH" | cut -d ' ' -f 1)"
 CREATED_AT="$(date -u +%Y-%m-%dT%H:%M:%SZ)"
 
 cat > "$BACKUP_DIR/last_backup.json" <<JSON
@@ -70,17 +136,17 @@ cat > "$BACKUP_DIR/last_backup.json" <<JSON
   "filename": "$BASENAME",
   "path": "$TARGET_PATH",
   "created_at": "$CREATED_AT",
-  "size_bytes": $SIZE_BYTES
+  "size_bytes": $SIZE_BYTES,
+  "sha256": "$SHA256",
+  "db_size_bytes": ${DB_SIZE_BYTES:-null},
+  "format": "$BACKUP_FORMAT",
+  "jobs": $JOBS,
+  "timings_ms": {
+    "dump": $(( DUMPED_MS - STARTED_MS )),
+    "package": $(( PACKED_MS - DUMPED_MS )),
+    "total": $(( PACKED_MS - STARTED_MS ))
+  }
 }
 JSON
 
-if [[ "$RETENTION_KEEP" =~ ^[0-9]+$ ]] && (( RETENTION_KEEP > 0 )); then
-  mapfile -t FILES < <(find "$BACKUP_DIR" -maxdepth 1 -type f -name '*.dump.gpg' -printf '%f\n' | sort -r)
-  if (( ${#FILES[@]} > RETENTION_KEEP )); then
-    for old_file in "${FILES[@]:RETENTION_KEEP}"; do
-      rm -f "$BACKUP_DIR/$old_file"
-    done
-  fi
-fi
-
 echo "$TARGET_PATH"
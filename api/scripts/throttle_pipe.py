@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import time
+
+CHUNK_BYTES = 64 * 1024
+CONTROL_CHECK_SECONDS = 0.25
+PAUSE_SLEEP_SECONDS = 0.2
+
+# Copies stdin to stdout at a capped byte rate. backup_db.sh puts it between pg_dump and
+# gpg; the API rewrites the control file ("unlimited", "pause" or bytes per second) while
+# the backup runs. Kept free of app imports so the script works in a bare interpreter.
+
+
+def _read_control(path: str, current: int | None) -> int | None:
+    # None means paused, 0 means unlimited.
+    try:
+        with open(path, encoding="utf-8") as handle:
+            value = handle.read().strip().lower()
+    except OSError:
+        return current
+    if value == "pause":
+        return None
+    if value == "unlimited":
+        return 0
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return current
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, default=0, help="bytes per second, 0 = unlimited")
+    parser.add_argument("--control-file", default=None)
+    args = parser.parse_args()
+
+    rate: int | None = max(0, args.rate)
+    control_mtime = None
+    checked_at = 0.0
+    # The schedule restarts on every rate change, so a pause or a slower rate is not
+    # followed by a burst that "catches up".
+    window_started = time.monotonic()
+    window_bytes = 0
+    stdin, stdout = sys.stdin.fileno(), sys.stdout.fileno()
+
+    while True:
+        now = time.monotonic()
+        if args.control_file and now - checked_at >= CONTROL_CHECK_SECONDS:
+            checked_at = now
+            try:
+                mtime = os.stat(args.control_file).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime is not None and mtime != control_mtime:
+                control_mtime = mtime
+                new_rate = _read_control(args.control_file, rate)
+                if new_rate != rate:
+                    rate = new_rate
+                    window_started, window_bytes = now, 0
+        if rate is None:
+            time.sleep(PAUSE_SLEEP_SECONDS)
+            continue
+        if rate > 0:
+            due = window_started + window_bytes / rate
+            if due > now:
+                time.sleep(min(due - now, CONTROL_CHECK_SECONDS))
+                continue
+        chunk = os.read(stdin, min(CHUNK_BYTES, rate) if rate > 0 else CHUNK_BYTES)
+        if not chunk:
+            return 0
+        view = memoryview(chunk)
+        while view:
+            written = os.write(stdout, view)
+            view = view[written:]
+        window_bytes += len(chunk)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        sys.exit(1)
@@ -0,0 +1,59 @@
+from unittest.mock import MagicMock
+
+
+class FakeDatabase:
+    # Stands in for app.db.AsyncSessionLocal: patch it in with
+    # patch("app.db.AsyncSessionLocal", new=FakeDatabase(rows, ...)). Every execute() is
+    # recorded and answered with the next queued rows (empty once the queue runs out);
+    # open_sessions/open_transactions tell what is held while a test hook runs.
+
+    def __init__(self, *results: list) -> None:
+        self.statements: list = []
+        self.results: list = list(results)
+        self.open_sessions = 0
+        self.open_transactions = 0
+
+    def __call__(self) -> "FakeSession":
+        return FakeSession(self)
+
+    def queue(self, *results: list) -> None:
+        self.results[:] = results
+        self.statements.clear()
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase) -> None:
+        self.database = database
+
+    async def __aenter__(self):
+        self.database.open_sessions += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.database.open_sessions -= 1
+        return False
+
+    def begin(self):
+        return _FakeTransaction(self.database)
+
+    async def execute(self, statement, *args, **kwargs):
+        self.database.statements.append(statement)
+        rows = self.database.results.pop(0) if self.database.results else []
+        result = MagicMock()
+        result.all.return_value = rows
+        result.scalars.return_value.all.return_value = rows
+        result.scalar_one_or_none.return_value = rows[0] if rows else None
+        return result
+
+
+class _FakeTransaction:
+    def __init__(self, database: FakeDatabase) -> None:
+        self.database = database
+
+    async def __aenter__(self):
+        self.database.open_transactions += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.database.open_transactions -= 1
+        return False
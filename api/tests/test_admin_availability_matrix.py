@@ -0,0 +1,51 @@
+import unittest
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.availability import OccupancyIndex
+from app.utils import compile_availability_rules, get_availability_matrix
+
+TARGET_DATE = date(2026, 3, 3)
+NOW = datetime(2026, 3, 2, 8, 0)
+
+
+def _linked_result(master_ids):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = master_ids
+    return result
+
+
+class AdminAvailabilityMatrixTests(unittest.IsolatedAsyncioTestCase):
+    async def _run(self, master_ids, linked_master_ids, bookings):
+        rules = compile_availability_rules({"tue": [{"start": "10:00", "end": "12:00"}]}, {"value": 60}, {})
+        db = SimpleNamespace(execute=AsyncMock(return_value=_linked_result(linked_master_ids)))
+        load_occupancy = AsyncMock(return_value=OccupancyIndex(bookings))
+        with (
+            patch("app.utils.load_availability_rules", new=AsyncMock(return_value=rules)) as load_rules,
+            patch("app.utils.load_occupancy", new=load_occupancy),
+        ):
+            result = await get_availability_matrix(db, SimpleNamespace(id=1, duration_min=60), TARGET_DATE, NOW, master_ids)
+        return result, db, load_rules, load_occupancy
+
+    async def test_query_count_is_constant_for_many_masters(self):
+        master_ids = list(range(1, 41))
+        result, db, load_rules, load_occupancy = await self._run(master_ids, master_ids, [])
+
+        self.assertEqual(db.execute.await_count, 1)
+        load_rules.assert_awaited_once()
+        load_occupancy.assert_awaited_once()
+        self.assertEqual(len(result), 40)
+        self.assertTrue(all(len(slots) == 2 for slots in result.values()))
+
+    async def test_unlinked_masters_have_no_slots_and_bookings_are_per_master(self):
+        busy = (datetime(2026, 3, 3, 10, 0), datetime(2026, 3, 3, 11, 0), 1)
+        result, _, _, _ = await self._run([1, 2, 3], [1, 2], [busy])
+
+        self.assertEqual(result[1], [(datetime(2026, 3, 3, 11, 0), datetime(2026, 3, 3, 12, 0))])
+        self.assertEqual(len(result[2]), 2)
+        self.assertEqual(result[3], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import asyncio
+import unittest
+from datetime import date, datetime, timedelta
+
+from app.services.availability_cache import AvailabilityCache, CachedAvailability
+from app.services.occupancy import BookingChangeScope
+from app.utils import availability_expires_at, compile_availability_rules
+
+DAY = date(2026, 3, 3)
+NOW = datetime(2026, 3, 2, 12, 0)
+SLOT = (datetime(2026, 3, 3, 10, 0), datetime(2026, 3, 3, 11, 0))
+
+
+def _entry(master_ids=(1, 2), slots=(SLOT,)):
+    return CachedAvailability(tuple(slots), frozenset(master_ids), NOW + timedelta(minutes=5))
+
+
+class AvailabilityCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def _fill(self, cache, key, entry):
+        async def load():
+            return entry
+
+        return await cache.get_or_load(key, NOW, load)
+
+    async def test_concurrent_misses_share_one_load(self):
+        cache = AvailabilityCache(enabled=True, max_entries=10)
+        calls = 0
+        release = asyncio.Event()
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return _entry()
+
+        tasks = [asyncio.create_task(cache.get_or_load((1, DAY, None), NOW, load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(result == [SLOT] for result in results))
+        self.assertEqual(await self._fill(cache, (1, DAY, None), _entry(slots=())), [SLOT])
+        self.assertEqual(cache.stats()["coalesced"], 4)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    async def test_cancelled_leader_hands_the_load_to_a_waiter(self):
+        cache = AvailabilityCache(enabled=True, max_entries=10)
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = 0
+
+        async def stuck():
+            started.set()
+            await asyncio.Event().wait()
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return _entry()
+
+        leader = asyncio.create_task(cache.get_or_load((1, DAY, None), NOW, stuck))
+        await started.wait()
+        waiters = [asyncio.create_task(cache.get_or_load((1, DAY, None), NOW, load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*waiters)
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(result == [SLOT] for result in results))
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    async def test_booking_change_evicts_only_affected_keys(self):
+        cache = AvailabilityCache(enabled=True, max_entries=10)
+        await self._fill(cache, (1, DAY, None), _entry(master_ids=(1, 2)))
+        await self._fill(cache, (2, DAY, None), _entry(master_ids=(3,)))
+        await self._fill(cache, (1, DAY, 2), _entry(master_ids=(2,)))
+        await self._fill(cache, (1, DAY + timedelta(days=1), None), _entry(master_ids=(1, 2)))
+
+        cache.evict_booking_change(BookingChangeScope(frozenset({DAY}), frozenset({1})))
+
+        self.assertEqual(cache.stats()["entries"], 3)
+        cache.evict_booking_change(BookingChangeScope(frozenset({DAY}), frozenset({None})))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    async def test_lru_bound(self):
+        cache = AvailabilityCache(enabled=True, max_entries=2)
+        await self._fill(cache, (1, DAY, None), _entry())
+        await self._fill(cache, (2, DAY, None), _entry())
+        await self._fill(cache, (1, DAY, None), _entry())
+        await self._fill(cache, (3, DAY, None), _entry())
+
+        self.assertEqual(cache.stats()["lru_evictions"], 1)
+        self.assertEqual(await self._fill(cache, (1, DAY, None), _entry(slots=())), [SLOT])
+
+    async def test_result_loaded_across_a_write_is_not_cached(self):
+        cache = AvailabilityCache(enabled=True, max_entries=10)
+
+        async def load():
+            cache.evict_booking_change(BookingChangeScope(frozenset({DAY}), frozenset({1})))
+            return _entry()
+
+        await cache.get_or_load((1, DAY, None), NOW, load)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+class AvailabilityExpiryTests(unittest.TestCase):
+    def test_expires_when_first_free_slot_falls_inside_lead_time(self):
+        rules = compile_availability_rules({}, {"value": 60}, {"min_lead_min": 120})
+        now = datetime(2026, 3, 3, 7, 58)
+
+        self.assertEqual(availability_expires_at([SLOT], rules, now), datetime(2026, 3, 3, 8, 0))
+
+    def test_expires_when_a_hold_on_the_day_lapses(self):
+        hold_expires_at = NOW + timedelta(seconds=30)
+
+        self.assertEqual(availability_expires_at([SLOT], None, NOW, hold_expires_at), hold_expires_at)
+
+    def test_empty_day_expires_at_midnight_at_the_latest(self):
+        now = datetime(2026, 3, 2, 23, 59)
+
+        self.assertEqual(availability_expires_at([], None, now), datetime(2026, 3, 3, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
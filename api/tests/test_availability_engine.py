@@ -0,0 +1,113 @@
+import random
+import unittest
+from datetime import date, datetime, timedelta
+
+from app.services.availability import OccupancyIndex, build_day_slots
+from app.utils import DEFAULT_BUSINESS_HOURS, compile_availability_rules
+
+TARGET_DATE = date(2026, 3, 2)
+
+
+def _legacy_slots(target_date, ranges, duration_min, step):
+    slots = []
+    duration = timedelta(minutes=duration_min)
+    for day_range in ranges:
+        cursor = datetime.combine(target_date, datetime.strptime(day_range["start"], "%H:%M").time())
+        end_dt = datetime.combine(target_date, datetime.strptime(day_range["end"], "%H:%M").time())
+        while cursor + duration <= end_dt:
+            slots.append((cursor, cursor + duration))
+            cursor += timedelta(minutes=step)
+    return slots
+
+
+def _legacy_free_for_master(slots, bookings):
+    return [
+        (slot_start, slot_end)
+        for slot_start, slot_end in slots
+        if not any(starts_at < slot_end and ends_at > slot_start for starts_at, ends_at, _ in bookings)
+    ]
+
+
+def _legacy_free_for_pool(slots, bookings, master_ids):
+    available = []
+    for slot_start, slot_end in slots:
+        occupied_master_ids = {
+            master_id
+            for starts_at, ends_at, master_id in bookings
+            if master_id is not None and master_id in master_ids and starts_at < slot_end and ends_at > slot_start
+        }
+        unassigned_overlaps = sum(
+            1 for starts_at, ends_at, master_id in bookings if master_id is None and starts_at < slot_end and ends_at > slot_start
+        )
+        if len(master_ids) - len(occupied_master_ids) - unassigned_overlaps > 0:
+            available.append((slot_start, slot_end))
+    return available
+
+
+def _random_bookings(rng, count, master_choices):
+    day_start = datetime.combine(TARGET_DATE, datetime.min.time())
+    bookings = []
+    for _ in range(count):
+        starts_at = day_start + timedelta(minutes=rng.randrange(-180, 24 * 60, 15))
+        ends_at = starts_at + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 120, 300]))
+        bookings.append((starts_at, ends_at, rng.choice(master_choices)))
+    return bookings
+
+
+class AvailabilityEngineEquivalenceTests(unittest.TestCase):
+    def test_build_day_slots_matches_legacy_generation(self):
+        ranges = [{"start": "09:00", "end": "13:00"}, {"start": "14:30", "end": "21:00"}]
+        windows = compile_availability_rules({"mon": ranges}, {"value": 20}, {}).windows_for(TARGET_DATE)
+        for duration_min in (15, 30, 60, 95, 400):
+            with self.subTest(duration_min=duration_min):
+                self.assertEqual(
+                    build_day_slots(TARGET_DATE, windows, duration_min, 20),
+                    _legacy_slots(TARGET_DATE, ranges, duration_min, 20),
+                )
+
+    def test_compile_rules_falls_back_to_defaults(self):
+        rules = compile_availability_rules({}, {}, None)
+        self.assertEqual(rules.step_min, 30)
+        self.assertEqual(rules.min_lead_min, 0)
+        self.assertEqual(rules.max_days_ahead, 60)
+        default_start = DEFAULT_BUSINESS_HOURS["mon"][0]["start"]
+        self.assertEqual(rules.windows_for(TARGET_DATE)[0][0], int(default_start[:2]) * 60)
+
+    def test_master_and_pool_results_match_legacy_loop(self):
+        rng = random.Random(20260302)
+        ranges = [{"start": "10:00", "end": "21:00"}]
+        master_ids = [1, 2, 3, 4]
+        for iteration in range(200):
+            bookings = _random_bookings(rng, rng.randrange(0, 40), [1, 2, 3, 4, 5, None])
+            duration_min = rng.choice([30, 60, 90])
+            step = rng.choice([15, 30])
+            slots = _legacy_slots(TARGET_DATE, ranges, duration_min, step)
+            index = OccupancyIndex(bookings)
+            with self.subTest(iteration=iteration):
+                self.assertEqual(
+                    index.free_for_pool(slots, master_ids),
+                    _legacy_free_for_pool(slots, bookings, master_ids),
+                )
+                for master_id in master_ids:
+                    own = [booking for booking in bookings if booking[2] == master_id]
+                    self.assertEqual(index.free_for_master(slots, master_id), _legacy_free_for_master(slots, own))
+                by_master = index.free_by_master(slots, master_ids)
+                for master_id in master_ids:
+                    own = [booking for booking in bookings if booking[2] == master_id]
+                    self.assertEqual(by_master[master_id], _legacy_free_for_master(slots, own))
+
+    def test_unsorted_overlapping_windows_keep_legacy_order(self):
+        ranges = [{"start": "15:00", "end": "18:00"}, {"start": "10:00", "end": "16:00"}]
+        slots = _legacy_slots(TARGET_DATE, ranges, 60, 30)
+        day_start = datetime.combine(TARGET_DATE, datetime.min.time())
+        bookings = [
+            (day_start + timedelta(hours=15), day_start + timedelta(hours=16), 1),
+            (day_start + timedelta(hours=11), day_start + timedelta(hours=12), None),
+        ]
+        index = OccupancyIndex(bookings)
+        self.assertEqual(index.free_for_pool(slots, [1]), _legacy_free_for_pool(slots, bookings, [1]))
+        self.assertEqual(index.free_for_master(slots, 1), _legacy_free_for_master(slots, bookings[:1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.api.public import get_next_availability
+from app.services.availability import OccupancyIndex
+from app.utils import compile_availability_rules, find_next_available_slots
+
+NOW = datetime(2026, 3, 2, 8, 0)
+
+
+class NextAvailabilityTests(unittest.IsolatedAsyncioTestCase):
+    async def _run(self, busy, after=NOW, limit=1, max_days_ahead=60):
+        rules = compile_availability_rules(
+            {day: [{"start": "10:00", "end": "12:00"}] for day in ("mon", "tue", "wed", "thu", "fri", "sat", "sun")},
+            {"value": 60},
+            {"min_lead_min": 0, "max_days_ahead": max_days_ahead},
+        )
+        occupancy = OccupancyIndex(busy)
+        load_occupancy = AsyncMock(side_effect=lambda *args, **kwargs: occupancy)
+        with (
+            patch("app.utils._service_exists", new=AsyncMock(return_value=SimpleNamespace(duration_min=60))),
+            patch("app.utils.load_availability_rules", new=AsyncMock(return_value=rules)),
+            patch("app.utils._resolve_master_pool", new=AsyncMock(return_value=[1])),
+            patch("app.utils.load_occupancy", new=load_occupancy),
+        ):
+            result = await find_next_available_slots(object(), 1, after, NOW, limit, master_id=1)
+        return result, load_occupancy
+
+    async def test_stops_after_first_day_with_enough_slots(self):
+        (slots, searched_until), load_occupancy = await self._run([], limit=2)
+
+        self.assertEqual(slots, [(datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 11, 0)), (datetime(2026, 3, 2, 11, 0), datetime(2026, 3, 2, 12, 0))])
+        self.assertEqual(searched_until, date(2026, 3, 2))
+        load_occupancy.assert_awaited_once()
+
+    async def test_busy_days_are_scanned_in_growing_chunks(self):
+        day_start = datetime(2026, 3, 2, 10, 0)
+        busy = [(day_start + timedelta(days=offset), day_start + timedelta(days=offset, hours=2), 1) for offset in range(5)]
+        (slots, searched_until), load_occupancy = await self._run(busy)
+
+        self.assertEqual(slots, [(datetime(2026, 3, 7, 10, 0), datetime(2026, 3, 7, 11, 0))])
+        self.assertEqual(searched_until, date(2026, 3, 8))
+        self.assertEqual(load_occupancy.await_count, 3)
+
+    async def test_after_and_max_days_ahead_bound_the_search(self):
+        (slots, searched_until), _ = await self._run([], after=datetime(2026, 3, 4, 10, 30), limit=5, max_days_ahead=3)
+
+        self.assertEqual([slot[0] for slot in slots], [datetime(2026, 3, 4, 11, 0), datetime(2026, 3, 5, 10, 0), datetime(2026, 3, 5, 11, 0)])
+        self.assertEqual(searched_until, date(2026, 3, 5))
+
+
+class NextAvailabilityAfterTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        # Server (salon) zone UTC+3, as in production.
+        previous = os.environ.get("TZ")
+        os.environ["TZ"] = "Europe/Moscow"
+        time.tzset()
+
+        def restore() -> None:
+            if previous is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = previous
+            time.tzset()
+
+        self.addCleanup(restore)
+
+    async def _search_from(self, after):
+        find = AsyncMock(return_value=([], date(2026, 3, 4)))
+        with patch("app.api.public.find_next_available_slots", new=find):
+            await get_next_availability(service_id=1, master_id=None, after=after, limit=1, db=object())
+        return find.await_args.args[2]
+
+    async def test_offset_is_converted_to_salon_time(self):
+        self.assertEqual(await self._search_from("2026-03-04T07:30:00+00:00"), datetime(2026, 3, 4, 10, 30))
+        self.assertEqual(await self._search_from("2026-03-04T12:30:00+05:00"), datetime(2026, 3, 4, 10, 30))
+
+    async def test_naive_value_and_date_are_taken_as_salon_time(self):
+        self.assertEqual(await self._search_from("2026-03-04T10:30:00"), datetime(2026, 3, 4, 10, 30))
+        self.assertEqual(await self._search_from("2026-03-04"), datetime(2026, 3, 4, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
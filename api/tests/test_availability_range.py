@@ -0,0 +1,47 @@
+import unittest
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.services.availability import OccupancyIndex
+from app.utils import compile_availability_rules, get_availability_range
+
+NOW = datetime(2026, 3, 2, 8, 0)
+
+
+class AvailabilityRangeTests(unittest.IsolatedAsyncioTestCase):
+    def _patches(self, occupancy: OccupancyIndex, max_days_ahead: int = 60):
+        rules = compile_availability_rules(
+            {day: [{"start": "10:00", "end": "12:00"}] for day in ("mon", "tue", "wed", "thu", "fri", "sat", "sun")},
+            {"value": 60},
+            {"min_lead_min": 0, "max_days_ahead": max_days_ahead},
+        )
+        load_occupancy = AsyncMock(return_value=occupancy)
+        return load_occupancy, (
+            patch("app.utils._service_exists", new=AsyncMock(return_value=SimpleNamespace(duration_min=60))),
+            patch("app.utils.load_availability_rules", new=AsyncMock(return_value=rules)),
+            patch("app.utils._resolve_master_pool", new=AsyncMock(return_value=[1])),
+            patch("app.utils.load_occupancy", new=load_occupancy),
+        )
+
+    async def test_range_uses_single_bookings_fetch_and_splits_by_day(self):
+        busy = (datetime(2026, 3, 3, 10, 0), datetime(2026, 3, 3, 11, 0), 1)
+        load_occupancy, patches = self._patches(OccupancyIndex([busy]))
+        with patches[0], patches[1], patches[2], patches[3]:
+            result = await get_availability_range(object(), 1, date(2026, 3, 2), date(2026, 3, 4), NOW, master_id=1)
+
+        load_occupancy.assert_awaited_once()
+        self.assertEqual(list(result), [date(2026, 3, 2), date(2026, 3, 3), date(2026, 3, 4)])
+        self.assertEqual(len(result[date(2026, 3, 2)]), 2)
+        self.assertEqual(result[date(2026, 3, 3)], [(datetime(2026, 3, 3, 11, 0), datetime(2026, 3, 3, 12, 0))])
+
+    async def test_range_is_clamped_to_today_and_max_days_ahead(self):
+        load_occupancy, patches = self._patches(OccupancyIndex(), max_days_ahead=2)
+        with patches[0], patches[1], patches[2], patches[3]:
+            result = await get_availability_range(object(), 1, date(2026, 2, 20), date(2026, 4, 1), NOW)
+
+        self.assertEqual(list(result), [date(2026, 3, 2), date(2026, 3, 3), date(2026, 3, 4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
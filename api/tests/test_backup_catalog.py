@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from app.api import admin as admin_api
+from app.api import telegram as telegram_api
+from app.core.config import settings
+from app.services.backup_catalog import BackupCatalog, BackupEntry, select_retained
+from app.services.backup_service import BackupService
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _entry(moment: datetime, **values) -> BackupEntry:
+    return BackupEntry(filename=f"salon_{moment:%Y%m%d_%H%M%S}.dump.gpg", created_at=moment.isoformat(), size_bytes=100, **values)
+
+
+class RetentionTests(unittest.TestCase):
+    def test_keep_last_plus_daily_weekly_monthly_tiers(self):
+        # One backup a day from 2026-01-01 to 2026-03-01 (a Sunday).
+        entries = [_entry(datetime(2026, 1, 1, 3, 15, tzinfo=timezone.utc) + timedelta(days=day)) for day in range(60)]
+
+        retained = select_retained(entries, keep_last=3, daily=7, weekly=4, monthly=3)
+
+        expected_days = [f"202602{day:02d}" for day in range(23, 29)] + ["20260301"]
+        expected_days += ["20260222", "20260215", "20260208"]  # newest of each earlier ISO week
+        expected_days += ["20260131"]  # newest of January
+        self.assertEqual(retained, {f"salon_{day}_031500.dump.gpg" for day in expected_days})
+
+    def test_tiers_disabled_keeps_only_last_n(self):
+        entries = [_entry(NOW - timedelta(hours=hours)) for hours in range(10)]
+
+        retained = select_retained(entries, keep_last=2, daily=0, weekly=0, monthly=0)
+
+        self.assertEqual(retained, {entries[0].filename, entries[1].filename})
+
+
+class BackupCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.backup_dir = Path(self._tmp.name)
+        self.restore_dir = self.backup_dir / "restores"
+        self.restore_dir.mkdir()
+
+    def _write_backup(self, moment: datetime) -> BackupEntry:
+        entry = _entry(moment, sha256="abc", format="custom", source="scheduled")
+        path = self.backup_dir / entry.filename
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (moment.timestamp(), moment.timestamp()))
+        return entry
+
+    def test_first_load_indexes_existing_files(self):
+        entries = [self._write_backup(NOW - timedelta(days=days)) for days in range(3)]
+
+        catalog = BackupCatalog(self.backup_dir, self.restore_dir)
+
+        self.assertEqual([entry.filename for entry in catalog.entries()], [entry.filename for entry in entries])
+        self.assertTrue(catalog.path.exists())
+
+    def test_records_survive_reload_and_resolve_by_id(self):
+        catalog = BackupCatalog(self.backup_dir, self.restore_dir)
+        older = self._write_backup(NOW - timedelta(days=1))
+        newer = self._write_backup(NOW)
+        catalog.record(older)
+        catalog.record(newer)
+
+        reloaded = BackupCatalog(self.backup_dir, self.restore_dir)
+
+        self.assertEqual(reloaded.latest(), newer)
+        self.assertEqual(reloaded.get(older.id), older)
+        self.assertEqual(reloaded.page(offset=1, limit=5), ([older], 2))
+
+    def test_scan_reconciles_applies_retention_and_cleans_restore_uploads(self):
+        catalog = BackupCatalog(self.backup_dir, self.restore_dir)
+        recorded = [self._write_backup(NOW - timedelta(days=days)) for days in range(4)]
+        for entry in recorded:
+            catalog.record(entry)
+        ghost = _entry(NOW - timedelta(days=10))
+        catalog.record(ghost)
+        untracked = self._write_backup(NOW + timedelta(minutes=5))
+        stale_upload = self.restore_dir / "restore_old.gpg"
+        stale_upload.write_bytes(b"old")
+        old = (NOW - timedelta(days=8)).timestamp()
+        os.utime(stale_upload, (old, old))
+        fresh_upload = self.restore_dir / "restore_new.gpg"
+        fresh_upload.write_bytes(b"new")
+
+        summary = catalog.scan(keep_last=3, restore_keep_days=7, now=NOW)
+
+        self.assertEqual(summary["added"], 1)
+        self.assertEqual(summary["missing"], 1)
+        self.assertEqual(summary["removed"], [recorded[2].filename, recorded[3].filename])
+        self.assertEqual(summary["restores_removed"], 1)
+        self.assertEqual([entry.filename for entry in catalog.entries()], [untracked.filename, recorded[0].filename, recorded[1].filename])
+        self.assertEqual(len(catalog.get(untracked.filename).sha256), 64)
+        self.assertFalse((self.backup_dir / recorded[3].filename).exists())
+        self.assertEqual([path.name for path in self.restore_dir.iterdir()], ["restore_new.gpg"])
+
+
+class BackupCatalogApiTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        with patch.object(settings, "backup_dir", self._tmp.name):
+            self.service = BackupService()
+        for day in range(12):
+            self.service.catalog.record(_entry(NOW - timedelta(days=day), format="custom", duration_ms=1500))
+        for patcher in (
+            patch.object(admin_api, "backup_service", self.service),
+            patch.object(telegram_api, "backup_service", self.service),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_admin_endpoint_pages_catalog(self):
+        page = await admin_api.list_backups(limit=5, offset=10, _=None)
+
+        self.assertEqual(page["total"], 12)
+        self.assertEqual([item["created_at"] for item in page["items"]], [(NOW - timedelta(days=day)).isoformat() for day in (10, 11)])
+        validated = admin_api.BackupCatalogOut.model_validate(page)
+        self.assertEqual(validated.items[0].duration_ms, 1500)
+        self.assertNotIn("path", validated.items[0].model_dump())
+
+    async def test_telegram_list_has_pick_buttons_and_navigation(self):
+        send = AsyncMock()
+        with patch.object(telegram_api, "send_message", new=send):
+            await telegram_api._handle_backup_callback(None, "bk:list:1", {"chat": {"id": 7}}, actor_tg_user_id=7)
+
+        rows = send.await_args.kwargs["reply_markup"]["inline_keyboard"]
+        picks = [row[0]["callback_data"] for row in rows[:-1]]
+        self.assertEqual(picks, [f"bk:pick:{entry.id}" for entry in self.service.catalog.entries()[5:10]])
+        self.assertEqual([button["callback_data"] for button in rows[-1]], ["bk:list:0", "bk:list:2"])
+        self.assertTrue(all(len(callback.encode()) <= 64 for callback in picks))
+
+    async def test_picked_backup_restores_through_catalog(self):
+        entry = self.service.catalog.entries()[3]
+        (Path(self._tmp.name) / entry.filename).write_bytes(b"PGDMP")
+        restore = AsyncMock(return_value={"status": "ok", "file": entry.filename})
+        with patch.object(telegram_api, "send_message", new=AsyncMock()), patch.object(self.service, "restore_from_path", new=restore):
+            await telegram_api._handle_backup_callback(None, f"bk:restore_pick:{entry.id}", {"chat": {"id": 7}}, actor_tg_user_id=7)
+
+        self.assertEqual(restore.await_args.kwargs["path"].name, entry.filename)
+        self.assertEqual(restore.await_args.kwargs["source"], f"catalog:{entry.filename}")
+
+
+if __name__ == "__main__":
+    unittest.main()
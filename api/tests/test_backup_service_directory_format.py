@@ -0,0 +1,153 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from app.core.config import settings
+from app.services.backup_service import BackupService, RestoreExecution
+
+PASSPHRASE = "test-passphrase"
+SCRIPT_PATH = Path(__file__).resolve().parents[1] / "scripts" / "backup_db.sh"
+# Stands in for pg_dump: -Fd writes a directory archive, -Fc prints a custom dump.
+FAKE_PG_DUMP = """#!/usr/bin/env bash
+set -euo pipefail
+echo "$@" >> "$FAKE_PG_DUMP_LOG"
+target=""
+format=""
+while (( $# )); do
+  case "$1" in
+    -f) target="$2"; shift 2 ;;
+    -Fd) format=directory; shift ;;
+    -Fc) format=custom; shift ;;
+    *) shift ;;
+  esac
+done
+if [[ "$format" == "directory" ]]; then
+  mkdir -p "$target"
+  printf 'PGDMP-toc' > "$target/toc.dat"
+  printf 'rows' > "$target/3001.dat.gz"
+else
+  printf 'PGDMP-custom'
+fi
+"""
+
+
+def _directory_tar() -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", format=tarfile.USTAR_FORMAT) as archive:
+        for name, data in (("dump/toc.dat", b"PGDMP-toc"), ("dump/3001.dat.gz", b"rows")):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class DirectoryFormatBackupTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        self.backup_dir = self.root / "backups"
+        gnupg_home = self.root / "gnupg"
+        gnupg_home.mkdir(mode=0o700)
+        patcher = patch.dict(os.environ, {"GNUPGHOME": str(gnupg_home)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        if shutil.which("gpgconf"):
+            self.addCleanup(subprocess.run, ["gpgconf", "--homedir", str(gnupg_home), "--kill", "all"], capture_output=True)
+        with patch.object(settings, "backup_dir", str(self.backup_dir)):
+            self.service = BackupService()
+
+    def _require(self, *tools: str) -> None:
+        missing = [tool for tool in tools if shutil.which(tool) is None]
+        if missing:
+            self.skipTest(f"{', '.join(missing)} not installed")
+
+    def _run_script(self, backup_format: str) -> dict:
+        self._require("bash", "gpg", "tar")
+        bin_dir = self.root / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        fake = bin_dir / "pg_dump"
+        fake.write_text(FAKE_PG_DUMP, encoding="utf-8")
+        fake.chmod(0o755)
+        env = {
+            **os.environ,
+            "PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}",
+            "FAKE_PG_DUMP_LOG": str(self.root / "pg_dump.log"),
+            "DATABASE_URL": "postgresql+asyncpg://salon:secret@db:5432/salon",
+            "BACKUP_DIR": str(self.backup_dir),
+            "BACKUP_PASSPHRASE": PASSPHRASE,
+            "BACKUP_FORMAT": backup_format,
+            "BACKUP_JOBS": "3",
+        }
+        subprocess.run(["bash", str(SCRIPT_PATH)], env=env, check=True, capture_output=True)
+        return json.loads((self.backup_dir / "last_backup.json").read_text(encoding="utf-8"))
+
+    def test_header_detection(self):
+        self.assertEqual(self.service._dump_format_from_header(_directory_tar()[:512]), "directory")
+        self.assertEqual(self.service._dump_format_from_header(b"PGDMP" + b"\0" * 300), "custom")
+        self.assertEqual(self.service._dump_format_from_header(b"--\n-- PostgreSQL database dump\n" * 20), "plain_sql")
+
+    def test_script_packs_parallel_directory_dump_into_one_artifact(self):
+        metadata = self._run_script("directory")
+
+        self.assertTrue(metadata["filename"].endswith(".dir.tar.gpg"))
+        self.assertEqual(metadata["format"], "directory")
+        self.assertEqual(metadata["jobs"], 3)
+        self.assertEqual(set(metadata["timings_ms"]), {"dump", "package", "total"})
+        self.assertIn("-Fd -j 3", (self.root / "pg_dump.log").read_text(encoding="utf-8"))
+        self.assertEqual(sorted(path.name for path in self.backup_dir.iterdir() if path.is_file() and not path.name.startswith(("last_", "."))), [metadata["filename"]])
+        self.assertFalse(list(self.backup_dir.glob(".work_*")))
+        self.assertEqual(self.service.get_latest_metadata()["path"], metadata["path"])
+
+    def test_script_keeps_custom_format_by_default(self):
+        metadata = self._run_script("custom")
+
+        self.assertTrue(metadata["filename"].endswith(".dump.gpg"))
+        self.assertEqual(metadata["jobs"], 1)
+
+    async def test_restore_unpacks_and_runs_parallel_pg_restore(self):
+        metadata = self._run_script("directory")
+        commands: list[list[str]] = []
+        unpacked: list[list[str]] = []
+        run_restore_command = self.service._run_restore_command
+
+        async def fake_run(dump_format, command, env, stream):
+            if dump_format == "directory_unpack":
+                return await run_restore_command(dump_format, command, env, stream)
+            commands.append(command)
+            unpacked.append(sorted(path.name for path in Path(command[-1]).iterdir()))
+            return RestoreExecution(stdout="", stderr="", returncode=0)
+
+        for streaming in (True, False):
+            with (
+                patch.object(settings, "backup_restore_streaming", streaming),
+                patch.object(settings, "backup_jobs", 6),
+                patch.object(settings, "backup_passphrase", PASSPHRASE),
+                patch.object(settings, "backup_env_path", str(self.root / "missing.env")),
+                patch("app.services.backup_service.dispose_engine", new=AsyncMock()),
+                patch.object(self.service, "_log_pg_runtime_versions", new=AsyncMock()),
+                patch.object(self.service, "_prepare_restore_target", new=AsyncMock()),
+                patch.object(self.service, "_run_restore_command", new=fake_run),
+                patch.object(self.service, "_health_check_db", new=AsyncMock()),
+                patch.object(self.service, "_verify_restored_schema", new=AsyncMock()),
+            ):
+                result = await self.service._restore_from_file(Path(metadata["path"]))
+            self.assertEqual(result.file_type, "directory")
+
+        self.assertEqual(len(commands), 2)
+        for command, names in zip(commands, unpacked):
+            self.assertEqual(command[0], "pg_restore")
+            self.assertIn("--format=directory", command)
+            self.assertEqual(command[command.index("--jobs") + 1], "6")
+            self.assertEqual(names, ["3001.dat.gz", "toc.dat"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import gzip
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from app.core.config import settings
+from app.services.backup_service import BackupService, RestoreExecution, RestoreStream, SqlTimeoutSetFilter
+
+PASSPHRASE = "test-passphrase"
+SQL_DUMP = (
+    b"SET statement_timeout = 0;\n"
+    b"SET transaction_timeout = 0;\n"
+    b"CREATE TABLE public.services (id integer);\n"
+    + b"".join(b"INSERT INTO public.services VALUES (%d);\n" % index for index in range(2000))
+)
+
+
+async def _collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def _chunked(data: bytes, size: int):
+    for offset in range(0, len(data), size):
+        yield data[offset : offset + size]
+
+
+class RestoreStreamingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        gnupg_home = self.root / "gnupg"
+        gnupg_home.mkdir(mode=0o700)
+        patcher = patch.dict(os.environ, {"GNUPGHOME": str(gnupg_home)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        if shutil.which("gpgconf"):
+            self.addCleanup(subprocess.run, ["gpgconf", "--homedir", str(gnupg_home), "--kill", "all"], capture_output=True)
+
+    def _encrypt(self, source: Path) -> Path:
+        if shutil.which("gpg") is None:
+            self.skipTest("gpg is not installed")
+        target = source.with_name(source.name + ".gpg")
+        subprocess.run(
+            ["gpg", "--batch", "--yes", "--symmetric", "--pinentry-mode", "loopback", "--passphrase", PASSPHRASE, "-o", str(target), str(source)],
+            check=True,
+            capture_output=True,
+        )
+        return target
+
+    def _gzipped_sql(self) -> Path:
+        path = self.root / "salon.sql.gz"
+        path.write_bytes(gzip.compress(SQL_DUMP[:5000]) + gzip.compress(SQL_DUMP[5000:]))
+        return path
+
+    async def test_stream_decrypts_and_inflates_without_temp_files(self):
+        encrypted = self._encrypt(self._gzipped_sql())
+        stream = RestoreStream(encrypted, PASSPHRASE, chunk_size=512)
+        try:
+            header = await stream.open()
+            data = await _collect(stream.chunks())
+        finally:
+            await stream.close()
+
+        self.assertTrue(stream.encrypted and stream.compressed)
+        self.assertTrue(SQL_DUMP.startswith(header))
+        self.assertEqual(data, SQL_DUMP)
+        self.assertEqual(sorted(path.name for path in self.root.iterdir()), ["gnupg", "salon.sql.gz", "salon.sql.gz.gpg"])
+
+    async def test_wrong_passphrase_fails_before_any_data(self):
+        stream = RestoreStream(self._encrypt(self._gzipped_sql()), "wrong")
+        try:
+            with self.assertRaises(RuntimeError) as context:
+                await stream.open()
+        finally:
+            await stream.close()
+
+        self.assertIn("during decrypt", str(context.exception))
+
+    async def test_filter_matches_file_filter_across_chunk_boundaries(self):
+        service = BackupService.__new__(BackupService)
+        source = self.root / "dump.sql"
+        target = self.root / "filtered.sql"
+        source.write_bytes(SQL_DUMP)
+        expected_removed = service._filter_incompatible_sql_settings(source_path=source, target_path=target)
+
+        for size in (7, 40, 4096):
+            sql_filter = SqlTimeoutSetFilter(service._should_remove_timeout_set)
+            data = await _collect(sql_filter.filter(_chunked(SQL_DUMP, size)))
+            self.assertEqual(data, target.read_bytes())
+            self.assertEqual(sql_filter.removed, expected_removed)
+        self.assertEqual(expected_removed, 1)
+
+    async def test_consumer_exiting_early_does_not_hang(self):
+        service = BackupService.__new__(BackupService)
+        execution = await service._run_restore_command("plain_sql", ["sh", "-c", "head -c 10 >/dev/null; echo boom >&2; exit 3"], dict(os.environ), _chunked(SQL_DUMP * 50, 4096))
+
+        self.assertEqual(execution.returncode, 3)
+        self.assertEqual(execution.stderr, "boom")
+
+    async def test_restore_pipes_filtered_sql_into_psql_stdin(self):
+        encrypted = self._encrypt(self._gzipped_sql())
+        with patch.object(settings, "backup_dir", str(self.root / "backups")):
+            service = BackupService()
+        piped: list[bytes] = []
+
+        async def fake_run(dump_format, command, env, stream):
+            piped.append(await _collect(stream))
+            return RestoreExecution(stdout="", stderr="", returncode=0)
+
+        with (
+            patch.object(settings, "backup_restore_streaming", True),
+            patch.object(settings, "backup_passphrase", PASSPHRASE),
+            patch.object(settings, "backup_env_path", str(self.root / "missing.env")),
+            patch("app.services.backup_service.tempfile.TemporaryDirectory", side_effect=AssertionError("temp dir used")),
+            patch("app.services.backup_service.dispose_engine", new=AsyncMock()),
+            patch.object(service, "_log_pg_runtime_versions", new=AsyncMock()),
+            patch.object(service, "_ensure_restore_runtime_compatibility", new=AsyncMock()),
+            patch.object(service, "_terminate_other_db_connections", new=AsyncMock()),
+            patch.object(service, "_reset_public_schema", new=AsyncMock()),
+            patch.object(service, "_run_restore_command", new=fake_run),
+            patch.object(service, "_health_check_db", new=AsyncMock()),
+            patch.object(service, "_verify_restored_schema", new=AsyncMock()),
+        ):
+            result = await service._restore_from_file(encrypted)
+
+        self.assertEqual(result.file_type, "plain_sql")
+        self.assertEqual(result.removed_incompatible_sets, 1)
+        self.assertNotIn(b"transaction_timeout", piped[0])
+        self.assertIn(b"SET statement_timeout = 0;\n", piped[0])
+
+    async def test_bad_passphrase_keeps_schema_untouched(self):
+        encrypted = self._encrypt(self._gzipped_sql())
+        with patch.object(settings, "backup_dir", str(self.root / "backups")):
+            service = BackupService()
+        reset = AsyncMock()
+
+        with (
+            patch.object(settings, "backup_restore_streaming", True),
+            patch.object(settings, "backup_passphrase", "wrong"),
+            patch.object(settings, "backup_env_path", str(self.root / "missing.env")),
+            patch("app.services.backup_service.dispose_engine", new=AsyncMock()),
+            patch.object(service, "_log_pg_runtime_versions", new=AsyncMock()),
+            patch.object(service, "_reset_public_schema", new=reset),
+        ):
+            with self.assertRaises(RuntimeError):
+                await service._restore_from_file(encrypted)
+
+        reset.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.core.config import settings
+from app.services.backup_service import BackupService, RestoreExecution
+
+DATABASE_URL = "postgresql+asyncpg://salon:secret@db:5432/salon"
+
+
+class ShadowRestoreTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        root = Path(self._tmp.name)
+        with patch.object(settings, "backup_dir", str(root / "backups")):
+            self.service = BackupService()
+        self.dump_path = root / "salon.dump"
+        self.dump_path.write_bytes(b"PGDMP" + b"\0" * 400)
+        self.admin_sql: list[tuple[str, str, bool]] = []
+        self.loaded: list[tuple[str, bool]] = []
+        self.verified: list[tuple[str, bool]] = []
+        self.fail_step: str | None = None
+        self.reinitialize = Mock()
+
+        async def fake_admin_sql(db_host, db_port, db_user, env, sql, step):
+            self.admin_sql.append((step, sql, self.service.is_maintenance))
+            if step == self.fail_step:
+                raise RuntimeError(f"Restore failed during {step}: boom")
+            return ""
+
+        async def fake_run(dump_format, command, env, stream):
+            self.loaded.append((command[command.index("-d") + 1], self.service.is_maintenance))
+            return RestoreExecution(stdout="", stderr="", returncode=0)
+
+        async def fake_verify(db_host, db_port, db_user, db_name, env):
+            self.verified.append((db_name, self.service.is_maintenance))
+            if self.fail_step == "verify":
+                raise RuntimeError("Restore verify failed: table public.bookings missing or unreadable: ")
+
+        self.reset_schema = AsyncMock()
+        self.cache_resets: list[tuple[bool, int]] = []
+        for patcher in (
+            patch.object(settings, "backup_restore_mode", "shadow"),
+            patch.object(settings, "backup_restore_streaming", True),
+            patch.object(settings, "backup_restore_keep_previous_db", False),
+            patch.object(settings, "database_url", DATABASE_URL),
+            patch.object(settings, "backup_env_path", str(root / "missing.env")),
+            patch("app.services.backup_service.dispose_engine", new=AsyncMock()),
+            patch("app.services.backup_service.reinitialize_engine", new=self.reinitialize),
+            patch.object(self.service, "_log_pg_runtime_versions", new=AsyncMock()),
+            patch.object(self.service, "_ensure_restore_runtime_compatibility", new=AsyncMock()),
+            patch.object(self.service, "_reset_public_schema", new=self.reset_schema),
+            patch.object(self.service, "_run_admin_sql", new=fake_admin_sql),
+            patch.object(self.service, "_run_restore_command", new=fake_run),
+            patch.object(self.service, "_health_check_db", new=AsyncMock()),
+            patch.object(self.service, "_verify_restored_schema", new=fake_verify),
+            patch.object(
+                self.service,
+                "_reset_db_caches",
+                new=lambda: self.cache_resets.append((self.service.is_maintenance, len(self.admin_sql))),
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_loads_and_verifies_shadow_then_swaps_under_maintenance(self):
+        result = await self.service.restore_from_path(self.dump_path, actor_tg_user_id=7, source="test")
+
+        self.assertEqual(self.loaded, [("salon_restore_shadow", False)])
+        self.assertEqual(self.verified, [("salon_restore_shadow", False)])
+        self.reset_schema.assert_not_awaited()
+        steps = [(step, maintenance) for step, _, maintenance in self.admin_sql]
+        self.assertEqual(
+            steps,
+            [
+                ("shadow_drop", False),
+                ("shadow_create", False),
+                ("swap_prepare", False),
+                ("swap_lock", True),
+                ("swap_terminate", True),
+                ("swap_rename", True),
+                ("drop", False),
+            ],
+        )
+        rename_sql = dict((step, sql) for step, sql, _ in self.admin_sql)["swap_rename"]
+        self.assertIn('ALTER DATABASE "salon" RENAME TO "salon_pre_restore"', rename_sql)
+        self.assertIn('ALTER DATABASE "salon_restore_shadow" RENAME TO "salon"', rename_sql)
+        self.assertTrue(rename_sql.startswith("BEGIN;") and rename_sql.endswith("COMMIT;"))
+        self.assertIn('"salon_pre_restore"', self.admin_sql[-1][1])
+        self.reinitialize.assert_called_once()
+        # Caches are reset under maintenance, right after the rename and before the old database is dropped.
+        self.assertEqual(self.cache_resets[0], (True, 6))
+        self.assertFalse(self.service.is_maintenance)
+        self.assertEqual(result["status"], "ok")
+        self.assertLessEqual(result["maintenance_seconds"], result["duration_seconds"])
+
+    async def test_failed_verification_drops_shadow_and_keeps_live_database(self):
+        self.fail_step = "verify"
+
+        with self.assertRaises(RuntimeError):
+            await self.service.restore_from_path(self.dump_path, actor_tg_user_id=7, source="test")
+
+        steps = [step for step, _, _ in self.admin_sql]
+        self.assertEqual(steps, ["shadow_drop", "shadow_create", "drop"])
+        self.assertIn('"salon_restore_shadow"', self.admin_sql[-1][1])
+        self.assertFalse(any(maintenance for _, _, maintenance in self.admin_sql))
+        self.reinitialize.assert_not_called()
+
+    async def test_failed_rename_reopens_live_database(self):
+        self.fail_step = "swap_rename"
+
+        with self.assertRaises(RuntimeError):
+            await self.service.restore_from_path(self.dump_path, actor_tg_user_id=7, source="test")
+
+        steps = [step for step, _, _ in self.admin_sql]
+        self.assertEqual(steps[-3:], ["swap_rename", "swap_unlock", "drop"])
+        self.assertIn('ALTER DATABASE "salon" WITH ALLOW_CONNECTIONS true', self.admin_sql[-2][1])
+        self.reinitialize.assert_called_once()
+        self.assertFalse(self.service.is_maintenance)
+
+    def test_shadow_name_must_fit_postgres_identifier_limit(self):
+        self.assertEqual(BackupService._shadow_db_name("salon"), "salon_restore_shadow")
+        with self.assertRaises(RuntimeError):
+            BackupService._shadow_db_name("x" * 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.backup_throttle import LEVEL_FULL, LEVEL_PAUSED, LEVEL_SLOW, BackupThrottle, next_level
+from app.services.request_latency import RequestLatencyWindow
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+THROTTLE_PIPE = SCRIPTS_DIR / "throttle_pipe.py"
+FAKE_PG_DUMP = """#!/usr/bin/env bash
+echo "$@" >> "$FAKE_PG_DUMP_LOG"
+head -c 300000 /dev/zero
+"""
+
+
+class RequestLatencyWindowTests(unittest.TestCase):
+    def test_p95_needs_enough_recent_samples(self):
+        window = RequestLatencyWindow(window_seconds=10, max_samples=1000, min_samples=20)
+        for index in range(19):
+            window.record(float(index + 1), now=100.0)
+        self.assertIsNone(window.p95(now=100.0))
+
+        window.record(20.0, now=100.0)
+        self.assertEqual(window.p95(now=100.0), 19.0)
+        self.assertIsNone(window.p95(now=111.0))
+        self.assertEqual(window.stats()["recorded"], 20)
+
+
+class ThrottleLevelTests(unittest.TestCase):
+    def test_levels_follow_p95_with_hysteresis(self):
+        self.assertEqual(next_level(LEVEL_FULL, None, 500, 0, 300), LEVEL_FULL)
+        self.assertEqual(next_level(LEVEL_FULL, 499, 500, 0, 300), LEVEL_FULL)
+        self.assertEqual(next_level(LEVEL_FULL, 500, 500, 0, 300), LEVEL_SLOW)
+        self.assertEqual(next_level(LEVEL_FULL, 1000, 500, 0, 300), LEVEL_PAUSED)
+        self.assertEqual(next_level(LEVEL_SLOW, 450, 500, 0, 300), LEVEL_SLOW)
+        self.assertEqual(next_level(LEVEL_SLOW, 390, 500, 0, 300), LEVEL_FULL)
+        self.assertEqual(next_level(LEVEL_PAUSED, 850, 500, 0, 300), LEVEL_PAUSED)
+        self.assertEqual(next_level(LEVEL_PAUSED, 700, 500, 0, 300), LEVEL_SLOW)
+
+    def test_pause_budget_is_shared_per_backup(self):
+        self.assertEqual(next_level(LEVEL_PAUSED, 2000, 500, 300, 300), LEVEL_SLOW)
+        self.assertEqual(next_level(LEVEL_SLOW, 2000, 500, 300, 300), LEVEL_SLOW)
+        self.assertEqual(next_level(LEVEL_PAUSED, 900, 500, 300, 300), LEVEL_SLOW)
+
+    def test_disabled_threshold_never_throttles(self):
+        self.assertEqual(next_level(LEVEL_SLOW, 5000, 0, 0, 300), LEVEL_FULL)
+
+
+class BackupThrottleTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.control = Path(self._tmp.name) / ".throttle"
+        self.latency = RequestLatencyWindow(window_seconds=60, max_samples=1000, min_samples=1)
+        for patcher in (
+            patch.object(settings, "backup_throttle_rate_bytes", 4 * 1024 * 1024),
+            patch.object(settings, "backup_throttle_p95_ms", 500.0),
+            patch.object(settings, "backup_throttle_max_pause_seconds", 2.0),
+            patch.object(settings, "backup_throttle_check_seconds", 3600.0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.throttle = BackupThrottle(self.control, self.latency)
+
+    async def test_control_file_tracks_levels_and_stop_reports_impact(self):
+        self.latency.record(100.0)
+        self.throttle.start()
+        self.assertEqual(self.control.read_text(), str(4 * 1024 * 1024))
+
+        for _ in range(10):
+            self.latency.record(600.0)
+        self.assertEqual(self.throttle.tick(1.0), LEVEL_SLOW)
+        self.assertEqual(self.control.read_text(), str(1024 * 1024))
+
+        for _ in range(100):
+            self.latency.record(1200.0)
+        self.assertEqual(self.throttle.tick(1.0), LEVEL_PAUSED)
+        self.assertEqual(self.control.read_text(), "pause")
+        self.throttle.tick(1.0)
+        self.assertEqual(self.throttle.tick(1.0), LEVEL_SLOW)
+
+        impact = await self.throttle.stop()
+
+        self.assertFalse(self.control.exists())
+        self.assertEqual(impact["baseline_p95_ms"], 100.0)
+        self.assertEqual(impact["max_p95_ms"], 1200.0)
+        self.assertEqual(impact["paused_seconds"], 2.0)
+        self.assertEqual(impact["slow_seconds"], 1.0)
+        self.assertEqual(impact["level_changes"], 3)
+        self.assertEqual(self.throttle.stats()["last_run"], impact)
+
+    async def test_script_env_passes_priorities_and_control_file(self):
+        env = self.throttle.script_env()
+
+        self.assertEqual(env["BACKUP_NICE"], str(settings.backup_throttle_nice))
+        self.assertEqual(env["BACKUP_RATE_LIMIT_BYTES"], str(4 * 1024 * 1024))
+        self.assertEqual(env["BACKUP_THROTTLE_FILE"], str(self.control))
+
+
+class ThrottlePipeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+
+    def test_rate_cap_paces_the_stream(self):
+        payload = os.urandom(200 * 1024)
+        started = time.monotonic()
+        result = subprocess.run([sys.executable, str(THROTTLE_PIPE), "--rate", str(400 * 1024)], input=payload, capture_output=True, check=True)
+
+        self.assertEqual(result.stdout, payload)
+        self.assertGreaterEqual(time.monotonic() - started, 0.4)
+
+    def test_pause_holds_data_until_control_file_changes(self):
+        control = self.root / ".throttle"
+        control.write_text("pause", encoding="utf-8")
+        process = subprocess.Popen(
+            [sys.executable, str(THROTTLE_PIPE), "--control-file", str(control)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self.addCleanup(process.kill)
+        process.stdin.write(b"x" * 1000)
+        process.stdin.close()
+        time.sleep(0.6)
+        self.assertIsNone(process.poll())
+
+        control.write_text("unlimited", encoding="utf-8")
+        os.utime(control, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        output = process.stdout.read()
+        process.stdout.close()
+
+        self.assertEqual(output, b"x" * 1000)
+        self.assertEqual(process.wait(timeout=5), 0)
+
+    def test_backup_script_runs_through_the_throttled_pipe(self):
+        missing = [tool for tool in ("bash", "gpg") if shutil.which(tool) is None]
+        if missing:
+            self.skipTest(f"{', '.join(missing)} not installed")
+        bin_dir = self.root / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "pg_dump"
+        fake.write_text(FAKE_PG_DUMP, encoding="utf-8")
+        fake.chmod(0o755)
+        gnupg_home = self.root / "gnupg"
+        gnupg_home.mkdir(mode=0o700)
+        if shutil.which("gpgconf"):
+            self.addCleanup(subprocess.run, ["gpgconf", "--homedir", str(gnupg_home), "--kill", "all"], capture_output=True)
+        backup_dir = self.root / "backups"
+        control = backup_dir / ".throttle"
+        backup_dir.mkdir()
+        control.write_text(str(1024 * 1024), encoding="utf-8")
+        env = {
+            **os.environ,
+            "PATH": f"{bin_dir}{os.pathsep}{Path(sys.executable).parent}{os.pathsep}{os.environ['PATH']}",
+            "GNUPGHOME": str(gnupg_home),
+            "FAKE_PG_DUMP_LOG": str(self.root / "pg_dump.log"),
+            "DATABASE_URL": "postgresql+asyncpg://salon:secret@db:5432/salon",
+            "BACKUP_DIR": str(backup_dir),
+            "BACKUP_PASSPHRASE": "test-passphrase",
+            "BACKUP_NICE": "10",
+            "BACKUP_IONICE_CLASS": "3",
+            "BACKUP_RATE_LIMIT_BYTES": str(1024 * 1024),
+            "BACKUP_THROTTLE_FILE": str(control),
+        }
+
+        subprocess.run(["bash", str(SCRIPTS_DIR / "backup_db.sh")], env=env, check=True, capture_output=True)
+
+        metadata = json.loads((backup_dir / "last_backup.json").read_text(encoding="utf-8"))
+        decrypted = subprocess.run(
+            ["gpg", "--batch", "--quiet", "--pinentry-mode", "loopback", "--passphrase", "test-passphrase", "-d", metadata["path"]],
+            env=env,
+            capture_output=True,
+            check=True,
+        )
+        self.assertEqual(decrypted.stdout, b"\0" * 300000)
+        self.assertGreaterEqual(metadata["timings_ms"]["dump"], 200)
+
+
+class RequestLatencyMiddlewareTests(unittest.IsolatedAsyncioTestCase):
+    async def test_records_api_requests_but_not_health_checks(self):
+        import httpx
+
+        from app.main import app
+
+        window = RequestLatencyWindow(window_seconds=60, max_samples=100, min_samples=1)
+        with patch("app.main.request_latency", window):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                await client.get("/health")
+                await client.get("/no-such-route")
+
+        self.assertEqual(window.recorded, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import unittest
+import uuid
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from app.services.bookings import flush_booking, resolve_available_slot
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+PARALLEL_REQUESTS = 200
+
+
+def _integrity_error(message: str) -> IntegrityError:
+    return IntegrityError("INSERT INTO bookings ...", {}, Exception(message))
+
+
+class BookingOverlapMappingTests(unittest.IsolatedAsyncioTestCase):
+    async def test_exclusion_violation_becomes_slot_busy(self):
+        db = MagicMock(flush=AsyncMock(side_effect=_integrity_error('conflicting key value violates exclusion constraint "ex_bookings_master_no_overlap"')))
+
+        with self.assertRaises(HTTPException) as ctx:
+            await flush_booking(db)
+
+        self.assertEqual((ctx.exception.status_code, ctx.exception.detail), (400, "slot busy"))
+
+    async def test_other_integrity_errors_are_not_masked(self):
+        db = MagicMock(flush=AsyncMock(side_effect=_integrity_error("violates foreign key constraint")))
+
+        with self.assertRaises(IntegrityError):
+            await flush_booking(db)
+
+    async def test_availability_check_runs_under_day_lock(self):
+        db = MagicMock(execute=AsyncMock())
+        start = datetime(2026, 3, 3, 10, 0)
+        with patch("app.services.bookings.get_availability_slots", new=AsyncMock(return_value=[(start, start + timedelta(hours=1))])):
+            await resolve_available_slot(db, 1, start, datetime(2026, 3, 2, 9, 0))
+
+        statement, params = db.execute.await_args.args
+        self.assertIn("pg_advisory_xact_lock", str(statement))
+        self.assertEqual(params["day"], date(2026, 3, 3).toordinal())
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set (needs a migrated Postgres)")
+class BookingOverlapConcurrencyTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        import httpx
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from app.db import get_db
+        from app.main import app
+        from app.models import Master, Service, ServiceCategory
+
+        self.engine = create_async_engine(TEST_DATABASE_URL, pool_size=20, max_overflow=0)
+        self.sessions = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+
+        async def override_get_db():
+            async with self.sessions() as session:
+                async with session.begin():
+                    yield session
+
+        suffix = uuid.uuid4().hex[:8]
+        async with self.sessions() as session:
+            async with session.begin():
+                self.category = ServiceCategory(title=f"overlap-{suffix}", slug=f"overlap-{suffix}")
+                self.service = Service(
+                    category=self.category,
+                    title=f"overlap-{suffix}",
+                    slug=f"overlap-{suffix}",
+                    short_description="",
+                    description="",
+                    duration_min=60,
+                    price_from=0,
+                )
+                self.master = Master(name=f"overlap-{suffix}", slug=f"overlap-{suffix}", is_active=True)
+                self.master.services = [self.service]
+                session.add_all([self.category, self.service, self.master])
+
+        self.app = app
+        app.dependency_overrides[get_db] = override_get_db
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self) -> None:
+        from sqlalchemy import delete
+
+        from app.db import get_db
+        from app.models import Booking, Notification, master_services
+
+        await self.client.aclose()
+        self.app.dependency_overrides.pop(get_db, None)
+        async with self.sessions() as session:
+            async with session.begin():
+                await session.execute(delete(Booking).where(Booking.service_id == self.service.id))
+                await session.execute(delete(Notification).where(Notification.payload["service_id"].as_integer() == self.service.id))
+                await session.execute(delete(master_services).where(master_services.c.master_id == self.master.id))
+                await session.delete(await session.get(type(self.master), self.master.id))
+                await session.delete(await session.get(type(self.service), self.service.id))
+                await session.delete(await session.get(type(self.category), self.category.id))
+        await self.engine.dispose()
+
+    async def test_parallel_bookings_for_one_slot_create_exactly_one(self):
+        starts_at = datetime.combine(date.today() + timedelta(days=1), datetime.min.time()).replace(hour=12)
+        payload = {
+            "client_name": "Overlap",
+            "client_phone": "+70000000000",
+            "service_id": self.service.id,
+            "master_id": self.master.id,
+            "starts_at": starts_at.isoformat(),
+        }
+
+        responses = await asyncio.gather(*(self.client.post("/public/bookings", json=payload) for _ in range(PARALLEL_REQUESTS)))
+
+        statuses = [response.status_code for response in responses]
+        self.assertEqual(statuses.count(200), 1, statuses)
+        self.assertTrue(all(response.json()["detail"] == "slot busy" for response in responses if response.status_code != 200))
+
+    async def test_constraint_rejects_overlap_that_skips_the_api(self):
+        from app.models import Booking, BookingStatus
+
+        starts_at = datetime.combine(date.today() + timedelta(days=2), datetime.min.time()).replace(hour=12)
+
+        def booking(offset_min: int) -> Booking:
+            begin = starts_at + timedelta(minutes=offset_min)
+            return Booking(
+                client_name="Overlap",
+                client_phone="+70000000000",
+                service_id=self.service.id,
+                master_id=self.master.id,
+                starts_at=begin,
+                ends_at=begin + timedelta(hours=1),
+                status=BookingStatus.new,
+            )
+
+        async with self.sessions() as session:
+            async with session.begin():
+                session.add(booking(0))
+        with self.assertRaises(HTTPException):
+            async with self.sessions() as session:
+                async with session.begin():
+                    session.add(booking(30))
+                    await flush_booking(session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import time
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import Delete, Insert
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.evaluator import _EvaluatorCompiler
+
+from app.models import TelegramProcessedUpdate
+from app.services.master_agenda import MasterAgenda, load_master_agendas, send_master_agendas
+from app.services.telegram_dedup import DEDUP_BACKEND_POSTGRES, TelegramDedup
+from app.services.telegram_outbox import OUTBOX_MASTER_AGENDA
+
+from fake_db import FakeDatabase
+
+DAY = date(2026, 3, 14)
+
+
+def _booking(booking_id: int, master_id: int, hour: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=booking_id,
+        master_id=master_id,
+        master=SimpleNamespace(telegram_chat_id=1000 + master_id),
+        service=SimpleNamespace(title="Массаж"),
+        service_id=1,
+        starts_at=datetime(2026, 3, 14, hour),
+        ends_at=datetime(2026, 3, 14, hour + 1),
+        client_name=f"Клиент {booking_id}",
+        client_phone="+79990000000",
+        comment=None,
+    )
+
+
+class ProcessedUpdatesTable:
+    # In-memory telegram_processed_updates for AsyncSessionLocal: inserts claim a key once,
+    # deletes are evaluated in Python against the statement's own WHERE clause.
+
+    def __init__(self) -> None:
+        self.rows: dict[str, TelegramProcessedUpdate] = {}
+
+    def __call__(self) -> "ProcessedUpdatesTable":
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def begin(self) -> "ProcessedUpdatesTable":
+        return self
+
+    def age(self, delta: timedelta) -> None:
+        for row in self.rows.values():
+            row.seen_at -= delta
+
+    async def execute(self, statement, *args, **kwargs):
+        result = MagicMock()
+        if isinstance(statement, Insert):
+            key = statement.compile().params["key"]
+            claimed = key not in self.rows
+            if claimed:
+                self.rows[key] = TelegramProcessedUpdate(key=key, seen_at=datetime.now(timezone.utc))
+            result.scalar_one_or_none.return_value = key if claimed else None
+        elif isinstance(statement, Delete):
+            matches = _EvaluatorCompiler(TelegramProcessedUpdate).process(statement.whereclause)
+            doomed = [key for key, row in self.rows.items() if matches(row)]
+            for key in doomed:
+                del self.rows[key]
+            result.rowcount = len(doomed)
+        return result
+
+
+class MasterAgendaTests(unittest.IsolatedAsyncioTestCase):
+    async def test_all_masters_come_from_one_query(self):
+        db = MagicMock()
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = [_booking(1, 7, 10), _booking(2, 7, 12), _booking(3, 9, 11)]
+        db.execute = AsyncMock(return_value=result)
+
+        agendas = await load_master_agendas(db, DAY)
+
+        self.assertEqual(db.execute.await_count, 1)
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("JOIN masters", sql)
+        self.assertIn("JOIN services", sql)
+        self.assertEqual([(agenda.master_id, agenda.chat_id, agenda.bookings) for agenda in agendas], [(7, 1007, 2), (9, 1009, 1)])
+        self.assertEqual(
+            agendas[0].text.splitlines(),
+            [
+                "📅 Ваши записи на 14.03.2026",
+                "10:00–11:00 · Массаж · Клиент 1 (+79990000000)",
+                "12:00–13:00 · Массаж · Клиент 2 (+79990000000)",
+                "Всего: 2",
+            ],
+        )
+
+    async def test_agendas_are_queued_in_the_claiming_transaction(self):
+        agendas = [MasterAgenda(master_id=index, chat_id=1000 + index, text=f"agenda {index}", bookings=1) for index in range(3)]
+        database = FakeDatabase()
+        queued = []
+
+        async def enqueue(db, kind, booking_id, payload):
+            queued.append((database.open_transactions, kind, booking_id, payload))
+
+        with (
+            patch("app.db.AsyncSessionLocal", new=database),
+            patch("app.services.master_agenda._claim_day", new=AsyncMock(return_value=True)),
+            patch("app.services.master_agenda.load_master_agendas", new=AsyncMock(return_value=agendas)),
+            patch("app.services.master_agenda.enqueue_telegram_message", new=enqueue),
+        ):
+            summary = await send_master_agendas(DAY)
+
+        self.assertEqual(summary, {"masters": 3, "queued": 3})
+        self.assertEqual(
+            queued,
+            [(1, OUTBOX_MASTER_AGENDA, None, {"chat_id": 1000 + index, "text": f"agenda {index}"}) for index in range(3)],
+        )
+
+    async def test_day_claim_survives_the_dedup_purge(self):
+        table = ProcessedUpdatesTable()
+        agendas = [MasterAgenda(master_id=7, chat_id=1007, text="agenda", bookings=1)]
+        enqueue = AsyncMock()
+        with (
+            patch("app.db.AsyncSessionLocal", new=table),
+            patch("app.services.master_agenda.load_master_agendas", new=AsyncMock(return_value=agendas)),
+            patch("app.services.master_agenda.enqueue_telegram_message", new=enqueue),
+        ):
+            await send_master_agendas(DAY)
+            dedup = TelegramDedup(DEDUP_BACKEND_POSTGRES, ttl_seconds=300, max_entries=100)
+            await dedup.seen(table, "update:1")
+            table.age(timedelta(hours=1))
+            dedup._last_purge = time.monotonic() - 301
+            await dedup.seen(table, "update:2")
+            summary = await send_master_agendas(DAY)
+
+        self.assertEqual(sorted(table.rows), ["master_agenda:2026-03-14", "update:2"])
+        self.assertEqual(enqueue.await_count, 1)
+        self.assertEqual(summary, {"masters": 0, "queued": 0})
+
+    async def test_day_claimed_by_another_worker_is_skipped(self):
+        enqueue = AsyncMock()
+        with (
+            patch("app.db.AsyncSessionLocal", new=FakeDatabase()),
+            patch("app.services.master_agenda._claim_day", new=AsyncMock(return_value=False)),
+            patch("app.services.master_agenda.enqueue_telegram_message", new=enqueue),
+        ):
+            summary = await send_master_agendas(DAY)
+
+        enqueue.assert_not_awaited()
+        self.assertEqual(summary["masters"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
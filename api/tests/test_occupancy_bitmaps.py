@@ -0,0 +1,131 @@
+import random
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.availability import DayBitmap, OccupancyBitmaps, OccupancyIndex, build_day_slots, day_minute_masks
+from app.services.occupancy import BookingOccupancy, OccupancyStore
+
+TARGET_DATE = date(2026, 3, 2)
+MASTER_IDS = [1, 2, 3]
+
+
+def _bitmaps_from(bookings):
+    days: dict[date, DayBitmap] = {}
+    for booking_id, (starts_at, ends_at, master_id) in enumerate(bookings, start=1):
+        for day, mask in day_minute_masks(starts_at, ends_at):
+            days.setdefault(day, DayBitmap()).add(booking_id, master_id, mask)
+    return OccupancyBitmaps(days)
+
+
+def _random_bookings(rng, count):
+    day_start = datetime.combine(TARGET_DATE, datetime.min.time())
+    bookings = []
+    for _ in range(count):
+        starts_at = day_start + timedelta(minutes=rng.randrange(-180, 24 * 60, 5), seconds=rng.choice([0, 0, 20]))
+        ends_at = starts_at + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 120, 300]))
+        bookings.append((starts_at, ends_at, rng.choice([*MASTER_IDS, None])))
+    return bookings
+
+
+def _rows_result(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
+
+class OccupancyBitmapsTests(unittest.TestCase):
+    def test_bitmaps_match_sweep_engine(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            bookings = _random_bookings(rng, rng.randrange(0, 30))
+            slots = build_day_slots(TARGET_DATE, [(9 * 60, 21 * 60)], rng.choice([30, 60, 90]), rng.choice([15, 30]))
+            index = OccupancyIndex(bookings)
+            bitmaps = _bitmaps_from(bookings)
+
+            self.assertEqual(bitmaps.free_for_pool(slots, MASTER_IDS), index.free_for_pool(slots, MASTER_IDS))
+            self.assertEqual(bitmaps.free_for_master(slots, 2), index.free_for_master(slots, 2))
+            self.assertEqual(bitmaps.free_by_master(slots, MASTER_IDS), index.free_by_master(slots, MASTER_IDS))
+
+    def test_removing_overlapping_booking_keeps_the_other(self):
+        bitmap = DayBitmap()
+        bitmap.add(1, 5, 0b0110)
+        bitmap.add(2, 5, 0b1100)
+        bitmap.remove(1)
+
+        self.assertEqual(bitmap.master_mask(5), 0b1100)
+
+
+class OccupancyStoreTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        today_patch = patch("app.services.occupancy.date", wraps=date)
+        self.addCleanup(today_patch.stop)
+        today_patch.start().today.return_value = TARGET_DATE
+
+    async def test_loaded_days_are_reused_and_updated_in_place(self):
+        store = OccupancyStore(enabled=True)
+        busy = (1, datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 11, 0), 1)
+        hold = (-4, datetime(2026, 3, 3, 10, 0), datetime(2026, 3, 3, 11, 0), 1, datetime.max)
+        db = MagicMock(execute=AsyncMock(side_effect=[_rows_result([busy]), _rows_result([hold])]))
+        slots = build_day_slots(TARGET_DATE, [(10 * 60, 12 * 60)], 60, 60)
+
+        view = await store.view(db, TARGET_DATE, TARGET_DATE + timedelta(days=1))
+        self.assertEqual(len(view.free_for_master(slots, 1)), 1)
+        next_day_slots = build_day_slots(TARGET_DATE + timedelta(days=1), [(10 * 60, 12 * 60)], 60, 60)
+        self.assertEqual(view.free_for_master(next_day_slots, 1), [next_day_slots[1]])
+
+        store.apply(BookingOccupancy(2, 1, datetime(2026, 3, 2, 11, 0), datetime(2026, 3, 2, 12, 0), True))
+        store.apply(BookingOccupancy(1, 1, datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 11, 0), False))
+        view = await store.view(db, TARGET_DATE, TARGET_DATE)
+
+        self.assertEqual(db.execute.await_count, 2)
+        self.assertEqual(view.free_for_master(slots, 1), [slots[0]])
+
+    async def test_expired_holds_stop_blocking_without_a_sweep(self):
+        store = OccupancyStore(enabled=True)
+        loaded_hold = (-4, datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 11, 0), 1, datetime(2026, 3, 2, 9, 10))
+        db = MagicMock(execute=AsyncMock(side_effect=[_rows_result([]), _rows_result([loaded_hold])]))
+        slots = build_day_slots(TARGET_DATE, [(10 * 60, 12 * 60)], 60, 60)
+        now_patch = patch("app.services.occupancy.datetime", wraps=datetime)
+        self.addCleanup(now_patch.stop)
+        clock = now_patch.start()
+
+        clock.now.return_value = datetime(2026, 3, 2, 9, 0)
+        view = await store.view(db, TARGET_DATE, TARGET_DATE)
+        store.apply(BookingOccupancy(-5, 1, datetime(2026, 3, 2, 11, 0), datetime(2026, 3, 2, 12, 0), True, datetime(2026, 3, 2, 9, 20)))
+        self.assertEqual(view.free_for_master(slots, 1), [])
+
+        clock.now.return_value = datetime(2026, 3, 2, 9, 15)
+        self.assertEqual((await store.view(db, TARGET_DATE, TARGET_DATE)).free_for_master(slots, 1), [slots[0]])
+        clock.now.return_value = datetime(2026, 3, 2, 9, 20)
+        self.assertEqual((await store.view(db, TARGET_DATE, TARGET_DATE)).free_for_master(slots, 1), slots)
+        self.assertEqual(db.execute.await_count, 2)
+        self.assertEqual(store.stats()["holds"], 0)
+
+    async def test_change_during_load_is_not_cached(self):
+        store = OccupancyStore(enabled=True)
+
+        async def execute(*_args, **_kwargs):
+            store.apply(BookingOccupancy(9, 1, datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 11, 0), True))
+            return _rows_result([])
+
+        db = MagicMock(execute=AsyncMock(side_effect=execute))
+        await store.view(db, TARGET_DATE, TARGET_DATE)
+
+        self.assertEqual(store.stats()["days"], 0)
+
+    async def test_remote_events_evict_days_and_own_events_are_ignored(self):
+        store = OccupancyStore(enabled=True)
+        db = MagicMock(execute=AsyncMock(return_value=_rows_result([])))
+        await store.view(db, TARGET_DATE, TARGET_DATE + timedelta(days=2))
+
+        store.handle_event(f"{store.origin}:2026-03-02")
+        self.assertEqual(store.stats()["days"], 3)
+        store.handle_event("other:2026-03-02,2026-03-03")
+        self.assertEqual(store.stats()["days"], 1)
+        store.handle_event("*")
+        self.assertEqual(store.stats()["days"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.api.public import create_booking
+from app.models import Booking, Master, Service, ServiceCategory, TelegramOutbox
+from app.schemas import BookingCreate, PublicBookingOut
+from app.utils import compile_availability_rules
+
+NOW = datetime(2026, 3, 2, 8, 0)
+CREATED_AT = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+# Service, day lock, master pool, occupancy, pg_notify.
+EXPECTED_STATEMENTS = 5
+# Booking insert; the notification and outbox rows go out with the commit.
+EXPECTED_FLUSHES = 1
+
+
+def _result(scalar=None, rows=()):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = scalar
+    result.all.return_value = list(rows)
+    return result
+
+
+class PublicBookingQueryCountTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        category = ServiceCategory(id=2, title="Массаж", slug="massage", sort_order=0, is_active=True)
+        self.service = Service(
+            id=3,
+            category_id=2,
+            category=category,
+            title="Классический массаж",
+            slug="classic",
+            short_description="",
+            description="",
+            duration_min=60,
+            price_from=3000,
+            tags=[],
+            is_active=True,
+            sort_order=0,
+            created_at=CREATED_AT,
+            updated_at=CREATED_AT,
+        )
+        self.master = Master(id=7, name="Анна", slug="anna", is_active=True, sort_order=0)
+        self.rules = compile_availability_rules(
+            {day: [{"start": "10:00", "end": "12:00"}] for day in ("mon", "tue", "wed", "thu", "fri", "sat", "sun")},
+            {"value": 60},
+            {"min_lead_min": 0, "max_days_ahead": 30},
+        )
+
+    def _db(self):
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[_result(self.service), _result(), _result(self.master), _result(), _result()])
+        db.get = AsyncMock(side_effect=lambda model, ident: {Service: self.service, Master: self.master}[model])
+
+        async def flush():
+            for call in db.add.call_args_list:
+                added = call.args[0]
+                if isinstance(added, Booking) and added.id is None:
+                    added.id, added.service_id, added.master_id = 41, added.service.id, added.master.id
+                    added.source, added.is_read, added.created_at = "WEB", False, CREATED_AT
+
+        db.flush = AsyncMock(side_effect=flush)
+        return db
+
+    async def test_create_booking_reuses_loaded_objects_and_skips_telegram(self):
+        db = self._db()
+        payload = BookingCreate(client_name="Ирина", client_phone="+70000000000", service_id=3, master_id=7, starts_at=datetime(2026, 3, 2, 10, 0))
+        with (
+            patch("app.api.public.datetime", wraps=datetime) as clock,
+            patch("app.utils.load_availability_rules", new=AsyncMock(return_value=self.rules)),
+            patch("app.services.telegram.send_message", new=AsyncMock()) as send,
+        ):
+            clock.now.return_value = NOW
+            booking = await create_booking(payload, db)
+
+        statements = [str(call.args[0]) for call in db.execute.await_args_list]
+        self.assertEqual(len(statements), EXPECTED_STATEMENTS, statements)
+        self.assertFalse(any("FOR UPDATE" in statement for statement in statements))
+        self.assertEqual(db.flush.await_count, EXPECTED_FLUSHES)
+        send.assert_not_awaited()
+        outbox = [call.args[0] for call in db.add.call_args_list if isinstance(call.args[0], TelegramOutbox)]
+        self.assertEqual([(row.kind, row.booking_id) for row in outbox], [("booking_created", 41)])
+
+        out = PublicBookingOut.model_validate(booking)
+        self.assertEqual((out.id, out.service.category.slug, out.master.name), (41, "massage", "Анна"))
+
+
+if __name__ == "__main__":
+    unittest.main()
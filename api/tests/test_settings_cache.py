@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.settings_cache import SettingsCache, is_missing, settings_cache
+from app.utils import get_setting
+
+
+def _db_returning(value):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = value
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+class SettingsCacheTests(unittest.TestCase):
+    def test_expired_entry_is_a_miss(self):
+        cache = SettingsCache(ttl_seconds=10)
+        cache.store("business_hours", {"mon": []}, cache.generation, now=100.0)
+
+        self.assertEqual(cache.lookup("business_hours", now=105.0), {"mon": []})
+        self.assertTrue(is_missing(cache.lookup("business_hours", now=111.0)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_value_read_before_invalidation_is_not_stored(self):
+        cache = SettingsCache(ttl_seconds=10)
+        generation = cache.generation
+        cache.invalidate("slot_step_min")
+        cache.store("slot_step_min", {"value": 30}, generation)
+
+        self.assertTrue(is_missing(cache.lookup("slot_step_min")))
+
+    def test_cached_values_are_isolated_copies(self):
+        cache = SettingsCache(ttl_seconds=10)
+        cache.store("tg_notifications", {"enabled": True}, cache.generation)
+        cache.lookup("tg_notifications")["enabled"] = False
+
+        self.assertEqual(cache.lookup("tg_notifications"), {"enabled": True})
+
+    def test_reset_payload_clears_everything(self):
+        cache = SettingsCache(ttl_seconds=10)
+        cache.store("a", 1, cache.generation)
+        cache.store("b", 2, cache.generation)
+        cache.invalidate("*")
+
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+class GetSettingCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        settings_cache.invalidate()
+
+    def tearDown(self) -> None:
+        settings_cache.invalidate()
+
+    async def test_second_read_does_not_hit_database(self):
+        db = _db_returning({"min_lead_min": 60})
+
+        first = await get_setting(db, "booking_rules")
+        second = await get_setting(db, "booking_rules")
+
+        self.assertEqual(first, {"min_lead_min": 60})
+        self.assertEqual(second, first)
+        db.execute.assert_awaited_once()
+
+    async def test_invalidation_forces_reload(self):
+        db = _db_returning(None)
+        self.assertEqual(await get_setting(db, "contacts"), {})
+        settings_cache.invalidate("contacts")
+        await get_setting(db, "contacts")
+
+        self.assertEqual(db.execute.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
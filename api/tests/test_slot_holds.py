@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.config import settings
+from app.services.slot_holds import create_slot_hold, sweep_expired_holds
+from app.utils import load_occupancy
+
+NOW = datetime(2026, 3, 2, 9, 0)
+SLOT = (datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 11, 0))
+
+
+class SlotHoldTests(unittest.IsolatedAsyncioTestCase):
+    async def test_hold_reserves_checked_slot_until_ttl(self):
+        db = MagicMock()
+
+        async def flush():
+            db.add.call_args.args[0].id = 11
+
+        db.flush = AsyncMock(side_effect=flush)
+        with (
+            patch("app.services.slot_holds.resolve_available_slot", new=AsyncMock(return_value=SLOT)) as resolve,
+            patch("app.services.slot_holds.publish_occupancy_changes", new=AsyncMock()) as publish,
+        ):
+            hold = await create_slot_hold(db, 3, SLOT[0], NOW, master_id=7)
+
+        resolve.assert_awaited_once_with(db, 3, SLOT[0], NOW, master_id=7)
+        self.assertEqual((hold.starts_at, hold.ends_at, hold.master_id), (*SLOT, 7))
+        self.assertEqual(hold.expires_at, NOW + timedelta(seconds=settings.slot_hold_ttl_seconds))
+        self.assertTrue(hold.token)
+        change = publish.await_args.args[1][0]
+        self.assertEqual(change.booking_id, -11)
+        self.assertTrue(change.is_active)
+
+    async def test_sweep_releases_expired_holds_from_occupancy(self):
+        result = MagicMock()
+        result.all.return_value = [(5, 7, *SLOT), (6, None, *SLOT)]
+        db = MagicMock(execute=AsyncMock(return_value=result))
+        with patch("app.services.slot_holds.publish_occupancy_changes", new=AsyncMock()) as publish:
+            swept = await sweep_expired_holds(db, NOW)
+
+        self.assertEqual(swept, 2)
+        changes = publish.await_args.args[1]
+        self.assertEqual([change.booking_id for change in changes], [-5, -6])
+        self.assertFalse(any(change.is_active for change in changes))
+
+    async def test_database_occupancy_counts_active_holds(self):
+        result = MagicMock()
+        result.all.return_value = []
+        db = MagicMock(execute=AsyncMock(return_value=result))
+
+        await load_occupancy(db, *SLOT, [7], include_unassigned=True, fresh=True, exclude_hold_id=5)
+
+        statement = str(db.execute.await_args.args[0])
+        self.assertIn("UNION ALL", statement)
+        self.assertIn("slot_holds.expires_at >", statement)
+        self.assertIn("slot_holds.id !=", statement)
+
+
+if __name__ == "__main__":
+    unittest.main()
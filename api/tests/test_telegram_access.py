@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.config import settings
+from app.models import AdminRole
+from app.services.settings_cache import settings_cache
+from app.services.telegram_access import TelegramAccessCache, publish_telegram_access_change, resolve_telegram_access
+
+
+def _db(master_id: int | None) -> MagicMock:
+    db = MagicMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = master_id
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+class TelegramAccessCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.cache = TelegramAccessCache(ttl_seconds=300, max_entries=100)
+        for patcher in (
+            patch("app.services.telegram_access.telegram_access_cache", self.cache),
+            patch.object(settings, "telegram_sys_admin_ids", "1"),
+            patch.object(settings, "telegram_admin_ids", "2"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_repeat_lookups_skip_the_database(self):
+        db = _db(master_id=7)
+
+        first = await resolve_telegram_access(db, 5)
+        for _ in range(10):
+            again = await resolve_telegram_access(db, 5)
+
+        self.assertEqual(again, first)
+        self.assertEqual(first.master_id, 7)
+        self.assertIsNone(first.admin_role)
+        self.assertEqual(db.execute.await_count, 1)
+        self.assertEqual(self.cache.stats()["hits"], 10)
+
+    async def test_denied_users_are_cached_too(self):
+        db = _db(master_id=None)
+
+        await resolve_telegram_access(db, 9)
+        access = await resolve_telegram_access(db, 9)
+
+        self.assertIsNone(access.master_id)
+        self.assertEqual(db.execute.await_count, 1)
+
+    async def test_setting_change_drops_entries(self):
+        self.assertEqual((await resolve_telegram_access(_db(None), 2)).admin_role, AdminRole.admin)
+
+        with patch.object(settings, "telegram_admin_ids", "3"):
+            settings_cache.invalidate("tg_admins")
+            access = await resolve_telegram_access(_db(None), 2)
+
+        self.assertIsNone(access.admin_role)
+
+    async def test_master_link_change_drops_entries(self):
+        await resolve_telegram_access(_db(None), 5)
+        writer = _db(None)
+
+        with patch("app.services.telegram_access.run_after_commit") as after_commit:
+            await publish_telegram_access_change(writer)
+        linked = await resolve_telegram_access(_db(4), 5)
+
+        after_commit.assert_called_once_with(writer, self.cache.invalidate)
+        self.assertIn("pg_notify", str(writer.execute.await_args.args[0]))
+        self.assertEqual(linked.master_id, 4)
+
+    async def test_value_read_before_invalidation_is_not_stored(self):
+        generation = self.cache.generation
+        self.cache.invalidate()
+        self.cache.store(5, MagicMock(), generation)
+
+        self.assertIsNone(self.cache.lookup(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
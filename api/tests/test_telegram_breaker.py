@@ -0,0 +1,124 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+
+from app.api.telegram import telegram_health
+from app.core.config import settings
+from app.schemas import TgNotificationsSettings
+from app.services.telegram import TelegramError, TelegramUnavailableError, close_telegram_client, send_message
+from app.services.telegram_breaker import BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN, CircuitBreaker
+from app.services.telegram_outbox import OUTBOX_BOOKING_CREATED, deliver_telegram_outbox
+
+from fake_db import FakeDatabase
+
+
+def _breaker(**overrides) -> CircuitBreaker:
+    options = {"enabled": True, "window_seconds": 60.0, "min_calls": 4, "failure_ratio": 0.5, "open_seconds": 30.0}
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def test_opens_on_failure_ratio_and_probes_after_cooldown(self):
+        breaker = _breaker()
+        breaker.record_success(now=0.0)
+        breaker.record_success(now=1.0)
+        breaker.record_failure(now=2.0)
+        self.assertEqual(breaker.state, BREAKER_CLOSED)
+
+        breaker.record_failure(now=3.0)
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+        self.assertFalse(breaker.allow(now=10.0))
+
+        self.assertTrue(breaker.allow(now=33.0))
+        self.assertEqual(breaker.state, BREAKER_HALF_OPEN)
+        self.assertFalse(breaker.allow(now=34.0))
+        breaker.record_success(now=35.0)
+        self.assertEqual(breaker.state, BREAKER_CLOSED)
+        self.assertTrue(breaker.allow(now=36.0))
+
+    def test_failed_probe_reopens(self):
+        breaker = _breaker(min_calls=1)
+        breaker.record_failure(now=0.0)
+        self.assertTrue(breaker.allow(now=30.0))
+
+        breaker.record_failure(now=31.0)
+
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+        self.assertFalse(breaker.allow(now=60.0))
+        self.assertEqual(breaker.stats()["opened"], 2)
+
+    def test_old_failures_leave_the_window(self):
+        breaker = _breaker(min_calls=3, window_seconds=10.0)
+        breaker.record_failure(now=0.0)
+        breaker.record_failure(now=1.0)
+        breaker.record_success(now=20.0)
+        breaker.record_failure(now=21.0)
+
+        self.assertEqual(breaker.state, BREAKER_CLOSED)
+
+
+class BreakerSendTests(unittest.IsolatedAsyncioTestCase):
+    async def test_open_breaker_fails_fast_without_network(self):
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request.url.path)
+            raise httpx.ConnectError("unreachable", request=request)
+
+        breaker = _breaker(min_calls=2)
+        with (
+            patch("app.services.telegram._build_http_client", new=lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))),
+            patch("app.services.telegram.telegram_breaker", new=breaker),
+            patch.object(settings, "telegram_bot_token", "123:abc"),
+            patch.object(settings, "telegram_rate_limit_enabled", False),
+        ):
+            with self.assertRaises(TelegramError):
+                await send_message(chat_id=7, text="first")
+            with self.assertRaises(TelegramUnavailableError):
+                await send_message(chat_id=7, text="second")
+            await close_telegram_client()
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+
+    async def test_health_reports_breaker_state(self):
+        breaker = _breaker(min_calls=1)
+        breaker.record_failure()
+        with patch("app.api.telegram.telegram_breaker", new=breaker):
+            health = await telegram_health()
+
+        self.assertTrue(health["ok"])
+        self.assertEqual(health["breaker"]["state"], BREAKER_OPEN)
+
+
+class BreakerOutboxTests(unittest.IsolatedAsyncioTestCase):
+    async def test_open_breaker_leaves_outbox_untouched(self):
+        breaker = _breaker(min_calls=1)
+        breaker.record_failure()
+        factory = MagicMock()
+        with patch("app.services.telegram_outbox.telegram_breaker", new=breaker), patch("app.db.AsyncSessionLocal", new=factory):
+            self.assertEqual(await deliver_telegram_outbox(), 0)
+        factory.assert_not_called()
+
+    async def test_refused_send_is_deferred_without_spending_an_attempt(self):
+        database = FakeDatabase([(5, OUTBOX_BOOKING_CREATED, 41, {}, 2)])
+        send = AsyncMock(side_effect=TelegramUnavailableError("Telegram API circuit is open"))
+        with (
+            patch("app.db.AsyncSessionLocal", new=database),
+            patch("app.services.telegram_outbox.telegram_breaker", new=_breaker()),
+            patch("app.services.telegram_outbox.load_booking_for_notification", new=AsyncMock(return_value=SimpleNamespace(id=41, tg_new_sent_at=None))),
+            patch("app.services.telegram_outbox.get_tg_notifications_settings", new=AsyncMock(return_value=TgNotificationsSettings())),
+            patch("app.services.telegram_outbox.send_booking_created_to_admin", new=send),
+        ):
+            await deliver_telegram_outbox()
+
+        deferred = database.statements[-1]
+        self.assertIn("attempts=(telegram_outbox.attempts -", str(deferred))
+        self.assertNotIn("status", deferred.compile().params)
+
+
+if __name__ == "__main__":
+    unittest.main()
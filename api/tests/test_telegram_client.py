@@ -0,0 +1,60 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from app.services.telegram import close_telegram_client, get_me, get_telegram_client, get_updates, send_message
+
+
+class TelegramClientTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return httpx.Response(200, json={"ok": True, "result": {"message_id": len(self.requests)}})
+
+        self.clients: list[httpx.AsyncClient] = []
+
+        def build() -> httpx.AsyncClient:
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            self.clients.append(client)
+            return client
+
+        for target, value in (
+            ("app.services.telegram._build_http_client", build),
+            ("app.services.telegram.settings.telegram_bot_token", "123:abc"),
+            ("app.services.telegram.settings.telegram_api_base_url", "http://stub.local/"),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addAsyncCleanup(close_telegram_client)
+
+    async def test_calls_share_one_client(self):
+        await send_message(chat_id=1, text="one")
+        await send_message(chat_id=1, text="two")
+
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual([json.loads(request.content)["text"] for request in self.requests], ["one", "two"])
+        self.assertEqual(str(self.requests[0].url), "http://stub.local/bot123:abc/sendMessage")
+
+    async def test_per_call_timeout_is_kept(self):
+        await get_me(timeout_seconds=3.0)
+        await get_updates(timeout=25)
+
+        timeouts = [request.extensions["timeout"] for request in self.requests]
+        self.assertEqual((timeouts[0]["connect"], timeouts[0]["read"]), (3.0, 3.0))
+        self.assertEqual(timeouts[1]["read"], 60.0)
+
+    async def test_closed_client_is_reopened(self):
+        first = get_telegram_client()
+        await close_telegram_client()
+
+        self.assertTrue(first.is_closed)
+        self.assertIsNot(get_telegram_client(), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.telegram_dedup import DEDUP_BACKEND_POSTGRES, TelegramDedup, TtlDedup
+
+
+class TtlDedupTests(unittest.TestCase):
+    def test_duplicate_within_ttl_and_fresh_after_expiry(self):
+        dedup = TtlDedup(ttl_seconds=300, max_entries=100)
+
+        self.assertFalse(dedup.seen(1, now=0.0))
+        self.assertTrue(dedup.seen(1, now=299.0))
+        self.assertFalse(dedup.seen(2, now=301.0))
+        self.assertEqual(len(dedup), 1)
+        self.assertFalse(dedup.seen(1, now=302.0))
+
+    def test_size_cap_evicts_oldest(self):
+        dedup = TtlDedup(ttl_seconds=300, max_entries=3)
+        for key in range(5):
+            dedup.seen(key, now=float(key))
+
+        self.assertEqual(len(dedup), 3)
+        self.assertEqual(dedup.evicted, 2)
+        self.assertFalse(dedup.seen(0, now=5.0))
+        self.assertTrue(dedup.seen(4, now=5.0))
+
+    def test_check_cost_does_not_grow_with_entries(self):
+        dedup = TtlDedup(ttl_seconds=300, max_entries=200_000)
+        for key in range(100_000):
+            dedup.seen(key, now=1.0)
+
+        started = time.perf_counter()
+        for key in range(100_000, 101_000):
+            dedup.seen(key, now=2.0)
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+
+class SharedDedupTests(unittest.IsolatedAsyncioTestCase):
+    @staticmethod
+    def _db(claimed: bool) -> MagicMock:
+        db = MagicMock()
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = "update:1" if claimed else None
+        result.rowcount = 0
+        db.execute = AsyncMock(return_value=result)
+        return db
+
+    async def test_key_claimed_by_another_worker_is_duplicate(self):
+        dedup = TelegramDedup(DEDUP_BACKEND_POSTGRES, ttl_seconds=300, max_entries=100)
+        db = self._db(claimed=False)
+
+        self.assertTrue(await dedup.seen(db, "update:1"))
+        sql = str(db.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("ON CONFLICT (key) DO UPDATE", sql)
+        self.assertIn("WHERE telegram_processed_updates.seen_at <", sql)
+
+    async def test_local_hit_skips_the_query(self):
+        dedup = TelegramDedup(DEDUP_BACKEND_POSTGRES, ttl_seconds=300, max_entries=100)
+        db = self._db(claimed=True)
+
+        self.assertFalse(await dedup.seen(db, "update:1"))
+        calls = db.execute.await_count
+        self.assertTrue(await dedup.seen(db, "update:1"))
+        self.assertEqual(db.execute.await_count, calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.core.config import settings
+from app.schemas import TgNotificationsSettings
+from app.services import telegram_outbox
+from app.services.telegram import parse_callback_data, send_booking_digest_to_admin
+from app.services.telegram_outbox import OUTBOX_BOOKING_CREATED, deliver_telegram_outbox
+
+from fake_db import FakeDatabase
+
+
+def _booking(booking_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=booking_id,
+        starts_at=datetime(2026, 3, 14, 10, booking_id),
+        service=SimpleNamespace(title="Массаж"),
+        service_id=1,
+        client_name=f"Клиент {booking_id}",
+        client_phone="+79990000000",
+        tg_new_sent_at=None,
+    )
+
+
+class BookingDigestOutboxTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.database = FakeDatabase()
+        self.held: list[tuple[int, int]] = []
+
+        async def send(bookings, tg_settings):
+            self.held.append((self.database.open_sessions, self.database.open_transactions))
+            for booking in bookings:
+                booking.tg_new_sent_at = datetime(2026, 3, 14, 9, tzinfo=timezone.utc)
+            return True
+
+        self.send = AsyncMock(side_effect=send)
+        patchers = (
+            patch("app.db.AsyncSessionLocal", new=self.database),
+            patch("app.services.telegram_outbox.get_tg_notifications_settings", new=AsyncMock(return_value=TgNotificationsSettings())),
+            patch("app.services.telegram_outbox._digest_window", new=AsyncMock(return_value=("-100:", 30))),
+            patch("app.services.telegram_outbox.send_booking_digest_to_admin", new=self.send),
+            patch.dict(telegram_outbox._digest_windows, clear=True),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _run(self, booking_ids: list[int]) -> None:
+        claimed = [(100 + booking_id, OUTBOX_BOOKING_CREATED, booking_id, {}, 1) for booking_id in booking_ids]
+        self.database.queue(claimed, [_booking(booking_id) for booking_id in booking_ids])
+        await deliver_telegram_outbox()
+
+    async def test_single_booking_goes_out_at_once(self):
+        await self._run([1])
+
+        self.send.assert_awaited_once()
+        self.assertEqual([booking.id for booking in self.send.await_args.args[0]], [1])
+
+    async def test_bookings_inside_the_window_are_sent_together(self):
+        await self._run([1])
+        await self._run([2])
+        await self._run([3])
+        self.assertEqual(self.send.await_count, 1)
+        held = self.database.statements[-1]
+        self.assertIn("next_attempt_at", held.compile().params)
+
+        telegram_outbox._digest_windows["-100:"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await self._run([2, 3])
+
+        self.assertEqual(self.send.await_count, 2)
+        self.assertEqual([booking.id for booking in self.send.await_args.args[0]], [2, 3])
+        self.assertEqual(self.held, [(0, 0), (0, 0)])
+        marked, deleted = self.database.statements[-2:]
+        self.assertTrue(str(marked).startswith("UPDATE bookings SET tg_new_sent_at"))
+        self.assertEqual(marked.compile().params["id_1"], [2, 3])
+        self.assertTrue(str(deleted).startswith("DELETE FROM telegram_outbox"))
+
+
+class BookingDigestMessageTests(unittest.IsolatedAsyncioTestCase):
+    async def test_digest_lists_bookings_with_a_button_each(self):
+        tg_settings = TgNotificationsSettings(enabled=True, admin_chat_id=-100, thread_id=7)
+        bookings = [_booking(1), _booking(2), _booking(3)]
+        with (
+            patch("app.services.telegram.send_message", new=AsyncMock(return_value={"result": {"message_id": 5}})) as send_message,
+            patch.object(settings, "telegram_bot_token", "123:abc"),
+        ):
+            self.assertTrue(await send_booking_digest_to_admin(bookings, tg_settings))
+
+        send_message.assert_awaited_once()
+        kwargs = send_message.await_args.kwargs
+        self.assertTrue(kwargs["text"].startswith("🆕 Новые записи: 3"))
+        self.assertEqual(kwargs["thread_id"], 7)
+        buttons = [row[0]["callback_data"] for row in kwargs["reply_markup"]["inline_keyboard"]]
+        self.assertEqual(buttons, ["b:1:open", "b:2:open", "b:3:open"])
+        self.assertEqual(parse_callback_data(buttons[0]), {"booking_id": 1, "action": "open"})
+        self.assertTrue(all(booking.tg_new_sent_at is not None for booking in bookings))
+
+
+if __name__ == "__main__":
+    unittest.main()
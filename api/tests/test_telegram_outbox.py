@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.models import BookingStatus
+from app.schemas import TgNotificationsSettings
+from app.services.telegram import TelegramError
+from app.services.telegram_outbox import OUTBOX_BOOKING_CREATED, OUTBOX_MASTER_AGENDA, OUTBOX_MASTER_CONFIRMED, deliver_telegram_outbox, outbox_stats
+
+from fake_db import FakeDatabase
+
+
+class TelegramOutboxTests(unittest.IsolatedAsyncioTestCase):
+    async def _deliver(self, claimed, booking, send):
+        database = FakeDatabase(claimed)
+        with (
+            patch("app.db.AsyncSessionLocal", new=database),
+            patch("app.services.telegram_outbox.load_booking_for_notification", new=AsyncMock(return_value=booking)),
+            patch("app.services.telegram_outbox.get_tg_notifications_settings", new=AsyncMock(return_value=TgNotificationsSettings())),
+            patch("app.services.telegram_outbox.send_booking_created_to_admin", new=send),
+            patch("app.services.telegram_outbox.send_master_booking_confirmed", new=send),
+            patch("app.services.telegram_outbox._digest_window", new=AsyncMock(return_value=None)),
+        ):
+            processed = await deliver_telegram_outbox()
+        return processed, database.statements
+
+    @staticmethod
+    def _params(statement) -> dict:
+        return statement.compile().params
+
+    async def test_delivered_row_is_removed(self):
+        before = outbox_stats()["delivered"]
+        send = AsyncMock(return_value=True)
+        processed, statements = await self._deliver([(1, OUTBOX_BOOKING_CREATED, 41, {}, 1)], SimpleNamespace(id=41, tg_new_sent_at=None), send)
+
+        self.assertEqual(processed, 1)
+        send.assert_awaited_once()
+        self.assertTrue(str(statements[-1]).startswith("DELETE FROM telegram_outbox"))
+        self.assertEqual(outbox_stats()["delivered"], before + 1)
+
+    async def test_send_runs_with_no_session_and_records_sent_at_afterwards(self):
+        held: list[tuple[int, int]] = []
+        booking = SimpleNamespace(id=41, tg_new_sent_at=None)
+
+        async def send(booking, tg_settings):
+            held.append((database.open_sessions, database.open_transactions))
+            booking.tg_new_sent_at = datetime(2026, 3, 14, 10, tzinfo=timezone.utc)
+            return True
+
+        database = FakeDatabase([(6, OUTBOX_BOOKING_CREATED, 41, {}, 1)])
+        with (
+            patch("app.db.AsyncSessionLocal", new=database),
+            patch("app.services.telegram_outbox.load_booking_for_notification", new=AsyncMock(return_value=booking)),
+            patch("app.services.telegram_outbox.get_tg_notifications_settings", new=AsyncMock(return_value=TgNotificationsSettings())),
+            patch("app.services.telegram_outbox.send_booking_created_to_admin", new=send),
+            patch("app.services.telegram_outbox._digest_window", new=AsyncMock(return_value=None)),
+        ):
+            await deliver_telegram_outbox()
+
+        self.assertEqual(held, [(0, 0)])
+        update, delete = database.statements[-2:]
+        self.assertTrue(str(update).startswith("UPDATE bookings SET tg_new_sent_at"))
+        self.assertEqual(self._params(update)["tg_new_sent_at"], booking.tg_new_sent_at)
+        self.assertTrue(str(delete).startswith("DELETE FROM telegram_outbox"))
+
+    async def test_master_agenda_is_sent_from_its_payload(self):
+        send_message = AsyncMock(return_value={"ok": True})
+        with patch("app.services.telegram_outbox.send_message", new=send_message):
+            _, statements = await self._deliver([(7, OUTBOX_MASTER_AGENDA, None, {"chat_id": 1007, "text": "agenda"}, 1)], None, AsyncMock())
+
+        self.assertEqual(send_message.await_args.kwargs["chat_id"], 1007)
+        self.assertEqual(send_message.await_args.kwargs["text"], "agenda")
+        self.assertTrue(str(statements[-1]).startswith("DELETE FROM telegram_outbox"))
+
+    async def test_temporary_failure_is_rescheduled(self):
+        send = AsyncMock(side_effect=TelegramError("Telegram API request failed", status_code=502))
+        _, statements = await self._deliver([(2, OUTBOX_BOOKING_CREATED, 41, {}, 3)], SimpleNamespace(id=41, tg_new_sent_at=None), send)
+
+        params = self._params(statements[-1])
+        self.assertIn("next_attempt_at", params)
+        self.assertNotIn("status", params)
+
+    async def test_rejected_chat_fails_without_retry(self):
+        send = AsyncMock(side_effect=TelegramError("Forbidden: bot was blocked by the user", status_code=403))
+        _, statements = await self._deliver([(3, OUTBOX_BOOKING_CREATED, 41, {}, 1)], SimpleNamespace(id=41, tg_new_sent_at=None), send)
+
+        self.assertEqual(self._params(statements[-1])["status"], "failed")
+
+    async def test_confirmation_is_dropped_once_booking_changed_status(self):
+        send = AsyncMock(return_value=True)
+        booking = SimpleNamespace(id=41, status=BookingStatus.cancelled, tg_new_sent_at=None)
+        _, statements = await self._deliver([(4, OUTBOX_MASTER_CONFIRMED, 41, {}, 1)], booking, send)
+
+        send.assert_not_awaited()
+        self.assertTrue(str(statements[-1]).startswith("DELETE FROM telegram_outbox"))
+
+
+if __name__ == "__main__":
+    unittest.main()
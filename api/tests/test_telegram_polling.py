@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+
+from app.services.telegram_updates import UpdateDispatcher, UpdatePoller
+
+
+def _message(update_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "text": "/start"}}
+
+
+class _FakeGetUpdates:
+    # Telegram semantics: an offset confirms every update below it for good.
+    def __init__(self, updates: list[dict]) -> None:
+        self.updates = list(updates)
+        self.offsets: list[int | None] = []
+
+    async def __call__(self, offset: int | None, timeout: int) -> list[dict]:
+        self.offsets.append(offset)
+        if offset is not None:
+            self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        await asyncio.sleep(0)
+        return list(self.updates[:100])
+
+
+class UpdatePollerTests(unittest.IsolatedAsyncioTestCase):
+    async def _dispatcher(self, handler) -> UpdateDispatcher:
+        dispatcher = UpdateDispatcher(workers=8, max_pending=100)
+        dispatcher.start(handler)
+        self.addAsyncCleanup(dispatcher.stop)
+        return dispatcher
+
+    async def test_offset_moves_only_past_finished_prefix(self):
+        gates = {update_id: asyncio.Event() for update_id in (1, 2, 3)}
+
+        async def handler(update: dict) -> None:
+            await gates[update["update_id"]].wait()
+
+        poller = UpdatePoller(await self._dispatcher(handler), max_in_flight=10, idle_seconds=0.01)
+        fetch = _FakeGetUpdates([_message(1, 10), _message(2, 20), _message(3, 30)])
+
+        self.assertEqual(await poller.poll_once(fetch), 3)
+        gates[2].set()
+        gates[3].set()
+        await asyncio.sleep(0.01)
+        self.assertIsNone(poller.advance())
+
+        # Redelivered updates that are still running are not submitted twice.
+        self.assertEqual(await poller.poll_once(fetch), 0)
+        gates[1].set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(poller.advance(), 4)
+        self.assertEqual(poller.in_flight, 0)
+
+    async def test_chats_run_in_parallel_and_keep_order(self):
+        handled: list[int] = []
+
+        async def handler(update: dict) -> None:
+            await asyncio.sleep(0.02)
+            handled.append(update["update_id"])
+
+        dispatcher = await self._dispatcher(handler)
+        poller = UpdatePoller(dispatcher, max_in_flight=4, idle_seconds=0.01)
+        fetch = _FakeGetUpdates([_message(update_id, update_id % 2) for update_id in range(1, 9)])
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while poller.advance() != 9:
+            await poller.poll_once(fetch)
+            self.assertLessEqual(poller.in_flight, 4)
+        elapsed = loop.time() - started
+
+        self.assertEqual([update_id for update_id in handled if update_id % 2], [1, 3, 5, 7])
+        self.assertEqual([update_id for update_id in handled if not update_id % 2], [2, 4, 6, 8])
+        self.assertLess(elapsed, 8 * 0.02)
+        self.assertEqual(dispatcher.stats()["processed"], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
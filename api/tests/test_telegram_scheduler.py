@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from app.core.config import settings
+from app.services.telegram import close_telegram_client, send_message
+from app.services.telegram_scheduler import PRIORITY_HIGH, PRIORITY_LOW, TelegramSendScheduler
+
+
+class SendSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    def _limits(self, **values) -> None:
+        for name, value in values.items():
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_high_priority_is_granted_first_when_global_budget_is_short(self):
+        self._limits(telegram_send_global_per_second=20.0, telegram_send_chat_per_second=100.0, telegram_send_chat_burst=5.0)
+        scheduler = TelegramSendScheduler(enabled=True)
+        order: list[str] = []
+
+        async def send(name: str, chat_id: int, priority: int) -> None:
+            await scheduler.acquire(chat_id, priority)
+            order.append(name)
+
+        # Drain the global burst, then queue a menu reply ahead of a booking alert.
+        await asyncio.gather(*(scheduler.acquire(100 + index) for index in range(20)))
+        await asyncio.gather(send("menu", 1, PRIORITY_LOW), send("alert", 2, PRIORITY_HIGH))
+
+        self.assertEqual(order, ["alert", "menu"])
+        self.assertEqual(scheduler.stats()["queue_depth"], {"high": 0, "normal": 0, "low": 0})
+
+    async def test_throttled_chat_does_not_block_other_chats(self):
+        self._limits(telegram_send_global_per_second=100.0, telegram_send_chat_per_second=5.0, telegram_send_chat_burst=1.0)
+        scheduler = TelegramSendScheduler(enabled=True)
+        loop = asyncio.get_running_loop()
+        done: dict[str, float] = {}
+        started = loop.time()
+
+        async def send(name: str, chat_id: int) -> None:
+            await scheduler.acquire(chat_id)
+            done[name] = loop.time() - started
+
+        await asyncio.gather(send("first", 1), send("second", 1), send("other", 2))
+
+        self.assertLess(done["other"], 0.05)
+        self.assertGreaterEqual(done["second"], 0.19)
+        self.assertGreater(scheduler.stats()["wait_max_ms"], 150)
+
+    async def test_idle_chat_buckets_are_swept(self):
+        self._limits(telegram_send_global_per_second=100.0, telegram_send_chat_per_second=100.0, telegram_send_chat_burst=1.0)
+        scheduler = TelegramSendScheduler(enabled=True)
+        await asyncio.gather(scheduler.acquire(1), scheduler.acquire(2))
+        await asyncio.sleep(0.05)
+
+        with patch("app.services.telegram_scheduler.BUCKET_SWEEP_SECONDS", 0.0):
+            scheduler.throttle(3, retry_after=30)
+            await scheduler.acquire(4)
+
+        # 1 and 2 have refilled; 3 is still banned and 4 has just spent its token.
+        self.assertEqual(scheduler.stats()["chat_buckets"], 2)
+
+
+class RetryAfterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_429_waits_exactly_retry_after(self):
+        loop = asyncio.get_running_loop()
+        sent_at: list[float] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent_at.append(loop.time())
+            if len(sent_at) == 1:
+                return httpx.Response(429, json={"ok": False, "error_code": 429, "parameters": {"retry_after": 0.3}})
+            return httpx.Response(200, json={"ok": True, "result": {"message_id": 1}})
+
+        scheduler = TelegramSendScheduler(enabled=True)
+        with (
+            patch("app.services.telegram._build_http_client", new=lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))),
+            patch("app.services.telegram.send_scheduler", new=scheduler),
+            patch.object(settings, "telegram_bot_token", "123:abc"),
+        ):
+            await send_message(chat_id=7, text="hi")
+            await close_telegram_client()
+
+        self.assertEqual(len(sent_at), 2)
+        self.assertAlmostEqual(sent_at[1] - sent_at[0], 0.3, delta=0.05)
+        self.assertEqual(scheduler.stats()["throttled"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
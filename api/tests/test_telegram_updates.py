@@ -0,0 +1,102 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+from fastapi import FastAPI
+
+from app.api import telegram as telegram_api
+from app.core.config import settings
+from app.db import get_db
+from app.services.telegram_updates import UpdateDispatcher
+
+SECRET = "hook-secret"
+
+
+def _message(update_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "text": "/start"}}
+
+
+class UpdateDispatcherTests(unittest.IsolatedAsyncioTestCase):
+    async def test_same_chat_in_order_other_chats_in_parallel(self):
+        events: list[tuple[str, int]] = []
+
+        async def handler(update: dict) -> None:
+            events.append(("start", update["update_id"]))
+            await asyncio.sleep(0.05)
+            events.append(("end", update["update_id"]))
+
+        dispatcher = UpdateDispatcher(workers=4, max_pending=100)
+        dispatcher.start(handler)
+        self.addAsyncCleanup(dispatcher.stop)
+        futures = [dispatcher.submit(_message(update_id, chat_id)) for update_id, chat_id in ((1, 10), (2, 10), (3, 20), (4, 10))]
+        await asyncio.gather(*futures)
+
+        chat_10 = [update_id for kind, update_id in events if kind == "start" and update_id != 3]
+        self.assertEqual(chat_10, [1, 2, 4])
+        self.assertLess(events.index(("start", 3)), events.index(("end", 1)))
+        self.assertLess(events.index(("end", 3)), events.index(("end", 2)))
+        self.assertEqual(dispatcher.stats()["processed"], 4)
+
+
+class FastAckWebhookTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.release = asyncio.Event()
+        self.handled: list[int] = []
+
+        async def slow_handler(update: dict) -> None:
+            await self.release.wait()
+            self.handled.append(update["update_id"])
+
+        self.dispatcher = UpdateDispatcher(workers=2, max_pending=20)
+        self.dispatcher.start(slow_handler)
+        self.addAsyncCleanup(self.dispatcher.stop)
+
+        app = FastAPI()
+        app.include_router(telegram_api.router)
+
+        async def override_get_db():
+            yield MagicMock()
+
+        app.dependency_overrides[get_db] = override_get_db
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        self.addAsyncCleanup(self.client.aclose)
+        for patcher in (
+            patch.object(telegram_api, "update_dispatcher", self.dispatcher),
+            patch.object(settings, "telegram_webhook_secret", SECRET),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _post(self, update: dict) -> httpx.Response:
+        return await self.client.post("/telegram/webhook", json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET})
+
+    async def test_webhook_acks_before_processing(self):
+        timings = []
+        for update_id in range(20):
+            started = time.perf_counter()
+            response = await self._post(_message(update_id, update_id % 3))
+            timings.append(time.perf_counter() - started)
+            self.assertEqual(response.json(), {"ok": True})
+
+        self.assertEqual(self.handled, [])
+        self.assertLess(sorted(timings)[len(timings) // 2], 0.01)
+        self.release.set()
+        while self.dispatcher.pending:
+            await asyncio.sleep(0.01)
+        self.assertEqual(sorted(self.handled), list(range(20)))
+
+    async def test_full_queue_asks_telegram_to_retry(self):
+        for update_id in range(20):
+            await self._post(_message(update_id, 1))
+
+        response = await self._post(_message(99, 1))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.dispatcher.stats()["rejected"], 1)
+        self.release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
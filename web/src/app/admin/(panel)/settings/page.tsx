@@ -16,6 +16,7 @@ type TgSettings = {
   template_booking_confirmed_admin: string | null;
   template_booking_assigned_master: string | null;
   send_inline_actions: boolean;
+  new_booking_digest_seconds: number;
   public_webhook_base_url: string | null;
   webhook_secret: string | null;
 };
@@ -78,6 +79,15 @@ export default async function AdminSettingsPage() {
             <input type="checkbox" name="send_inline_actions" className="mr-2" defaultChecked={Boolean(tg.send_inline_actions)} />
             Inline-кнопки в Telegram
           </label>
+          <input
+            name="new_booking_digest_seconds"
+            type="number"
+            min={0}
+            max={3600}
+            placeholder="Окно сводки новых записей, сек (0 — без сводки)"
+            defaultValue={tg.new_booking_digest_seconds || ""}
+            className="rounded-2xl border border-blush-100 px-4 py-3 text-sm md:col-span-2"
+          />
           <input
             name="public_webhook_base_url"
             placeholder="public_webhook_base_url"
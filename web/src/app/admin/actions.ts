@@ -132,6 +132,7 @@ export async function saveTelegramNotifications(_prevState: AdminFormState, form
     template_booking_confirmed_admin: (formData.get("template_booking_confirmed_admin") as string | null) || null,
     template_booking_assigned_master: (formData.get("template_booking_assigned_master") as string | null) || null,
     send_inline_actions: formData.get("send_inline_actions") === "on",
+    new_booking_digest_seconds: formData.get("new_booking_digest_seconds") ? Number(formData.get("new_booking_digest_seconds")) : 0,
     public_webhook_base_url: (formData.get("public_webhook_base_url") as string | null) || null,
     webhook_secret: (formData.get("webhook_secret") as string | null) || null
   };
@@ -66,3 +66,7 @@ export async function proxyPost(request: Request, path: string) {
     { cacheMode: "no-store", cacheControl: "no-store" }
   );
 }
+
+export async function proxyDelete(request: Request, path: string) {
+  return proxyRequest(request, path, { method: "DELETE" }, { cacheMode: "no-store", cacheControl: "no-store" });
+}
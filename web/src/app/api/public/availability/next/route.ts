@@ -0,0 +1,5 @@
+import { proxyGet } from "@/app/api/proxy";
+
+export async function GET(request: Request) {
+  return proxyGet(request, "/public/availability/next");
+}
@@ -0,0 +1,5 @@
+import { proxyDelete } from "@/app/api/proxy";
+
+export async function DELETE(request: Request, { params }: { params: { token: string } }) {
+  return proxyDelete(request, `/public/slot-holds/${encodeURIComponent(params.token)}`);
+}
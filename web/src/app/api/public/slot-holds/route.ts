@@ -0,0 +1,5 @@
+import { proxyPost } from "@/app/api/proxy";
+
+export async function POST(request: Request) {
+  return proxyPost(request, "/public/slot-holds");
+}